@@ -1,10 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import json
+import asyncio
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, asc, desc
+from sqlalchemy import asc, desc
 from typing import List, Optional, Literal
 
+from app.core.config import ALERT_EVENTS_CONFIG
 from app.db.base import get_db
 from app.models.alerts import Alert
+from app.services.alert_stats import alert_stats
+from app.services.data_version import data_versions, ALERTS
+from app.services.alert_events import alert_events, CREATED, UPDATED, DELETED, REFRESH
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_page
+from app.utils.etag import make_etag, not_modified
 from app.schemas.alerts import (
     AlertCreate,
     AlertOut,
@@ -14,6 +24,12 @@ from app.schemas.alerts import (
 
 router = APIRouter()
 
+
+def _alerts_etag(request: Request):
+    # days_until_expiry changes with the date even when no alert is written
+    return make_etag(request, data_versions.current(ALERTS), date.today())
+
+
 def mysql_order_with_nulls_last(
     primary_col,
     direction: Optional[str],       
@@ -43,28 +59,36 @@ def create_alert(payload: AlertCreate, db: Session = Depends(get_db)):
         alert_severity=payload.alert_severity,
         product=payload.product,
         expiration_date=payload.expiration_date,
-        days_until_expiry=payload.days_until_expiry,
     )
     db.add(alert)
     db.commit()
+    version = data_versions.bump(ALERTS)
     db.refresh(alert)
+    alert_events.publish(CREATED, alert, version=version)
     return alert
 
 
 @router.get("/", response_model=PaginatedAlertOut)
 def list_alerts(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
 
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
     include_total: bool = Query(False),
 
-    severity: Optional[List[Literal["High"]]] = Query(None),
+    severity: Optional[List[Literal["Critical", "High", "Medium"]]] = Query(None),
     alert_type: Optional[List[str]] = Query(None),
     product: Optional[List[str]] = Query(None),
     sort_by: Optional[Literal["expiry", "ref"]] = Query(None),
     sort_dir: Optional[Literal["asc", "desc"]] = Query("desc"),
+    cursor: Optional[str] = Query(None),
 ):
+    unchanged = not_modified(request, response, _alerts_etag(request))
+    if unchanged:
+        return unchanged
+
     q = db.query(Alert)
     if severity:
         q = q.filter(Alert.alert_severity.in_(severity))
@@ -72,30 +96,49 @@ def list_alerts(
         q = q.filter(Alert.alert_type.in_(alert_type))
     if product:
         q = q.filter(Alert.product.in_(product))
-    if sort_by == "expiry":
-        order_clauses = mysql_order_with_nulls_last(
-            primary_col=Alert.days_until_expiry,
-            direction=sort_dir,
-            fallback_ref_col=Alert.REF_PERSONNE,
-        )
-        q = q.order_by(*order_clauses)
-    else:
-        q = q.order_by(asc(Alert.REF_PERSONNE) if sort_dir == "asc" else desc(Alert.REF_PERSONNE))
 
-    items = q.limit(limit).offset(offset).all()
+    # days_until_expiry is derived from expiration_date and sorts the same way
+    by_expiry = sort_by == "expiry"
+    direction = sort_dir or "desc"
+    order = ["alerts", "expiry" if by_expiry else "ref", direction, severity, alert_type, product]
+    ref_order = asc(Alert.REF_PERSONNE) if direction == "asc" else desc(Alert.REF_PERSONNE)
+
+    if cursor is not None:
+        # Keyset mode: each page is an index range read from the previous page's last row
+        if offset:
+            raise HTTPException(status_code=400, detail="offset cannot be combined with cursor")
+        if by_expiry:
+            after = decode_cursor(cursor, order, 2)
+            rows = keyset_page(q, Alert.expiration_date, Alert.REF_PERSONNE, direction, after, limit)
+        else:
+            (after_ref,) = decode_cursor(cursor, order, 1)
+            q = q.filter(Alert.REF_PERSONNE > after_ref if direction == "asc" else Alert.REF_PERSONNE < after_ref)
+            rows = q.order_by(ref_order).limit(limit + 1).all()
+        items = rows[:limit]
+        has_more = len(rows) > limit
+    else:
+        if by_expiry:
+            order_clauses = mysql_order_with_nulls_last(
+                primary_col=Alert.expiration_date,
+                direction=direction,
+                fallback_ref_col=Alert.REF_PERSONNE,
+            )
+            q = q.order_by(*order_clauses, ref_order)
+        else:
+            q = q.order_by(ref_order)
+        items = q.limit(limit).offset(offset).all()
 
     total: Optional[int] = None
     if include_total:
-        cq = db.query(func.count(Alert.REF_PERSONNE))
-        if severity:
-            cq = cq.filter(Alert.alert_severity.in_(severity))
-        if alert_type:
-            cq = cq.filter(Alert.alert_type.in_(alert_type))
-        if product:
-            cq = cq.filter(Alert.product.in_(product))
-        total = cq.scalar()
+        total = alert_stats.count(db, severity=severity, alert_type=alert_type, product=product)
+
+    if cursor is None:
+        has_more = len(items) == limit and (total is None or (offset + limit) < total)
 
-    has_more = len(items) == limit and (total is None or (offset + limit) < total)
+    next_cursor = None
+    if has_more and items:
+        last = items[-1]
+        next_cursor = encode_cursor(order, [last.expiration_date, last.REF_PERSONNE] if by_expiry else [last.REF_PERSONNE])
 
     return PaginatedAlertOut(
         items=items,
@@ -103,11 +146,15 @@ def list_alerts(
         limit=limit,
         offset=offset,
         has_more=has_more,
+        next_cursor=next_cursor,
     )
 
 
 @router.get("/{ref_personne}", response_model=AlertOut)
-def get_alert(ref_personne: int, db: Session = Depends(get_db)):
+def get_alert(ref_personne: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    unchanged = not_modified(request, response, _alerts_etag(request))
+    if unchanged:
+        return unchanged
     alert = db.query(Alert).filter(Alert.REF_PERSONNE == ref_personne).first()
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
@@ -125,7 +172,9 @@ def update_alert(ref_personne: int, payload: AlertUpdate, db: Session = Depends(
         setattr(alert, k, v)
 
     db.commit()
+    version = data_versions.bump(ALERTS)
     db.refresh(alert)
+    alert_events.publish(UPDATED, alert, version=version)
     return alert
 
 
@@ -135,17 +184,69 @@ def delete_alert(ref_personne: int, db: Session = Depends(get_db)):
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
 
+    deleted = AlertOut.model_validate(alert)
     db.delete(alert)
     db.commit()
-    return alert
+    version = data_versions.bump(ALERTS)
+    alert_events.publish(DELETED, deleted.model_dump(mode="json"), version=version)
+    return deleted
 
 
 @router.get("/stats/summary")
 def get_alert_stats(db: Session = Depends(get_db)):
+    # Cached until the next alert write or sync, so dashboard polling does not scan the table
+    return alert_stats.summary(db)
+
 
-    total_count = db.query(func.count(Alert.REF_PERSONNE)).scalar()
-    
-    return {
-        "by_severity": {"High": total_count},
-        "total": total_count
-    }
\ No newline at end of file
+def _sse(kind, alert=None):
+    return f"event: {kind}\ndata: {json.dumps(alert)}\n\n"
+
+@router.get("/events/stream")
+async def stream_alert_events(
+    request: Request,
+    severity: Optional[List[Literal["Critical", "High", "Medium"]]] = Query(None),
+    alert_type: Optional[List[str]] = Query(None),
+    product: Optional[List[str]] = Query(None),
+):
+    """Server-sent events for alert changes matching the listing filters.
+
+    Load the list once, then apply `created`, `updated`, `upserted` and
+    `deleted` events; on `refresh` (changes made by another worker, a full
+    sync, or a client too slow to keep up) reload the list.
+    """
+    subscriber = alert_events.subscribe(severity=severity, alert_type=alert_type, product=product)
+    heartbeat = ALERT_EVENTS_CONFIG["heartbeat_seconds"]
+
+    async def event_stream():
+        version = data_versions.current(ALERTS)
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    # `version` is what this stream last reconciled; writes since then
+                    # that this process did not publish were missed
+                    current = data_versions.current(ALERTS)
+                    covered = alert_events.published_all(version, current)
+                    version = current
+                    yield ": keep-alive\n\n" if covered else _sse(REFRESH)
+                    continue
+
+                if subscriber.overflowed:
+                    while not subscriber.queue.empty():
+                        subscriber.queue.get_nowait()
+                    subscriber.overflowed = False
+                    version = data_versions.current(ALERTS)
+                    yield _sse(REFRESH)
+                else:
+                    yield _sse(event["event"], event["alert"])
+        finally:
+            alert_events.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,14 +1,37 @@
 # app/api/routes/client.py
 from typing import Optional, List, Dict, Any
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, asc, func
+from sqlalchemy import desc, asc
 from app.db.base import get_db
 from app.models.business_rec import BusinessRec
 from app.models.individual_rec import IndividualRec
+from app.services.product_catalog import product_catalog
+from app.services.data_version import data_versions, RECOMMENDATIONS
+from app.services.table_version import table_versions
+from app.services.response_cache import response_cache
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_page, offset_page
+from app.utils.etag import make_etag, not_modified
 
 router = APIRouter()
 
+# Value of the persisted sort_key for clients without a score (see the models)
+NULL_SCORE_SORT_KEY = -1
+
+# Response cache namespace of the /clients routes, versioned by _clients_version
+CLIENTS_CACHE = "clients"
+
+
+def _clients_version(db: Session) -> int:
+    """Moves with every write to the recommendation tables.
+
+    The data version counts the API's own writes; the table counters, kept by
+    triggers, also count loads run outside the API. Both only grow, so their
+    sum does too.
+    """
+    tables = table_versions(db, BusinessRec.__tablename__, IndividualRec.__tablename__)
+    return data_versions.current(RECOMMENDATIONS) + sum(tables)
+
 
 def _paginate_and_format(
     items: List[Any], limit: int, offset: int, include_total: bool, total_count: Optional[int]
@@ -30,7 +53,7 @@ def _row_to_moral_dict(row: BusinessRec) -> Dict[str, Any]:
         "ref_personne": getattr(row, "REF_PERSONNE"),
         "raison_sociale": getattr(row, "RAISON_SOCIALE"),
         "RAISON_SOCIALE": getattr(row, "RAISON_SOCIALE"),
-        "recommended_products": getattr(row, "recommended_products"),
+        "recommended_products": product_catalog.expand(getattr(row, "recommended_products")),
         "recommendation_count": getattr(row, "recommendation_count"),
         "client_score": float(row.client_score) if row.client_score is not None else None,
         "client_segment": getattr(row, "client_segment"),
@@ -48,7 +71,7 @@ def _row_to_physique_dict(row: IndividualRec) -> Dict[str, Any]:
         "ref_personne": getattr(row, "REF_PERSONNE"),
         "NOM_PRENOM": getattr(row, "NOM_PRENOM"),
         "name": getattr(row, "NOM_PRENOM"),
-        "recommended_products": getattr(row, "recommended_products"),
+        "recommended_products": product_catalog.expand(getattr(row, "recommended_products")),
         "recommendation_count": getattr(row, "recommendation_count"),
         "client_score": float(row.client_score) if row.client_score is not None else None,
         "client_segment": getattr(row, "client_segment"),
@@ -62,8 +85,77 @@ def _row_to_physique_dict(row: IndividualRec) -> Dict[str, Any]:
     }
 
 
+def _cached_count(version: int, listing: str, region: str, filters, query) -> int:
+    """Row count of `query`, computed once per clients version and filter values"""
+    params = {"region": region, "filters": [value for _, value in filters]}
+    return response_cache.get_or_build(
+        CLIENTS_CACHE, f"clients/{listing}/count", params, query.count, version=version
+    )
+
+
+def _list_clients(
+    db: Session, model, to_dict, listing: str, filters, limit: int, offset: int,
+    include_total: bool, sort_by: str, sort_dir: str, cursor: Optional[str], version: int,
+) -> Dict[str, Any]:
+    """One page of a recommendation table, by offset or by keyset cursor.
+
+    `filters` is a list of (column, value) equality filters, skipped when the
+    value is empty. Every page carries `next_cursor`; passing it back as
+    `cursor` continues from the last row returned, so deep pages cost the same
+    as the first one. Both modes order ties by REF_PERSONNE and sort scores
+    through the persisted nulls-last `sort_key`, so each page is a range of
+    one of the listing indexes. The counts an offset page may need are
+    cached per `version`, the one the page itself is cached under.
+    """
+    query = db.query(model)
+    for column, value in filters:
+        if value:
+            query = query.filter(column == value)
+
+    ascending = sort_dir == "asc"
+    ref_order = asc(model.REF_PERSONNE) if ascending else desc(model.REF_PERSONNE)
+    order = [listing, sort_by, sort_dir, [value for _, value in filters]]
+    total_count = _cached_count(version, listing, "all", filters, query) if include_total else None
+
+    has_more = None
+    if cursor is not None:
+        if offset:
+            raise HTTPException(status_code=400, detail="offset cannot be combined with cursor")
+        if sort_by == "score":
+            after = decode_cursor(cursor, order, 2)
+            rows = keyset_page(
+                query, model.sort_key, model.REF_PERSONNE, sort_dir, after, limit, null_value=NULL_SCORE_SORT_KEY
+            )
+        else:
+            (after_ref,) = decode_cursor(cursor, order, 1)
+            query = query.filter(model.REF_PERSONNE > after_ref if ascending else model.REF_PERSONNE < after_ref)
+            rows = query.order_by(ref_order).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+    else:
+        if sort_by == "score":
+            rows = offset_page(
+                query, model.sort_key, model.REF_PERSONNE, sort_dir, offset, limit, null_value=NULL_SCORE_SORT_KEY,
+                count=lambda scored: _cached_count(version, listing, "scored", filters, scored),
+            )
+        else:
+            rows = query.order_by(ref_order).offset(offset).limit(limit).all()
+
+    page = _paginate_and_format([to_dict(r) for r in rows], limit, offset, include_total, total_count)
+    if has_more is not None:
+        page["has_more"] = has_more
+    page["next_cursor"] = None
+    if page["has_more"] and rows:
+        last = rows[-1]
+        values = [last.sort_key, last.REF_PERSONNE] if sort_by == "score" else [last.REF_PERSONNE]
+        page["next_cursor"] = encode_cursor(order, values)
+    return page
+
+
 @router.get("/morale")
 def list_morale(
+    request: Request,
+    response: Response,
     limit: int = Query(10, gt=0, le=200),
     offset: int = Query(0, ge=0),
     include_total: bool = Query(False),
@@ -71,6 +163,7 @@ def list_morale(
     sort_dir: str = Query("desc", regex="^(asc|desc)$"),
     segment: Optional[str] = Query(None),
     business_risk: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
     db: Session = Depends(get_db),
 ):
     """
@@ -79,37 +172,27 @@ def list_morale(
     - sort_dir: 'asc' or 'desc'
     - segment -> client_segment
     - business_risk -> risk_profile
+    - cursor: `next_cursor` of the previous page, instead of offset
     """
-    query = db.query(BusinessRec)
-
-    if segment:
-        query = query.filter(BusinessRec.client_segment == segment)
-    if business_risk:
-        query = query.filter(BusinessRec.risk_profile == business_risk)
-
-    # Sorting: avoid DB-specific NULLS LAST syntax; use boolean expression to push NULLs last.
-    if sort_by == "score":
-        # Put non-null rows first by ordering on (client_score IS NULL) ascending (False/0 before True/1),
-        # then order by client_score direction.
-        if sort_dir == "desc":
-            query = query.order_by((BusinessRec.client_score == None).asc(), BusinessRec.client_score.desc())
-        else:
-            query = query.order_by((BusinessRec.client_score == None).asc(), BusinessRec.client_score.asc())
-    else:
-        # sort by REF_PERSONNE
-        if sort_dir == "desc":
-            query = query.order_by(desc(BusinessRec.REF_PERSONNE))
-        else:
-            query = query.order_by(asc(BusinessRec.REF_PERSONNE))
-
-    total_count = query.count() if include_total else None
-    rows = query.offset(offset).limit(limit).all()
-    mapped = [_row_to_moral_dict(r) for r in rows]
-    return _paginate_and_format(mapped, limit, offset, include_total, total_count)
+    version = _clients_version(db)
+    unchanged = not_modified(request, response, make_etag(request, version))
+    if unchanged:
+        return unchanged
+    filters = [(BusinessRec.client_segment, segment), (BusinessRec.risk_profile, business_risk)]
+    params = {
+        "limit": limit, "offset": offset, "include_total": include_total, "sort_by": sort_by,
+        "sort_dir": sort_dir, "segment": segment, "business_risk": business_risk, "cursor": cursor,
+    }
+    return response_cache.get_or_build(CLIENTS_CACHE, "clients/morale", params, lambda: _list_clients(
+        db, BusinessRec, _row_to_moral_dict, "morale", filters,
+        limit, offset, include_total, sort_by, sort_dir, cursor, version,
+    ), version=version)
 
 
 @router.get("/physique")
 def list_physique(
+    request: Request,
+    response: Response,
     limit: int = Query(10, gt=0, le=200),
     offset: int = Query(0, ge=0),
     include_total: bool = Query(False),
@@ -117,6 +200,7 @@ def list_physique(
     sort_dir: str = Query("desc", regex="^(asc|desc)$"),
     client_segment: Optional[str] = Query(None),
     risk_profile: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
     db: Session = Depends(get_db),
 ):
     """
@@ -124,38 +208,40 @@ def list_physique(
     - sort_by: 'score' or 'ref'
     - client_segment -> client_segment
     - risk_profile -> risk_profile
+    - cursor: `next_cursor` of the previous page, instead of offset
     """
-    query = db.query(IndividualRec)
-
-    if client_segment:
-        query = query.filter(IndividualRec.client_segment == client_segment)
-    if risk_profile:
-        query = query.filter(IndividualRec.risk_profile == risk_profile)
-
-    # Sorting: portable way to keep NULLs last
-    if sort_by == "score":
-        if sort_dir == "desc":
-            query = query.order_by((IndividualRec.client_score == None).asc(), IndividualRec.client_score.desc())
-        else:
-            query = query.order_by((IndividualRec.client_score == None).asc(), IndividualRec.client_score.asc())
-    else:
-        if sort_dir == "desc":
-            query = query.order_by(desc(IndividualRec.REF_PERSONNE))
-        else:
-            query = query.order_by(asc(IndividualRec.REF_PERSONNE))
-
-    total_count = query.count() if include_total else None
-    rows = query.offset(offset).limit(limit).all()
-    mapped = [_row_to_physique_dict(r) for r in rows]
-    return _paginate_and_format(mapped, limit, offset, include_total, total_count)
+    version = _clients_version(db)
+    unchanged = not_modified(request, response, make_etag(request, version))
+    if unchanged:
+        return unchanged
+    filters = [(IndividualRec.client_segment, client_segment), (IndividualRec.risk_profile, risk_profile)]
+    params = {
+        "limit": limit, "offset": offset, "include_total": include_total, "sort_by": sort_by,
+        "sort_dir": sort_dir, "client_segment": client_segment, "risk_profile": risk_profile, "cursor": cursor,
+    }
+    return response_cache.get_or_build(CLIENTS_CACHE, "clients/physique", params, lambda: _list_clients(
+        db, IndividualRec, _row_to_physique_dict, "physique", filters,
+        limit, offset, include_total, sort_by, sort_dir, cursor, version,
+    ), version=version)
 
 
-@router.get("/{ref_personne}")
-def get_client(ref_personne: int, db: Session = Depends(get_db)):
+def _find_client(db: Session, ref_personne: int) -> Dict[str, Any]:
     m = db.query(BusinessRec).filter(BusinessRec.REF_PERSONNE == ref_personne).first()
     if m:
         return _row_to_moral_dict(m)
     p = db.query(IndividualRec).filter(IndividualRec.REF_PERSONNE == ref_personne).first()
     if p:
         return _row_to_physique_dict(p)
-    raise HTTPException(status_code=404, detail="Client not found")
\ No newline at end of file
+    raise HTTPException(status_code=404, detail="Client not found")
+
+
+@router.get("/{ref_personne}")
+def get_client(ref_personne: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    version = _clients_version(db)
+    unchanged = not_modified(request, response, make_etag(request, version))
+    if unchanged:
+        return unchanged
+    return response_cache.get_or_build(
+        CLIENTS_CACHE, "clients/detail", {"ref_personne": ref_personne}, lambda: _find_client(db, ref_personne),
+        version=version,
+    )
\ No newline at end of file
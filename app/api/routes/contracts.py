@@ -1,16 +1,20 @@
 # app/routers/contracts.py
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import Optional
 from app.db.base import get_db
 from app.models.contract import Contract
 from app.schemas.contract import ContractOut, ContractListOut
+from app.services.table_version import table_versions
+from app.utils.etag import make_etag, not_modified
 
 router = APIRouter(prefix="/contracts", tags=["contracts"])
 
 
 @router.get("/", response_model=ContractListOut)
 def list_contracts(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     limit: int = Query(25, ge=1, le=200),
     offset: int = Query(0, ge=0),
@@ -19,6 +23,12 @@ def list_contracts(
     q = db.query(Contract)
     if ref_personne is not None:
         q = q.filter(Contract.REF_PERSONNE == ref_personne)
+    q = q.order_by(Contract.index)
+
+    # The table's write counter moves with any insert, update or delete, loads outside the API included
+    unchanged = not_modified(request, response, make_etag(request, *table_versions(db, Contract.__tablename__)))
+    if unchanged:
+        return unchanged
 
     items = q.limit(limit).offset(offset).all()
     has_more = len(items) == limit
@@ -26,7 +36,14 @@ def list_contracts(
 
 
 @router.get("/{index}", response_model=ContractOut)
-def get_contract(index: int, db: Session = Depends(get_db)):
+def get_contract(index: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    updated_at = db.query(Contract.updated_at).filter(Contract.index == index).first()
+    if not updated_at:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    # updated_at is a TIMESTAMP(6): two edits within a second still get different tags
+    unchanged = not_modified(request, response, make_etag(request, updated_at[0]))
+    if unchanged:
+        return unchanged
     c = db.query(Contract).filter(Contract.index == index).first()
     if not c:
         raise HTTPException(status_code=404, detail="Contract not found")
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 from typing import List
 from app.db.base import get_db
 from app.models.history import History, HistoryMessage
 from app.schemas.history import HistoryCreate, HistoryOut, HistoryMessageCreate, HistoryMessageOut
+from app.services.table_version import table_versions
+from app.utils.etag import make_etag, not_modified
 
 router = APIRouter()
 
@@ -16,8 +19,12 @@ def create_history(history_in: HistoryCreate, db: Session = Depends(get_db)):
     return history
 
 @router.get("/", response_model=List[HistoryOut])
-def list_history(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return db.query(History).offset(skip).limit(limit).all()
+def list_history(request: Request, response: Response, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    # The table's write counter moves with any insert, update or delete, loads outside the API included
+    unchanged = not_modified(request, response, make_etag(request, *table_versions(db, History.__tablename__)))
+    if unchanged:
+        return unchanged
+    return db.query(History).order_by(History.ref_personne).offset(skip).limit(limit).all()
 
 @router.post("/{ref_personne}/messages", response_model=HistoryMessageOut)
 def add_message(ref_personne: str, msg_in: HistoryMessageCreate, db: Session = Depends(get_db)):
@@ -31,19 +38,27 @@ def add_message(ref_personne: str, msg_in: HistoryMessageCreate, db: Session = D
     return msg
 
 @router.get("/{ref_personne}/messages", response_model=List[HistoryMessageOut])
-def get_messages(ref_personne: str, db: Session = Depends(get_db)):
+def get_messages(ref_personne: str, request: Request, response: Response, db: Session = Depends(get_db)):
     # Debug: log incoming param and its type
     print("get_messages ref_personne:", ref_personne, "type:", type(ref_personne))
 
     # Try matching as-is
-    msgs = db.query(HistoryMessage).filter(HistoryMessage.ref_personne == ref_personne).all()
+    q = db.query(HistoryMessage).filter(HistoryMessage.ref_personne == ref_personne)
+    state = q.with_entities(func.count(HistoryMessage.id), func.max(HistoryMessage.id)).one()
 
     # If none found and the ref looks numeric, try integer match
-    if not msgs and str(ref_personne).isdigit():
+    if not state[0] and str(ref_personne).isdigit():
         try:
-            msgs = db.query(HistoryMessage).filter(HistoryMessage.ref_personne == int(ref_personne)).all()
+            q = db.query(HistoryMessage).filter(HistoryMessage.ref_personne == int(ref_personne))
+            state = q.with_entities(func.count(HistoryMessage.id), func.max(HistoryMessage.id)).one()
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"DB query error: {e}")
 
+    # Messages are only ever appended or deleted, so (count, last id) identifies the list
+    unchanged = not_modified(request, response, make_etag(request, tuple(state)))
+    if unchanged:
+        return unchanged
+    msgs = q.all()
+
     print("messages found:", len(msgs))
     return msgs
@@ -0,0 +1,48 @@
+import json
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.core.config import JOB_CONFIG
+from app.services.job_manager import job_store, TERMINAL_STATUSES
+
+router = APIRouter()
+
+
+@router.get("/")
+def list_jobs(limit: int = Query(20, ge=1, le=200)):
+    return {"items": job_store.list(limit=limit)}
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str):
+    job = job_store.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """Server-sent events with the job status every time it changes, until it finishes"""
+    if not job_store.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        last_update = None
+        while True:
+            if await request.is_disconnected():
+                break
+            job = await asyncio.to_thread(job_store.get, job_id)
+            if job and job['updated_at'] != last_update:
+                last_update = job['updated_at']
+                yield f"event: {job['status']}\ndata: {json.dumps(job, default=str)}\n\n"
+                if job['status'] in TERMINAL_STATUSES:
+                    break
+            await asyncio.sleep(JOB_CONFIG['poll_interval_seconds'])
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,16 +1,19 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional,Dict
 import pandas as pd
 import os
 
-from app.core.data_cleaning import (
-    clean_contrats_data, clean_sinistres_data, 
-    clean_clients_data, clean_business_data, clean_products_data
-)
 from app.services.scoring_services import scoring_service
-from app.services.batch_processor import batch_processor
 from app.services.recommendation_service import recommendation_service
+from app.services.job_manager import job_manager
+from app.services.pipeline_jobs import run_scoring_job, run_recommendation_job
+from app.services.realtime_recommender import realtime_recommender
+from app.services.product_catalog import product_catalog
+from app.services.data_version import data_versions, RECOMMENDATIONS, PUBLISHED_SCORES, PUBLISHED_RECOMMENDATIONS
+from app.services.response_cache import response_cache
+from app.db.base import get_db
 from app.utils.sql_transformer import sql_transformer
 from app.core.config import logger
 
@@ -33,51 +36,49 @@ class SQLConversionRequest(BaseModel):
 
 class RecommendationRequest(BaseModel):
     df_sinistres_path: Optional[str] = "data/raw/claims.parquet"
+    df_contrats_path: str = "data/raw/contrats.parquet"
+    df_products_path: str = "data/raw/products.parquet"
+    individual_scores_path: str = "data/processed/individual_scores.parquet"
+    business_scores_path: str = "data/processed/business_scores.parquet"
     batch_size: int = 1000
+    use_cache: bool = True
+
+def _reload_scores(job):
+    params = job['params']
+    if params.get('save_individual_path') and params.get('save_business_path'):
+        # Bumped first: the other workers reload from the paths they last loaded
+        data_versions.bump(PUBLISHED_SCORES)
+        scoring_service.load_scores(params['save_individual_path'], params['save_business_path'])
+        realtime_recommender.invalidate_scores()
+        data_versions.bump(RECOMMENDATIONS)
+
+def _reload_recommendations(job):
+    # The other workers drop their frames and indexes when they see the new version
+    data_versions.bump(PUBLISHED_RECOMMENDATIONS)
+    recommendation_service.individual_recommendations = pd.DataFrame()
+    recommendation_service.business_recommendations = pd.DataFrame()
+    realtime_recommender.invalidate()
+    data_versions.bump(RECOMMENDATIONS)
+
+job_manager.on_complete("score-clients", _reload_scores)
+job_manager.on_complete("generate-recommendations", _reload_recommendations)
 
-@router.post("/insurance/score-clients")
-async def score_clients_endpoint(request: ScoringRequest, background_tasks: BackgroundTasks):
-    """Endpoint to score all clients using data files"""
+@router.post("/insurance/score-clients", status_code=202)
+async def score_clients_endpoint(request: ScoringRequest):
+    """Submit a background job that scores all clients using data files"""
     try:
-        # Create directories if they don't exist
-        os.makedirs("data/raw", exist_ok=True)
-        os.makedirs("data/processed", exist_ok=True)
-        
-        # Load data from files
-        logger.info(f"Loading data from: {request.df_contrats_path}")
-        df_contrats = pd.read_parquet(request.df_contrats_path)
-        df_clients = pd.read_parquet(request.df_clients_path)
-        df_business = pd.read_parquet(request.df_business_path)
-        df_products = pd.read_parquet(request.df_products_path)
-        
-        # Clean data
-        logger.info("Cleaning data...")
-        df_contrats_clean = clean_contrats_data(df_contrats)
-        df_clients_clean = clean_clients_data(df_clients)
-        df_business_clean = clean_business_data(df_business)
-        df_products_clean = clean_products_data(df_products)
-        
-        # Score clients
-        logger.info("Scoring clients...")
-        scored_individuals, scored_business = scoring_service.score_all_clients(
-            df_contrats_clean, df_clients_clean, df_business_clean
-        )
+        for path in (request.df_contrats_path, request.df_clients_path, request.df_business_path,
+                     request.df_products_path):
+            if not os.path.exists(path):
+                raise FileNotFoundError(path)
         
-        # Store the data in the service for later use
-        scoring_service.df_contrats = df_contrats_clean
-        scoring_service.df_products = df_products_clean
-        
-        # Save if path provided
-        if request.save_individual_path or request.save_business_path:
-            background_tasks.add_task(scoring_service.save_scores, request.save_individual_path,request.save_business_path)
-            logger.info(f"Scores will be saved to: {request.save_individual_path} and {request.save_business_path}")
+        job = job_manager.submit("score-clients", run_scoring_job, request.model_dump())
         
         return {
-            "message": "Clients scored successfully",
-            "individual_clients": len(scored_individuals),
-            "business_clients": len(scored_business),
-            "individual_scores_path": request.save_individual_path,
-            "business_scores_path": request.save_business_path
+            "message": "Client scoring started",
+            "job_id": job['job_id'],
+            "status_url": f"/jobs/{job['job_id']}",
+            "events_url": f"/jobs/{job['job_id']}/events"
         }
         
     except FileNotFoundError as e:
@@ -102,58 +103,21 @@ async def get_scores_endpoint(client_type: str = "all"):
         logger.error(f"Error in get-scores endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/insurance/generate-recommendations")
-async def generate_recommendations_endpoint(request: RecommendationRequest, background_tasks: BackgroundTasks):
-    """Endpoint to generate recommendations using data files"""
+@router.post("/insurance/generate-recommendations", status_code=202)
+async def generate_recommendations_endpoint(request: RecommendationRequest):
+    """Submit a background job that generates recommendations using data files"""
+    scores_on_disk = os.path.exists(request.individual_scores_path) or os.path.exists(request.business_scores_path)
+    if not scores_on_disk:
+        raise HTTPException(status_code=400, detail="No scored clients found. Please run scoring first.")
+    
     try:
-        # Create directories if they don't exist
-        os.makedirs("data/raw", exist_ok=True)
-        os.makedirs("data/processed", exist_ok=True)
-        
-        # Load claims data if provided
-        df_sinistres = None
-        if request.df_sinistres_path and os.path.exists(request.df_sinistres_path):
-            logger.info(f"Loading claims data from: {request.df_sinistres_path}")
-            df_sinistres = pd.read_parquet(request.df_sinistres_path)
-            df_sinistres = clean_sinistres_data(df_sinistres)
-        else:
-            logger.info("No claims data provided or file not found")
-        
-        # Get scored clients
-        scored_clients = scoring_service.get_scored_clients()
-        
-        if scored_clients.empty:
-            raise HTTPException(status_code=400, detail="No scored clients found. Please run scoring first.")
-        
-        # Set batch size
-        batch_processor.batch_size = request.batch_size
-        
-        # Set resume mode based on whether we have existing recommendations
-        individual_path = "data/processed/individual_recommendations.parquet"
-        business_path = "data/processed/business_recommendations.parquet"
-        
-        if os.path.exists(individual_path) or os.path.exists(business_path):
-            batch_processor.set_resume_mode(True)
-            logger.info("Resume mode activated - will process only new clients")
-        
-        # Generate recommendations
-        logger.info("Generating recommendations...")
-        individual_recs, business_recs, alerts = recommendation_service.generate_recommendations(
-            scored_clients, scoring_service.df_contrats, scoring_service.df_products, df_sinistres
-        )
-        
-        # Save results in background
-        background_tasks.add_task(recommendation_service.save_recommendations, individual_path, business_path)
-        background_tasks.add_task(recommendation_service.save_alerts, "data/processed/alerts.parquet")
+        job = job_manager.submit("generate-recommendations", run_recommendation_job, request.model_dump())
         
         return {
-            "message": "Recommendations generated successfully",
-            "individual_recommendations_count": len(individual_recs),
-            "business_recommendations_count": len(business_recs),
-            "alerts_count": len(alerts),
-            "processed_batches": batch_processor.current_batch,
-            "processed_clients": len(batch_processor.processed_clients),
-            "resume_mode": batch_processor.resume_mode
+            "message": "Recommendation generation started",
+            "job_id": job['job_id'],
+            "status_url": f"/jobs/{job['job_id']}",
+            "events_url": f"/jobs/{job['job_id']}/events"
         }
         
     except Exception as e:
@@ -174,14 +138,10 @@ async def get_recommendations_for_client(client_id: str, client_type: Optional[s
                 raise HTTPException(status_code=404, detail=f"Client {client_id} not found")
         
         # Load recommendations if not in memory
-        if recommendation_service.individual_recommendations.empty or recommendation_service.business_recommendations.empty:
-            individual_path = "data/processed/individual_recommendations.parquet"
-            business_path = "data/processed/business_recommendations.parquet"
-            
-            if os.path.exists(individual_path):
-                recommendation_service.individual_recommendations = pd.read_parquet(individual_path)
-            if os.path.exists(business_path):
-                recommendation_service.business_recommendations = pd.read_parquet(business_path)
+        recommendation_service.load_recommendations(
+            "data/processed/individual_recommendations.parquet",
+            "data/processed/business_recommendations.parquet"
+        )
         
         if client_type == 'individual':
             client_recommendations = recommendation_service.individual_recommendations[
@@ -195,25 +155,55 @@ async def get_recommendations_for_client(client_id: str, client_type: Optional[s
         if client_recommendations.empty:
             raise HTTPException(status_code=404, detail=f"Client {client_id} not found in recommendations")
         
-        return client_recommendations.to_dict('records')[0]
+        return product_catalog.expand_record(client_recommendations.to_dict('records')[0])
         
     except Exception as e:
         logger.error(f"Error getting recommendations for client {client_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/insurance/recommendations/{client_id}/realtime")
+def realtime_recommendations_for_client(
+    client_id: int,
+    client_type: Optional[str] = None,
+    refresh_contracts: bool = False,
+    persist: bool = False,
+    db: Session = Depends(get_db)
+):
+    """Recompute one client's recommendations now instead of reading the last batch run.
+    
+    - refresh_contracts: reload the client's contracts from the database first,
+      so policies bought since the last run are taken into account
+    - persist: write the result back to individual_recommendations/business_recommendations
+    """
+    try:
+        if refresh_contracts:
+            realtime_recommender.ensure_warm()
+            realtime_recommender.refresh_client_contracts(db, client_id)
+        
+        record = realtime_recommender.recommend(client_id, client_type)
+        if record is None:
+            raise HTTPException(status_code=404, detail=f"Client {client_id} not found")
+        
+        if persist:
+            realtime_recommender.persist(db, record)
+        
+        return product_catalog.expand_record(record)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error computing realtime recommendations for client {client_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/insurance/recommendations")
 async def get_all_recommendations(client_type: Optional[str] = None, limit: int = 10):
     """Get all recommendations with optional filtering by client type"""
-    try:
+    def build():
         # Load recommendations if not in memory
-        if recommendation_service.individual_recommendations.empty or recommendation_service.business_recommendations.empty:
-            individual_path = "data/processed/individual_recommendations.parquet"
-            business_path = "data/processed/business_recommendations.parquet"
-            
-            if os.path.exists(individual_path):
-                recommendation_service.individual_recommendations = pd.read_parquet(individual_path)
-            if os.path.exists(business_path):
-                recommendation_service.business_recommendations = pd.read_parquet(business_path)
+        recommendation_service.load_recommendations(
+            "data/processed/individual_recommendations.parquet",
+            "data/processed/business_recommendations.parquet"
+        )
         
         if client_type == 'individual':
             results = recommendation_service.individual_recommendations.head(limit)
@@ -228,8 +218,13 @@ async def get_all_recommendations(client_type: Optional[str] = None, limit: int
         return {
             "client_type": client_type or "all",
             "count": len(results),
-            "recommendations": results.to_dict('records')
+            "recommendations": [product_catalog.expand_record(record) for record in results.to_dict('records')]
         }
+    
+    try:
+        return response_cache.get_or_build(
+            RECOMMENDATIONS, "insurance/recommendations", {"client_type": client_type, "limit": limit}, build
+        )
         
     except Exception as e:
         logger.error(f"Error getting recommendations: {e}")
@@ -91,6 +91,94 @@ ALERT_CONFIG = {
     'batch_size': 1000
 }
 
+# Contract-expiry alert sync: frequent incremental passes driven by the
+# contracts.updated_at watermark and the expiry timing wheel, plus a periodic
+# full rebuild as a safety net. A client's alert is its nearest contract
+# expiring within the largest threshold, with the severity of the smallest
+# threshold it has reached.
+ALERT_SYNC_CONFIG = {
+    'expiry_thresholds': {30: 'Medium', 15: 'High', 7: 'Critical'},
+    'incremental_interval_minutes': 5,
+    'full_interval_hours': 24,
+    'clients_chunk_size': 1000
+}
+
+# Alert retention: expired alerts are kept this many days, then moved to
+# alerts_archive (or deleted when archive is off) in batches of batch_size rows
+ALERT_RETENTION_CONFIG = {
+    'retention_days': 30,
+    'batch_size': 500,
+    'archive': True,
+    'interval_hours': 24
+}
+
+# Server-sent alert change events (GET /alerts/events/stream)
+ALERT_EVENTS_CONFIG = {
+    'heartbeat_seconds': 15,
+    'queue_size': 1000
+}
+
+# Scheduler lease: only the worker holding it runs the alert jobs. MySQL uses
+# GET_LOCK on a dedicated connection, other databases a file lock (single host).
+SCHEDULER_LEADER_CONFIG = {
+    'lock_name': 'insurance_recommendation.alert_scheduler',
+    'lock_directory': 'data/processed/locks'
+}
+
+# Chunked conversion of the contracts text dates to DATETIME columns
+CONTRACT_DATE_BACKFILL_CONFIG = {
+    'chunk_size': 10000
+}
+
+# Batch checkpoint configuration
+CHECKPOINT_CONFIG = {
+    'directory': 'data/processed/checkpoints',
+    'part_prefix': 'part'
+}
+
+# Fingerprint-keyed cache of published recommendation rows
+RECOMMENDATION_CACHE_CONFIG = {
+    'directory': 'data/processed/recommendation_cache'
+}
+
+# Stable integer ids of recommended product names, stored in the product_catalog table
+PRODUCT_CATALOG_CONFIG = {
+    'max_register_attempts': 5
+}
+
+# Recommendation reason templates, stored by id and filled from the recommended
+# item (product, score, confidence) only when a recommendation is returned by the API
+REASON_INDIVIDUAL_PROFILE = 1
+REASON_BUSINESS_PROFILE = 2
+RECOMMENDATION_REASONS = {
+    REASON_INDIVIDUAL_PROFILE: "Based on client profile and scoring: {score}/100",
+    REASON_BUSINESS_PROFILE: "Based on business profile and scoring: {score}/100"
+}
+
+# Per-namespace data version counters ('alerts', 'recommendations') shared by
+# all worker processes; bumped on every write so read caches know when to reload
+DATA_VERSION_CONFIG = {
+    'path': 'data/processed/data_versions.json'
+}
+
+# Response cache of the client and recommendation read endpoints. Entries are
+# keyed by data version, so a bump of 'recommendations' invalidates them all;
+# ttl_seconds bounds staleness after loads that do not bump it. redis_url (or
+# RESPONSE_CACHE_REDIS_URL) adds a cache shared by the workers
+RESPONSE_CACHE_CONFIG = {
+    'max_entries': 2048,
+    'redis_url': None,
+    'key_prefix': 'insurance_recommendation:responses',
+    'ttl_seconds': 300
+}
+
+# Background pipeline job configuration
+JOB_CONFIG = {
+    'directory': 'data/processed/jobs',
+    'max_workers': 1,
+    'poll_interval_seconds': 1.0
+}
+
 # Product scoring weights
 PRODUCT_SCORING_WEIGHTS = {
     'product_client_fit': 0.30,
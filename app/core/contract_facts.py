@@ -0,0 +1,91 @@
+import pandas as pd
+from datetime import datetime
+from app.core.config import logger, ALERT_CONFIG
+
+# Columns of the contracts table as delivered; everything else is derived
+CONTRACT_COLUMNS = [
+    'REF_PERSONNE', 'NUM_CONTRAT', 'LIB_PRODUIT', 'EFFET_CONTRAT', 'DATE_EXPIRATION',
+    'PROCHAIN_TERME', 'LIB_ETAT_CONTRAT', 'branche', 'somme_quittances',
+    'statut_paiement', 'Capital_assure'
+]
+DATE_COLUMNS = ['EFFET_CONTRAT', 'DATE_EXPIRATION', 'PROCHAIN_TERME']
+STATUS_COLUMNS = ['is_active', 'is_expired', 'is_cancelled', 'is_paid', 'is_unpaid']
+ALERT_COLUMNS = [
+    'days_until_expiry', 'days_since_effect', 'overdue_days',
+    'is_expiring', 'is_recently_cancelled', 'is_payment_overdue'
+]
+
+def build_contract_facts(df_contrats, df_products, current_date=None):
+    """Build the enriched contract fact table shared by scoring, recommendation and alerts.
+
+    One row per cleaned contract, in the same order, with the product branch and
+    sous-branche, parsed dates, status indicators, and day counts and alert
+    flags relative to `current_date`. Claims stay in their own frame, linked
+    to clients by `link_claims_to_clients`.
+    """
+    logger.info("Building contract fact table...")
+
+    categories = df_products[['LIB_PRODUIT', 'LIB_BRANCHE', 'LIB_SOUS_BRANCHE']].drop_duplicates(subset=['LIB_PRODUIT'])
+    df = df_contrats.merge(categories, on='LIB_PRODUIT', how='left')
+
+    for col in DATE_COLUMNS:
+        df[col] = pd.to_datetime(df[col])
+
+    df = add_status_indicators(df)
+    df = add_alert_columns(df, current_date)
+
+    logger.info(f"Built fact table for {len(df)} contracts")
+    return df
+
+def add_status_indicators(df_contrats):
+    """Boolean status columns, computed once instead of per aggregation"""
+    if all(col in df_contrats.columns for col in STATUS_COLUMNS):
+        return df_contrats
+    df = df_contrats.copy()
+    df['is_active'] = df['LIB_ETAT_CONTRAT'] == 'EN COURS'
+    df['is_expired'] = df['LIB_ETAT_CONTRAT'] == 'EXPIRE'
+    df['is_cancelled'] = df['LIB_ETAT_CONTRAT'] == 'RESILIE'
+    df['is_paid'] = df['statut_paiement'] == 'Payé'
+    df['is_unpaid'] = df['statut_paiement'] == 'Non payé'
+    return df
+
+def add_alert_columns(df_contrats, current_date=None):
+    """Day counts relative to `current_date` and the per-contract alert flags"""
+    if all(col in df_contrats.columns for col in ALERT_COLUMNS):
+        return df_contrats
+    current_date = current_date or datetime.now()
+    df = df_contrats.copy()
+
+    expiration = pd.to_datetime(df['DATE_EXPIRATION'])
+    effect = pd.to_datetime(df['EFFET_CONTRAT'])
+    next_term = pd.to_datetime(df['PROCHAIN_TERME'])
+
+    days_until_expiry = (expiration - current_date).dt.days
+    days_since_effect = (current_date - effect).dt.days
+    overdue_days = (current_date - next_term).dt.days
+
+    df['days_until_expiry'] = days_until_expiry.astype('Int64')
+    df['days_since_effect'] = days_since_effect.astype('Int64')
+    df['overdue_days'] = overdue_days.astype('Int64')
+    df['is_expiring'] = days_until_expiry.between(0, ALERT_CONFIG['expiration_alert_days'])
+    df['is_recently_cancelled'] = (
+        (df['LIB_ETAT_CONTRAT'] == 'RESILIE') &
+        (days_since_effect <= ALERT_CONFIG['recent_cancellation_days'])
+    )
+    df['is_payment_overdue'] = (
+        (df['statut_paiement'] == 'Non payé') &
+        (next_term < current_date) &
+        (overdue_days >= ALERT_CONFIG['payment_overdue_days'])
+    )
+    return df
+
+def link_claims_to_clients(df_sinistres, df_contrats):
+    """Attach REF_PERSONNE to each claim through its contract number"""
+    if df_sinistres is None or 'REF_PERSONNE' in df_sinistres.columns:
+        return df_sinistres
+    owners = df_contrats[['NUM_CONTRAT', 'REF_PERSONNE']].drop_duplicates()
+    return df_sinistres.merge(owners, on='NUM_CONTRAT', how='inner')
+
+def contract_columns(df_contrats):
+    """Source columns of a contracts or fact table, without the derived ones"""
+    return [col for col in CONTRACT_COLUMNS if col in df_contrats.columns]
@@ -1,12 +1,13 @@
 # Core recommendation modules
 from .individual_recommendation import recommend_individual_insurance_enhanced
 from .business_recommendation import recommend_business_insurance_enhanced
-from .alerts import generate_alerts
+from .alerts import generate_alerts, compute_contract_alert_flags
 from .claims_analysis import analyze_claims_for_client
 
 __all__ = [
     'recommend_individual_insurance_enhanced',
     'recommend_business_insurance_enhanced',
     'generate_alerts',
+    'compute_contract_alert_flags',
     'analyze_claims_for_client'
 ]
\ No newline at end of file
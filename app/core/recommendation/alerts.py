@@ -1,117 +1,134 @@
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from app.core.config import ALERT_CONFIG
+from app.core.contract_facts import add_status_indicators, add_alert_columns
 
 def generate_alerts(df_contrats):
-    """Generate alerts for insurance contracts - enhanced version"""
-    alerts = []
-    
-    # Expiration alerts
-    expiration_alerts = _generate_expiration_alerts(df_contrats)
-    alerts.extend(expiration_alerts)
-    
-    # Payment alerts
-    payment_alerts = _generate_payment_alerts(df_contrats)
-    alerts.extend(payment_alerts)
-    
-    # Cancellation alerts
-    cancellation_alerts = _generate_cancellation_alerts(df_contrats)
-    alerts.extend(cancellation_alerts)
-    
-    # Low coverage alerts
-    coverage_alerts = _generate_coverage_alerts(df_contrats)
-    alerts.extend(coverage_alerts)
+    """Generate alerts for insurance contracts - enhanced version
+    
+    Each alert type is built as one DataFrame with column expressions, then
+    the non-empty frames are concatenated.
+    """
+    df_contrats = add_status_indicators(df_contrats)
+    
+    alerts = [
+        _generate_expiration_alerts(df_contrats),
+        _generate_payment_alerts(df_contrats),
+        _generate_cancellation_alerts(df_contrats),
+        _generate_coverage_alerts(df_contrats)
+    ]
+    alerts = [frame for frame in alerts if not frame.empty]
+    if not alerts:
+        return pd.DataFrame()
     
-    return pd.DataFrame(alerts)
+    return pd.concat(alerts, ignore_index=True)
+
+def compute_contract_alert_flags(df_contrats, current_date=None):
+    """Per-contract alert flags used by the recommendation engines.
+    
+    Computed once for the whole contract table (or read from the contract fact
+    table). Only contracts with at least one flag set are kept, indexed (and
+    sorted) by REF_PERSONNE so a client's rows can be looked up with
+    `client_alert_flags`.
+    """
+    df = add_alert_columns(df_contrats, current_date)
+    flags = df[[
+        'REF_PERSONNE', 'NUM_CONTRAT', 'LIB_PRODUIT', 'branche',
+        'is_expiring', 'days_until_expiry', 'is_recently_cancelled',
+        'is_payment_overdue', 'overdue_days'
+    ]]
+    
+    flagged = flags['is_expiring'] | flags['is_recently_cancelled'] | flags['is_payment_overdue']
+    return flags[flagged].set_index('REF_PERSONNE').sort_index(kind='stable')
+
+def client_alert_flags(alert_flags, client_id):
+    """Flagged contracts of one client, in contract table order"""
+    if client_id not in alert_flags.index:
+        return alert_flags.iloc[:0]
+    return alert_flags.loc[[client_id]]
+
+def _contract_label(contracts):
+    """'<NUM_CONTRAT> (<LIB_PRODUIT>)' for every contract"""
+    return contracts['NUM_CONTRAT'].astype(str) + ' (' + contracts['LIB_PRODUIT'].astype(str) + ')'
 
 def _generate_expiration_alerts(df_contrats):
     """Generate alerts for expiring contracts"""
-    alerts = []
     today = datetime.now()
     expiration_threshold = today + timedelta(days=ALERT_CONFIG['expiration_alert_days'])
     
     expiring_contracts = df_contrats[
         (df_contrats['DATE_EXPIRATION'].notna()) &
         (df_contrats['DATE_EXPIRATION'] <= expiration_threshold) &
-        (df_contrats['LIB_ETAT_CONTRAT'] == 'EN COURS')
+        df_contrats['is_active']
     ]
     
-    for _, contract in expiring_contracts.iterrows():
-        days_until_expiry = (contract['DATE_EXPIRATION'] - today).days
-        alerts.append({
-            'REF_PERSONNE': contract['REF_PERSONNE'],
-            'alert_type': 'policy_expiring',
-            'alert_message': f"Policy {contract['NUM_CONTRAT']} ({contract['LIB_PRODUIT']}) expires in {days_until_expiry} days",
-            'alert_severity': 'High' if days_until_expiry < 15 else 'Medium',
-            'contract_id': contract['NUM_CONTRAT'],
-            'product': contract['LIB_PRODUIT'],
-            'expiration_date': contract['DATE_EXPIRATION'],
-            'days_until_expiry': days_until_expiry
-        })
-    
-    return alerts
+    days_until_expiry = (expiring_contracts['DATE_EXPIRATION'] - today).dt.days
+    return pd.DataFrame({
+        'REF_PERSONNE': expiring_contracts['REF_PERSONNE'],
+        'alert_type': 'policy_expiring',
+        'alert_message': 'Policy ' + _contract_label(expiring_contracts) + ' expires in ' + days_until_expiry.astype(str) + ' days',
+        'alert_severity': np.where(days_until_expiry < 15, 'High', 'Medium'),
+        'contract_id': expiring_contracts['NUM_CONTRAT'],
+        'product': expiring_contracts['LIB_PRODUIT'],
+        'expiration_date': expiring_contracts['DATE_EXPIRATION'],
+        'days_until_expiry': days_until_expiry
+    })
 
 def _generate_payment_alerts(df_contrats):
     """Generate alerts for payment issues"""
-    alerts = []
     today = datetime.now()
     
     overdue_contracts = df_contrats[
-        (df_contrats['statut_paiement'] == 'Non payé') &
-        (df_contrats['LIB_ETAT_CONTRAT'] == 'EN COURS') &
+        df_contrats['is_unpaid'] &
+        df_contrats['is_active'] &
         (df_contrats['PROCHAIN_TERME'].notna())
     ]
     
-    for _, contract in overdue_contracts.iterrows():
-        next_term = pd.to_datetime(contract['PROCHAIN_TERME'])
-        if next_term < today:
-            overdue_days = (today - next_term).days
-            if overdue_days >= ALERT_CONFIG['payment_overdue_days']:
-                alerts.append({
-                    'REF_PERSONNE': contract['REF_PERSONNE'],
-                    'alert_type': 'payment_overdue',
-                    'alert_message': f"Payment overdue for policy {contract['NUM_CONTRAT']} ({contract['LIB_PRODUIT']}) by {overdue_days} days",
-                    'alert_severity': 'High',
-                    'contract_id': contract['NUM_CONTRAT'],
-                    'product': contract['LIB_PRODUIT'],
-                    'premium_amount': contract.get('somme_quittances', 0),
-                    'overdue_days': overdue_days
-                })
-    
-    return alerts
+    next_term = pd.to_datetime(overdue_contracts['PROCHAIN_TERME'])
+    overdue_days = (today - next_term).dt.days
+    overdue = (next_term < today) & (overdue_days >= ALERT_CONFIG['payment_overdue_days'])
+    overdue_contracts = overdue_contracts[overdue]
+    overdue_days = overdue_days[overdue]
+    
+    premium_amount = overdue_contracts['somme_quittances'] if 'somme_quittances' in overdue_contracts else 0
+    return pd.DataFrame({
+        'REF_PERSONNE': overdue_contracts['REF_PERSONNE'],
+        'alert_type': 'payment_overdue',
+        'alert_message': 'Payment overdue for policy ' + _contract_label(overdue_contracts) + ' by ' + overdue_days.astype(str) + ' days',
+        'alert_severity': 'High',
+        'contract_id': overdue_contracts['NUM_CONTRAT'],
+        'product': overdue_contracts['LIB_PRODUIT'],
+        'premium_amount': premium_amount,
+        'overdue_days': overdue_days
+    })
 
 def _generate_cancellation_alerts(df_contrats):
     """Generate alerts for recent cancellations"""
-    alerts = []
     today = datetime.now()
     cancellation_threshold = today - timedelta(days=ALERT_CONFIG['recent_cancellation_days'])
     
     recent_cancellations = df_contrats[
-        (df_contrats['LIB_ETAT_CONTRAT'] == 'RESILIE') &
+        df_contrats['is_cancelled'] &
         (df_contrats['DATE_EXPIRATION'] >= cancellation_threshold)
     ]
     
-    for _, contract in recent_cancellations.iterrows():
-        alerts.append({
-            'REF_PERSONNE': contract['REF_PERSONNE'],
-            'alert_type': 'recent_cancellation',
-            'alert_message': f"Policy {contract['NUM_CONTRAT']} ({contract['LIB_PRODUIT']}) was recently cancelled",
-            'alert_severity': 'Medium',
-            'contract_id': contract['NUM_CONTRAT'],
-            'product': contract['LIB_PRODUIT'],
-            'cancellation_date': contract['DATE_EXPIRATION']
-        })
-    
-    return alerts
+    return pd.DataFrame({
+        'REF_PERSONNE': recent_cancellations['REF_PERSONNE'],
+        'alert_type': 'recent_cancellation',
+        'alert_message': 'Policy ' + _contract_label(recent_cancellations) + ' was recently cancelled',
+        'alert_severity': 'Medium',
+        'contract_id': recent_cancellations['NUM_CONTRAT'],
+        'product': recent_cancellations['LIB_PRODUIT'],
+        'cancellation_date': recent_cancellations['DATE_EXPIRATION']
+    })
 
 def _generate_coverage_alerts(df_contrats):
     """Generate alerts for clients with low coverage"""
-    alerts = []
-    
     # Group by client and count contracts
     client_coverage = df_contrats.groupby('REF_PERSONNE').agg(
         total_contracts=('NUM_CONTRAT', 'count'),
-        active_contracts=('LIB_ETAT_CONTRAT', lambda x: (x == 'EN COURS').sum()),
+        active_contracts=('is_active', 'sum'),
         total_premium=('somme_quittances', 'sum')
     ).reset_index()
     
@@ -121,14 +138,13 @@ def _generate_coverage_alerts(df_contrats):
         (client_coverage['total_premium'] < 1000)  # Low premium indicates basic coverage only
     ]
     
-    for _, client in low_coverage_clients.iterrows():
-        alerts.append({
-            'REF_PERSONNE': client['REF_PERSONNE'],
-            'alert_type': 'low_coverage',
-            'alert_message': f"Client has only {client['active_contracts']} active policy with low premium coverage",
-            'alert_severity': 'Medium',
-            'active_contracts': client['active_contracts'],
-            'total_premium': client['total_premium']
-        })
-    
-    return alerts
\ No newline at end of file
+    # The alert has always reported the counts as floats (e.g. "only 1.0 active policy")
+    active_contracts = low_coverage_clients['active_contracts'].astype(float)
+    return pd.DataFrame({
+        'REF_PERSONNE': low_coverage_clients['REF_PERSONNE'],
+        'alert_type': 'low_coverage',
+        'alert_message': 'Client has only ' + active_contracts.astype(str) + ' active policy with low premium coverage',
+        'alert_severity': 'Medium',
+        'active_contracts': active_contracts,
+        'total_premium': low_coverage_clients['total_premium'].astype(float)
+    })
@@ -1,4 +1,4 @@
-from app.core.config import logger, BUDGET_CONFIG, PREMIUM_PRODUCTS, PRODUCT_SCORING_WEIGHTS, CLAIMS_ANALYSIS_CONFIG, ALERT_CONFIG, LARGE_BUSINESS_CAPITAL_THRESHOLD
+from app.core.config import logger, BUDGET_CONFIG, PREMIUM_PRODUCTS, PRODUCT_SCORING_WEIGHTS, CLAIMS_ANALYSIS_CONFIG, ALERT_CONFIG, LARGE_BUSINESS_CAPITAL_THRESHOLD, REASON_BUSINESS_PROFILE
 
 def recommend_business_insurance_enhanced(client_row, df_contrats, df_products, df_sinistres=None):
     """Enhanced recommendation function for business clients"""
@@ -9,8 +9,11 @@ def recommend_business_insurance_enhanced(client_row, df_contrats, df_products,
     client_contracts = df_contrats[df_contrats['REF_PERSONNE'] == client_id]
     existing_products = set(client_contracts['LIB_PRODUIT'].unique())
     
-    # Get client's existing categories
-    client_portfolio = client_contracts.merge(df_products, on='LIB_PRODUIT', how='left')
+    # Get client's existing categories (already on the contract fact table)
+    if 'LIB_SOUS_BRANCHE' in client_contracts.columns:
+        client_portfolio = client_contracts
+    else:
+        client_portfolio = client_contracts.merge(df_products, on='LIB_PRODUIT', how='left')
     existing_categories = set(client_portfolio['LIB_SOUS_BRANCHE'].dropna().unique())
     
     # Calculate budget
@@ -124,7 +127,7 @@ def recommend_business_insurance_enhanced(client_row, df_contrats, df_products,
             'product': product,
             'score': product_score['score'],
             'confidence': product_score['confidence'],
-            'reason': f"Based on business profile and scoring: {product_score['score']}/100"
+            'reason_id': REASON_BUSINESS_PROFILE
         })
     
     # Sort by score and take top 3
@@ -135,8 +138,12 @@ def recommend_business_insurance_enhanced(client_row, df_contrats, df_products,
 
 def analyze_claims_for_business(client_id, df_sinistres, df_contrats):
     """Analyze claims for business clients"""
-    client_contracts = df_contrats[df_contrats['REF_PERSONNE'] == client_id]['NUM_CONTRAT'].unique()
-    client_claims = df_sinistres[df_sinistres['NUM_CONTRAT'].isin(client_contracts)]
+    if 'REF_PERSONNE' in df_sinistres.columns:
+        # Claims already linked to their clients by link_claims_to_clients
+        client_claims = df_sinistres[df_sinistres['REF_PERSONNE'] == client_id]
+    else:
+        client_contracts = df_contrats[df_contrats['REF_PERSONNE'] == client_id]['NUM_CONTRAT'].unique()
+        client_claims = df_sinistres[df_sinistres['NUM_CONTRAT'].isin(client_contracts)]
     
     if client_claims.empty:
         return {}
@@ -1,9 +1,14 @@
 import pandas as pd
 from datetime import datetime
-from app.core.config import logger, BUDGET_CONFIG, PREMIUM_PRODUCTS, PRODUCT_SCORING_WEIGHTS, CLAIMS_ANALYSIS_CONFIG, ALERT_CONFIG
+from app.core.config import logger, BUDGET_CONFIG, PREMIUM_PRODUCTS, PRODUCT_SCORING_WEIGHTS, CLAIMS_ANALYSIS_CONFIG, ALERT_CONFIG, REASON_INDIVIDUAL_PROFILE
+from app.core.recommendation.alerts import compute_contract_alert_flags, client_alert_flags
 
-def recommend_individual_insurance_enhanced(client_row, df_contrats, df_products, df_sinistres=None):
-    """Enhanced recommendation function for individual clients"""
+def recommend_individual_insurance_enhanced(client_row, df_contrats, df_products, df_sinistres=None, alert_flags=None):
+    """Enhanced recommendation function for individual clients
+    
+    `alert_flags` is the output of `compute_contract_alert_flags` for the whole
+    contract table; when omitted it is computed from the client's contracts.
+    """
     
     client_id = client_row['REF_PERSONNE']
     logger.debug(f"Generating enhanced recommendations for individual client: {client_id}")
@@ -12,8 +17,11 @@ def recommend_individual_insurance_enhanced(client_row, df_contrats, df_products
     client_contracts = df_contrats[df_contrats['REF_PERSONNE'] == client_id]
     existing_products = set(client_contracts['LIB_PRODUIT'].unique())
     
-    # Merge with products to get categories
-    client_portfolio = client_contracts.merge(df_products, on='LIB_PRODUIT', how='left')                                       
+    # Product categories come with the contract fact table; merge plain contracts
+    if 'LIB_SOUS_BRANCHE' in client_contracts.columns:
+        client_portfolio = client_contracts
+    else:
+        client_portfolio = client_contracts.merge(df_products, on='LIB_PRODUIT', how='left')
     existing_categories = set(client_portfolio['LIB_SOUS_BRANCHE'].dropna().unique())
     
     # 2. CALCULATE CLIENT'S INSURANCE BUDGET
@@ -111,13 +119,14 @@ def recommend_individual_insurance_enhanced(client_row, df_contrats, df_products
         recommended_products.extend(claims_recommendations)
     
     # 6. ADD ALERT-BASED RECOMMENDATIONS
-    alerts = generate_individual_alerts(client_id, df_contrats)
-    for alert in alerts:
-        if 'Recently canceled contract' in str(alert['reasons']):
-            # Find alternative products in same branch
-            branch_products = df_products[df_products['LIB_BRANCHE'] == alert['branche']]['LIB_PRODUIT'].unique()
-            if len(branch_products) > 0:
-                recommended_products.append(branch_products[0])
+    if alert_flags is None:
+        alert_flags = compute_contract_alert_flags(client_contracts)
+    client_flags = client_alert_flags(alert_flags, client_id)
+    for branche in client_flags.loc[client_flags['is_recently_cancelled'], 'branche']:
+        # Find alternative products in same branch
+        branch_products = df_products[df_products['LIB_BRANCHE'] == branche]['LIB_PRODUIT'].unique()
+        if len(branch_products) > 0:
+            recommended_products.append(branch_products[0])
     
     # 7. FILTER BY BUDGET AND SCORE PRODUCTS
     final_recommendations = []
@@ -135,7 +144,7 @@ def recommend_individual_insurance_enhanced(client_row, df_contrats, df_products
                     'product': product,
                     'score': product_score['score'],
                     'confidence': product_score['confidence'],
-                    'reason': f"Based on client profile and scoring: {product_score['score']}/100"
+                    'reason_id': REASON_INDIVIDUAL_PROFILE
                 })
     
     # Sort by score and take top 3
@@ -146,8 +155,12 @@ def recommend_individual_insurance_enhanced(client_row, df_contrats, df_products
 
 def analyze_claims_for_individual(client_id, df_sinistres, df_contrats):
     """Analyze claims for individual clients"""
-    client_contracts = df_contrats[df_contrats['REF_PERSONNE'] == client_id]['NUM_CONTRAT'].unique()
-    client_claims = df_sinistres[df_sinistres['NUM_CONTRAT'].isin(client_contracts)]
+    if 'REF_PERSONNE' in df_sinistres.columns:
+        # Claims already linked to their clients by link_claims_to_clients
+        client_claims = df_sinistres[df_sinistres['REF_PERSONNE'] == client_id]
+    else:
+        client_contracts = df_contrats[df_contrats['REF_PERSONNE'] == client_id]['NUM_CONTRAT'].unique()
+        client_claims = df_sinistres[df_sinistres['NUM_CONTRAT'].isin(client_contracts)]
     
     if client_claims.empty:
         return {}
@@ -161,46 +174,28 @@ def analyze_claims_for_individual(client_id, df_sinistres, df_contrats):
         'total_claim_amount': client_claims['MONTANT_ENCAISSE'].sum()
     }
 
-def generate_individual_alerts(client_id, df_contrats):
+def generate_individual_alerts(client_id, df_contrats, alert_flags=None):
     """Generate alerts for individual clients"""
-    alerts = []
-    client_contracts = df_contrats[df_contrats['REF_PERSONNE'] == client_id]
-    current_date = datetime.now()
+    if alert_flags is None:
+        alert_flags = compute_contract_alert_flags(df_contrats[df_contrats['REF_PERSONNE'] == client_id])
     
-    for _, contract in client_contracts.iterrows():
+    alerts = []
+    for contract in client_alert_flags(alert_flags, client_id).itertuples(index=False):
         alert_reasons = []
+        if contract.is_expiring:
+            alert_reasons.append(f'Contract expires in {contract.days_until_expiry} days')
+        if contract.is_recently_cancelled:
+            alert_reasons.append('Recently canceled contract')
+        if contract.is_payment_overdue:
+            alert_reasons.append(f'Payment overdue by {contract.overdue_days} days')
         
-        # Expiration alerts
-        if pd.notna(contract['DATE_EXPIRATION']):
-            exp_date = pd.to_datetime(contract['DATE_EXPIRATION'])
-            days_until_expiry = (exp_date - current_date).days
-            if 0 <= days_until_expiry <= ALERT_CONFIG['expiration_alert_days']:
-                alert_reasons.append(f'Contract expires in {days_until_expiry} days')
-        
-        # Cancellation alerts
-        if contract['LIB_ETAT_CONTRAT'] == 'RESILIE':
-            if pd.notna(contract['EFFET_CONTRAT']):
-                eff_date = pd.to_datetime(contract['EFFET_CONTRAT'])
-                days_since_cancel = (current_date - eff_date).days
-                if days_since_cancel <= ALERT_CONFIG['recent_cancellation_days']:
-                    alert_reasons.append('Recently canceled contract')
-        
-        # Payment alerts
-        if contract['statut_paiement'] == 'Non payé' and pd.notna(contract['PROCHAIN_TERME']):
-            next_term = pd.to_datetime(contract['PROCHAIN_TERME'])
-            if next_term < current_date:
-                overdue_days = (current_date - next_term).days
-                if overdue_days >= ALERT_CONFIG['payment_overdue_days']:
-                    alert_reasons.append(f'Payment overdue by {overdue_days} days')
-        
-        if alert_reasons:
-            alerts.append({
-                'NUM_CONTRAT': contract['NUM_CONTRAT'],
-                'LIB_PRODUIT': contract['LIB_PRODUIT'],
-                'branche': contract['branche'],
-                'reasons': alert_reasons,
-                'alert_level': 'HIGH' if 'Payment overdue' in str(alert_reasons) else 'MEDIUM'
-            })
+        alerts.append({
+            'NUM_CONTRAT': contract.NUM_CONTRAT,
+            'LIB_PRODUIT': contract.LIB_PRODUIT,
+            'branche': contract.branche,
+            'reasons': alert_reasons,
+            'alert_level': 'HIGH' if contract.is_payment_overdue else 'MEDIUM'
+        })
     
     return alerts
 
@@ -1,5 +1,6 @@
 import pandas as pd
 from app.core.config import SCORING_WEIGHTS, SEGMENT_THRESHOLDS, RISK_THRESHOLDS, BUSINESS_RISK_PROFILES
+from app.core.contract_facts import add_status_indicators
 from app.core.grouping_utils import create_business_groups
 
 def calculate_business_scores(df_contrats, df_personne_morale):
@@ -9,17 +10,18 @@ def calculate_business_scores(df_contrats, df_personne_morale):
     df_personne_morale = create_business_groups(df_personne_morale)
     
     # Calculate contract-based metrics
+    df_contrats = add_status_indicators(df_contrats)
     client_metrics = df_contrats.groupby('REF_PERSONNE').agg(
         total_contracts=('NUM_CONTRAT', 'count'),
-        active_contracts=('LIB_ETAT_CONTRAT', lambda x: (x == 'EN COURS').sum()),
+        active_contracts=('is_active', 'sum'),
         product_variety=('LIB_PRODUIT', 'nunique'),
         branch_variety=('branche', 'nunique'),
         total_premiums_paid=('somme_quittances', 'sum'),
         avg_premium_per_contract=('somme_quittances', 'mean'),
         total_capital_assured=('Capital_assure', 'sum'),
-        paid_ratio=('statut_paiement', lambda x: (x == 'Payé').mean()),
-        total_paid_contracts=('statut_paiement', lambda x: (x == 'Payé').sum()),
-        canceled_contracts=('LIB_ETAT_CONTRAT', lambda x: (x == 'RESILIE').sum()),
+        paid_ratio=('is_paid', 'mean'),
+        total_paid_contracts=('is_paid', 'sum'),
+        canceled_contracts=('is_cancelled', 'sum'),
     ).reset_index()
 
     # Calculate component scores
@@ -1,5 +1,6 @@
 import pandas as pd
 from app.core.config import SCORING_WEIGHTS, SEGMENT_THRESHOLDS, RISK_THRESHOLDS
+from app.core.contract_facts import add_status_indicators
 from app.core.grouping_utils import create_profession_groups, create_sector_groups
 
 def calculate_individual_scores(df_contrats, df_clients):
@@ -10,9 +11,10 @@ def calculate_individual_scores(df_contrats, df_clients):
     df_clients = create_sector_groups(df_clients)
     
     # Calculate contract-based metrics
+    df_contrats = add_status_indicators(df_contrats)
     client_metrics = df_contrats.groupby('REF_PERSONNE').agg(
         total_contracts=('NUM_CONTRAT', 'count'),
-        active_contracts=('LIB_ETAT_CONTRAT', lambda x: (x == 'EN COURS').sum()),
+        active_contracts=('is_active', 'sum'),
         product_variety=('LIB_PRODUIT', 'nunique'),
         branch_variety=('branche', 'nunique'),
         total_premiums_paid=('somme_quittances', 'sum'),
@@ -20,12 +22,12 @@ def calculate_individual_scores(df_contrats, df_clients):
         max_premium=('somme_quittances', 'max'),
         total_capital_assured=('Capital_assure', 'sum'),
         avg_capital_per_contract=('Capital_assure', 'mean'),
-        paid_ratio=('statut_paiement', lambda x: (x == 'Payé').mean()),
-        total_paid_contracts=('statut_paiement', lambda x: (x == 'Payé').sum()),
-        total_unpaid_contracts=('statut_paiement', lambda x: (x == 'Non payé').sum()),
-        expired_contracts=('LIB_ETAT_CONTRAT', lambda x: (x == 'EXPIRE').sum()),
-        canceled_contracts=('LIB_ETAT_CONTRAT', lambda x: (x == 'RESILIE').sum()),
-        active_ratio=('LIB_ETAT_CONTRAT', lambda x: (x == 'EN COURS').mean())
+        paid_ratio=('is_paid', 'mean'),
+        total_paid_contracts=('is_paid', 'sum'),
+        total_unpaid_contracts=('is_unpaid', 'sum'),
+        expired_contracts=('is_expired', 'sum'),
+        canceled_contracts=('is_cancelled', 'sum'),
+        active_ratio=('is_active', 'mean')
     ).reset_index()
 
     # Create derived metrics
@@ -0,0 +1,125 @@
+"""Retention of the alerts table.
+
+Two kinds of alerts leave the hot table:
+- expired: expiration_date older than ALERT_RETENTION_CONFIG['retention_days'];
+- superseded: contract-expiry alerts whose contract no longer expires on the
+  alerted date (renewed or removed) and which the sync therefore never rewrites.
+
+Rows are copied to alerts_archive (unless archiving is off) and deleted in
+batches of ALERT_RETENTION_CONFIG['batch_size'], one short transaction per
+batch, selected through the (expiration_date, REF_PERSONNE) index and the
+primary key respectively.
+"""
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import select, delete, insert, literal, exists, and_
+from sqlalchemy.orm import Session
+
+from app.core.config import logger, ALERT_RETENTION_CONFIG
+from app.db.base import SessionLocal
+from app.models.alerts import Alert, AlertArchive
+from app.models.contract import Contract
+from app.services.data_version import data_versions, ALERTS
+from app.services.alert_events import alert_events, DELETED
+
+ARCHIVED_COLUMNS = (
+    "REF_PERSONNE", "alert_type", "alert_message", "alert_severity", "product", "expiration_date",
+)
+
+def archive_and_delete(session: Session, refs, condition, reason, archive):
+    """Archive and delete the alerts of `refs` that still match `condition`; returns the refs removed.
+
+    The sync and the alert routes may have rewritten a picked alert since it
+    was selected, so the candidates are locked and `condition` is checked
+    again in the archive copy and the delete.
+    """
+    refs = session.scalars(
+        select(Alert.REF_PERSONNE).where(Alert.REF_PERSONNE.in_(refs)).where(condition).with_for_update()
+    ).all()
+    if not refs:
+        session.commit()
+        return refs
+    selected = and_(Alert.REF_PERSONNE.in_(refs), condition)
+    if archive:
+        archived_at = datetime.now()
+        source = select(
+            *(getattr(Alert, column) for column in ARCHIVED_COLUMNS),
+            literal(archived_at).label("archived_at"),
+            literal(reason).label("archive_reason"),
+        ).where(selected)
+        session.execute(insert(AlertArchive).from_select(
+            [*ARCHIVED_COLUMNS, "archived_at", "archive_reason"], source
+        ))
+    session.execute(delete(Alert).where(selected))
+    session.commit()
+    for ref in refs:
+        alert_events.publish(DELETED, {"REF_PERSONNE": ref})
+    return refs
+
+def _purge_expired(session: Session, cutoff, batch_size, archive, summary):
+    expired = Alert.expiration_date < cutoff
+    while True:
+        refs = session.scalars(
+            select(Alert.REF_PERSONNE)
+            .where(expired)
+            .order_by(Alert.expiration_date, Alert.REF_PERSONNE)
+            .limit(batch_size)
+        ).all()
+        if not refs:
+            return
+        summary["expired"] += len(archive_and_delete(session, refs, expired, "expired", archive))
+
+def _purge_superseded(session: Session, batch_size, archive, summary):
+    contract_still_expiring = exists().where(and_(
+        Contract.REF_PERSONNE == Alert.REF_PERSONNE,
+        Contract.DATE_EXPIRATION == Alert.expiration_date,
+    ))
+    superseded = and_(
+        Alert.alert_type == "contract_expiry",
+        Alert.expiration_date.isnot(None),
+        ~contract_still_expiring,
+    )
+    last_ref = None
+    while True:
+        # Walk the primary key so each batch only examines batch_size alerts
+        q = select(Alert.REF_PERSONNE).order_by(Alert.REF_PERSONNE).limit(batch_size)
+        if last_ref is not None:
+            q = q.where(Alert.REF_PERSONNE > last_ref)
+        window = session.scalars(q).all()
+        if not window:
+            return
+        last_ref = window[-1]
+        refs = session.scalars(
+            select(Alert.REF_PERSONNE).where(Alert.REF_PERSONNE.in_(window)).where(superseded)
+        ).all()
+        if refs:
+            summary["superseded"] += len(archive_and_delete(session, refs, superseded, "superseded", archive))
+
+def run_alert_retention_once_sync(retention_days=ALERT_RETENTION_CONFIG['retention_days'],
+                                  batch_size=ALERT_RETENTION_CONFIG['batch_size'],
+                                  archive=ALERT_RETENTION_CONFIG['archive']):
+    """Archive and delete expired and superseded alerts; returns the counts"""
+    pid = os.getpid()
+    logger.info(f"Starting alert retention (pid={pid}, retention_days={retention_days})")
+    cutoff = datetime.combine(datetime.now().date() - timedelta(days=retention_days), datetime.min.time())
+
+    session: Session = SessionLocal()
+    summary = {"expired": 0, "superseded": 0}
+    try:
+        _purge_expired(session, cutoff, batch_size, archive, summary)
+        _purge_superseded(session, batch_size, archive, summary)
+    except Exception as e:
+        logger.exception(f"Error running alert retention: {e}")
+        session.rollback()
+    finally:
+        session.close()
+        # Batches committed before a failure still changed the table
+        if summary["expired"] or summary["superseded"]:
+            # The deletions were published batch by batch
+            alert_events.mark_published(data_versions.bump(ALERTS))
+
+    logger.info(f"Alert retention finished: {summary}")
+    return summary
+
+if __name__ == "__main__":
+    run_alert_retention_once_sync()
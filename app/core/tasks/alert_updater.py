@@ -2,15 +2,25 @@ import os
 import sys
 import logging
 import asyncio
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, time
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+from typing import Optional
+from sqlalchemy import select, update, insert, text, bindparam, func, exists, and_
+from sqlalchemy.dialects.mysql import insert as mysql_insert
 from sqlalchemy.orm import Session
 from dateutil import parser as date_parser
 
+from app.core.config import ALERT_CONFIG, ALERT_SYNC_CONFIG, ALERT_RETENTION_CONFIG
 from app.db.base import SessionLocal
 from app.models.contract import Contract
 from app.models.alerts import Alert
+from app.models.sync_watermark import SyncWatermark
+from app.core.tasks.expiry_wheel import expiry_wheel
+from app.core.tasks.leader_lock import scheduler_leader
+from app.core.tasks.alert_retention import run_alert_retention_once_sync, archive_and_delete
+from app.services.data_version import data_versions, ALERTS
+from app.services.alert_events import alert_events, UPSERTED, REFRESH
 
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 logging.basicConfig(level=logging.INFO, stream=sys.stdout, format=LOG_FORMAT)
@@ -38,117 +48,362 @@ def parse_date_safe(date_str):
                 continue
     return None
 
-def run_alert_sync_once_sync(max_scan: int = 1000):
+def _count_existing(session: Session, keys):
+    return session.scalar(select(func.count()).select_from(Alert).where(Alert.REF_PERSONNE.in_(keys)))
+
+def _upsert_chunk_mysql(session: Session, rows):
+    """One INSERT ... ON DUPLICATE KEY UPDATE for the whole chunk"""
+    # Counted up front: the affected-rows count cannot tell inserts from updates
+    # under CLIENT_FOUND_ROWS, which SQLAlchemy enables
+    updated = _count_existing(session, [row["REF_PERSONNE"] for row in rows])
+    stmt = mysql_insert(Alert.__table__).values(rows)
+    stmt = stmt.on_duplicate_key_update({
+        column: stmt.inserted[column] for column in rows[0] if column != "REF_PERSONNE"
+    })
+    session.execute(stmt)
+    return len(rows) - updated, updated
+
+def _upsert_chunk_portable(session: Session, rows):
+    """Any dialect: look up the existing keys, then one executemany UPDATE and one INSERT"""
+    keys = [row["REF_PERSONNE"] for row in rows]
+    existing = set(session.scalars(select(Alert.REF_PERSONNE).where(Alert.REF_PERSONNE.in_(keys))))
+    to_update = [row for row in rows if row["REF_PERSONNE"] in existing]
+    to_insert = [row for row in rows if row["REF_PERSONNE"] not in existing]
+    if to_update:
+        session.execute(update(Alert), to_update)
+    if to_insert:
+        session.execute(insert(Alert), to_insert)
+    return len(to_insert), len(to_update)
+
+def upsert_alerts(session: Session, rows, chunk_size: int = ALERT_CONFIG["batch_size"]):
+    """Insert or update alert rows keyed by REF_PERSONNE in multi-row chunks.
+
+    Returns the (created, updated) counts, `updated` being the rows whose key
+    already existed, rewritten whether or not their values changed; the
+    caller commits.
+    """
+    upsert_chunk = _upsert_chunk_mysql if session.get_bind().dialect.name == "mysql" else _upsert_chunk_portable
+    created = updated = 0
+    for start in range(0, len(rows), chunk_size):
+        chunk_created, chunk_updated = upsert_chunk(session, rows[start:start + chunk_size])
+        created += chunk_created
+        updated += chunk_updated
+    return created, updated
+
+EXPIRY_THRESHOLDS = ALERT_SYNC_CONFIG["expiry_thresholds"]
+EXPIRY_WINDOW_DAYS = max(EXPIRY_THRESHOLDS)
+
+def expiry_severity(days_until_expiry):
+    """Severity of the smallest expiry threshold reached"""
+    for days in sorted(EXPIRY_THRESHOLDS):
+        if days_until_expiry <= days:
+            return EXPIRY_THRESHOLDS[days]
+    return None
+
+def _expiry_severity_sql(days_expression):
+    cases = " ".join(
+        f"WHEN {days_expression} <= {days} THEN '{severity}'"
+        for days, severity in sorted(EXPIRY_THRESHOLDS.items())
+    )
+    return f"CASE {cases} END"
+
+# Nearest-expiring contract per client within the window, written in one statement.
+# `client_filter` restricts it to the clients of an incremental pass.
+EXPIRY_ALERTS_SQL = """
+    INSERT INTO alerts (REF_PERSONNE, alert_type, alert_message, alert_severity, product, expiration_date)
+    SELECT
+        nearest.REF_PERSONNE,
+        'contract_expiry',
+        CONCAT('Contract ', nearest.NUM_CONTRAT, ' (', COALESCE(nearest.LIB_PRODUIT, 'None'), ') expires on ',
+               DATE_FORMAT(nearest.DATE_EXPIRATION, '%Y-%m-%d'), '.'),
+        {severity},
+        nearest.LIB_PRODUIT,
+        nearest.DATE_EXPIRATION
+    FROM (
+        SELECT
+            REF_PERSONNE, NUM_CONTRAT, LIB_PRODUIT, DATE_EXPIRATION,
+            ROW_NUMBER() OVER (PARTITION BY REF_PERSONNE ORDER BY DATE_EXPIRATION, `index`) AS expiry_rank
+        FROM contracts
+        WHERE DATE_EXPIRATION > :today AND DATE_EXPIRATION < :window_end
+          AND REF_PERSONNE IS NOT NULL AND NUM_CONTRAT IS NOT NULL
+          {client_filter}
+    ) AS nearest
+    WHERE nearest.expiry_rank = 1
+    ON DUPLICATE KEY UPDATE
+        alert_type = VALUES(alert_type),
+        alert_message = VALUES(alert_message),
+        alert_severity = VALUES(alert_severity),
+        product = VALUES(product),
+        expiration_date = VALUES(expiration_date)
+"""
+
+EXPIRY_CLIENTS_SQL = """
+    SELECT COUNT(DISTINCT REF_PERSONNE)
+    FROM contracts
+    WHERE DATE_EXPIRATION > :today AND DATE_EXPIRATION < :window_end
+      AND REF_PERSONNE IS NOT NULL AND NUM_CONTRAT IS NOT NULL
+      {client_filter}
+"""
+
+# Clients of the pass that already have an alert, i.e. the rows the upsert updates
+EXPIRY_EXISTING_SQL = """
+    SELECT COUNT(*)
+    FROM alerts
+    WHERE REF_PERSONNE IN (
+        SELECT REF_PERSONNE
+        FROM contracts
+        WHERE DATE_EXPIRATION > :today AND DATE_EXPIRATION < :window_end
+          AND REF_PERSONNE IS NOT NULL AND NUM_CONTRAT IS NOT NULL
+          {client_filter}
+    )
+"""
+
+WATERMARK_CONTRACTS = "alert_sync.contracts_updated_at"
+WATERMARK_WINDOW = "alert_sync.window_day"
+
+def _expiry_statement(template, refs=None):
+    severity = _expiry_severity_sql("DATEDIFF(nearest.DATE_EXPIRATION, :today)")
+    if refs is None:
+        return text(template.format(client_filter="", severity=severity))
+    return text(template.format(client_filter="AND REF_PERSONNE IN :refs", severity=severity)).bindparams(
+        bindparam("refs", expanding=True)
+    )
+
+def _sync_alerts_in_database(session: Session, today, cutoff_date, refs=None):
+    """MySQL: compute and upsert the alerts with INSERT ... SELECT, no rows in Python"""
+    params = {"today": today, "window_end": cutoff_date + timedelta(days=1)}
+    if refs is not None:
+        params["refs"] = refs
+    clients = session.execute(_expiry_statement(EXPIRY_CLIENTS_SQL, refs), params).scalar_one()
+    updated = session.execute(_expiry_statement(EXPIRY_EXISTING_SQL, refs), params).scalar_one()
+    session.execute(_expiry_statement(EXPIRY_ALERTS_SQL, refs), params)
+    return {
+        "mode": "sql",
+        "clients": clients,
+        "created": clients - updated,
+        "updated": updated,
+    }
+
+def _sync_alerts_in_python(session: Session, today, cutoff_date, pid, max_scan=None, refs=None):
+    """Portable path: read the window, keep the nearest contract per client, bulk upsert"""
+    # Typed DATE_EXPIRATION: the window is an index range scan, no parsing needed.
+    # Bounds are datetimes so databases storing DATETIME as text compare them correctly.
+    q = (
+        session.query(Contract)
+        .filter(Contract.DATE_EXPIRATION > datetime.combine(today, time.min))
+        .filter(Contract.DATE_EXPIRATION < datetime.combine(cutoff_date + timedelta(days=1), time.min))
+        .order_by(Contract.DATE_EXPIRATION.asc(), Contract.index.asc())
+    )
+    if refs is not None:
+        q = q.filter(Contract.REF_PERSONNE.in_(refs))
+    if max_scan is not None:
+        q = q.limit(max_scan)
+    contracts = q.all()
+    print(f"[alert_updater pid={pid}] Materialized {len(contracts)} contracts (limit={max_scan})", flush=True)
+
+    parsed_count = skipped_no_ref = 0
+    close_samples = []
+    best_contracts = {}
+
+    for c in contracts:
+        exp_dt = c.DATE_EXPIRATION
+        parsed_count += 1
+        ref = c.REF_PERSONNE
+        num_contrat = c.NUM_CONTRAT
+        lib_prod = c.LIB_PRODUIT
+
+        if ref is None or num_contrat is None:
+            skipped_no_ref += 1
+            continue
+
+        # Rows come ordered by (DATE_EXPIRATION, index): on a tie the first one seen wins, as in the SQL path
+        if ref not in best_contracts or exp_dt < best_contracts[ref]["exp_dt"]:
+            best_contracts[ref] = {
+                "num_contrat": num_contrat,
+                "lib_prod": lib_prod,
+                "exp_dt": exp_dt,
+            }
+
+    rows = []
+    for ref, data in best_contracts.items():
+        exp_dt = data["exp_dt"]
+        lib_prod = data["lib_prod"]
+        num_contrat = data["num_contrat"]
+
+        # The message carries the date, not a day count, so it stays true until the next sync
+        rows.append({
+            "REF_PERSONNE": ref,
+            "alert_type": "contract_expiry",
+            "alert_message": f"Contract {num_contrat} ({lib_prod}) expires on {exp_dt:%Y-%m-%d}.",
+            "alert_severity": expiry_severity((exp_dt.date() - today).days),
+            "product": lib_prod,
+            "expiration_date": exp_dt,
+        })
+
+        if len(close_samples) < 10:
+            close_samples.append((ref, num_contrat, exp_dt, (exp_dt.date() - today).days))
+
+    created, updated = upsert_alerts(session, rows)
+
+    if close_samples:
+        print(f"[alert_updater pid={pid}] Close-to-expiry samples: {close_samples[:20]}", flush=True)
+
+    return {
+        "mode": "python",
+        "materialized": len(contracts),
+        "parsed": parsed_count,
+        "created": created,
+        "updated": updated,
+        "skipped_no_ref": skipped_no_ref,
+    }
+
+def _load_watermark(session: Session, name):
+    watermark = session.get(SyncWatermark, name)
+    return watermark.value if watermark else None
+
+def _save_watermark(session: Session, name, value):
+    watermark = session.get(SyncWatermark, name) or SyncWatermark(name=name)
+    watermark.value = value
+    session.add(watermark)
+
+WHEEL_COLUMNS = (Contract.index, Contract.REF_PERSONNE, Contract.DATE_EXPIRATION)
+
+def _load_expiry_wheel(session: Session, last_day):
+    """Schedule the thresholds of the contracts in the expiry window after `last_day`"""
+    contracts = session.execute(
+        select(*WHEEL_COLUMNS)
+        .where(Contract.DATE_EXPIRATION > datetime.combine(last_day, time.min))
+        .where(Contract.DATE_EXPIRATION < datetime.combine(expiry_wheel.horizon_for(last_day), time.min))
+    ).all()
+    expiry_wheel.load(contracts, last_day)
+    logger.info("Expiry wheel loaded: %d pending thresholds from %d contracts", len(expiry_wheel), len(contracts))
+
+def _extend_expiry_wheel(session: Session, today):
+    """Take in the contracts the window reached since the wheel's horizon"""
+    horizon = expiry_wheel.horizon_for(today)
+    if horizon <= expiry_wheel.horizon:
+        return
+    contracts = session.execute(
+        select(*WHEEL_COLUMNS)
+        .where(Contract.DATE_EXPIRATION >= datetime.combine(expiry_wheel.horizon, time.min))
+        .where(Contract.DATE_EXPIRATION < datetime.combine(horizon, time.min))
+    ).all()
+    expiry_wheel.extend(contracts, horizon)
+
+def _changed_clients(session: Session, today, contracts_since, last_day):
+    """Clients whose alert may differ from the stored one, and the thresholds fired today.
+
+    That is the clients with a contract inserted or updated since `contracts_since`
+    plus those with a contract whose expiry threshold arrived since `last_day`.
+    """
+    changed = session.execute(select(*WHEEL_COLUMNS).where(Contract.updated_at > contracts_since)).all()
+    if expiry_wheel.loaded:
+        expiry_wheel.reschedule(changed)
+    else:
+        _load_expiry_wheel(session, last_day)
+    _extend_expiry_wheel(session, today)
+    events = expiry_wheel.advance(today)
+
+    refs = {contract.REF_PERSONNE for contract in changed}
+    refs.update(event.ref_personne for event in events)
+    refs.discard(None)
+    return sorted(refs), events
+
+def _sync_changed_clients(session: Session, today, cutoff_date, refs, pid):
+    """Recompute the alerts of `refs` only, in chunks of ALERT_SYNC_CONFIG['clients_chunk_size'].
+
+    The expiry alert of a ref left with no contract in the window is archived
+    and deleted, as the retention job would for a superseded alert.
+    """
+    in_database = session.get_bind().dialect.name == "mysql"
+    chunk_size = ALERT_SYNC_CONFIG["clients_chunk_size"]
+    summary = {"mode": "incremental", "changed_clients": len(refs), "created": 0, "updated": 0, "deleted": 0}
+    # A changed client whose contracts all left the window produces no row: its old alert goes
+    in_window = exists().where(and_(
+        Contract.REF_PERSONNE == Alert.REF_PERSONNE,
+        Contract.NUM_CONTRAT.isnot(None),
+        Contract.DATE_EXPIRATION > datetime.combine(today, time.min),
+        Contract.DATE_EXPIRATION < datetime.combine(cutoff_date + timedelta(days=1), time.min),
+    ))
+    left_window = and_(Alert.alert_type == "contract_expiry", ~in_window)
+    for start in range(0, len(refs), chunk_size):
+        chunk = refs[start:start + chunk_size]
+        if in_database:
+            chunk_summary = _sync_alerts_in_database(session, today, cutoff_date, refs=chunk)
+        else:
+            chunk_summary = _sync_alerts_in_python(session, today, cutoff_date, pid, refs=chunk)
+        summary["created"] += chunk_summary["created"]
+        summary["updated"] += chunk_summary["updated"]
+        summary["deleted"] += len(archive_and_delete(
+            session, chunk, left_window, "superseded", ALERT_RETENTION_CONFIG['archive']
+        ))
+    return summary
+
+def _publish_changes(session: Session, refs):
+    """Tell the open alert streams what a pass changed: the refreshed clients, or everything"""
+    if not alert_events.has_subscribers:
+        return
+    if refs is None:
+        alert_events.publish(REFRESH)
+        return
+    chunk_size = ALERT_SYNC_CONFIG["clients_chunk_size"]
+    for start in range(0, len(refs), chunk_size):
+        for alert in session.scalars(select(Alert).where(Alert.REF_PERSONNE.in_(refs[start:start + chunk_size]))):
+            alert_events.publish(UPSERTED, alert)
+
+def run_alert_sync_once_sync(max_scan: Optional[int] = None, incremental: bool = False):
+    """Refresh the contract-expiry alert of every client with a contract expiring within the
+    largest of ALERT_SYNC_CONFIG['expiry_thresholds'].
+
+    On MySQL the whole book is handled by one INSERT ... SELECT; other databases
+    use the Python path, optionally capped at `max_scan` contracts. With
+    `incremental`, only the clients with changed contracts or with a threshold
+    fired by the expiry wheel are recomputed; without watermarks yet, the pass
+    runs in full.
+    """
     pid = os.getpid()
     print(f"[alert_updater pid={pid}] (sync) Starting alert sync at {datetime.now().isoformat()}", flush=True)
-    logger.info("Starting alert sync (sync) (pid=%d)", pid)
+    logger.info("Starting alert sync (sync) (pid=%d, incremental=%s)", pid, incremental)
 
     session: Session = SessionLocal()
     try:
         today = datetime.now().date()
-        cutoff_date = today + timedelta(days=15)
-
-        q = (
-            session.query(Contract)
-            .filter(Contract.DATE_EXPIRATION != None)
-            .filter(Contract.DATE_EXPIRATION > today)
-            .order_by(Contract.DATE_EXPIRATION.asc())
-        )
-        contracts = q.limit(max_scan).all()
-        print(f"[alert_updater pid={pid}] Materialized {len(contracts)} contracts (limit={max_scan})", flush=True)
-
-        parsed_count = created = updated = skipped_no_ref = skipped_unparseable = skipped_expired = 0
-        parse_fail_samples = []
-        close_samples = []
-        best_contracts = {}
-
-        for c in contracts:
-            date_exp = c.DATE_EXPIRATION
-            exp_dt = parse_date_safe(date_exp)
-            if not exp_dt:
-                skipped_unparseable += 1
-                if len(parse_fail_samples) < 10:
-                    parse_fail_samples.append((c.index, c.REF_PERSONNE, date_exp))
-                continue
+        cutoff_date = today + timedelta(days=EXPIRY_WINDOW_DAYS)
 
-            if exp_dt.date() > cutoff_date:
-                print(f"[alert_updater pid={pid}] Reached beyond cutoff ({exp_dt.date()} > {cutoff_date}) — stopping.", flush=True)
-                break
+        # Read before the contracts so a change committed during the pass is picked up next time.
+        # A change committed later but stamped within the same second is left to the full sync.
+        contracts_mark = session.scalar(select(func.max(Contract.updated_at)))
+        contracts_since = _load_watermark(session, WATERMARK_CONTRACTS)
+        last_day = _load_watermark(session, WATERMARK_WINDOW)
 
-            parsed_count += 1
-            ref = c.REF_PERSONNE
-            num_contrat = c.NUM_CONTRAT
-            lib_prod = c.LIB_PRODUIT
-            days_until = (exp_dt.date() - today).days
-
-            if ref is None or num_contrat is None:
-                skipped_no_ref += 1
-                continue
-
-            if ref not in best_contracts or exp_dt < best_contracts[ref]["exp_dt"]:
-                best_contracts[ref] = {
-                    "num_contrat": num_contrat,
-                    "lib_prod": lib_prod,
-                    "exp_dt": exp_dt,
-                    "days_until": days_until,
-                }
-
-        for ref, data in best_contracts.items():
-            exp_dt = data["exp_dt"]
-            days_until = data["days_until"]
-            lib_prod = data["lib_prod"]
-            num_contrat = data["num_contrat"]
-
-            alert_message = f"Contract {num_contrat} ({lib_prod}) expires in {days_until} day(s)."
-            existing_alert = session.query(Alert).get(ref)
-
-            if existing_alert:
-                existing_alert.product = lib_prod
-                existing_alert.expiration_date = exp_dt
-                existing_alert.days_until_expiry = days_until
-                existing_alert.alert_message = alert_message
-                existing_alert.alert_severity = "High"
-                existing_alert.alert_type = "contract_expiry"
-                updated += 1
-            else:
-                new_alert = Alert(
-                    REF_PERSONNE=ref,
-                    alert_type="contract_expiry",
-                    alert_message=alert_message,
-                    alert_severity="High",
-                    product=lib_prod,
-                    expiration_date=exp_dt,
-                    days_until_expiry=days_until,
-                )
-                session.add(new_alert)
-                created += 1
-
-            if len(close_samples) < 10:
-                close_samples.append((ref, num_contrat, exp_dt, days_until))
+        refs = None
+        if incremental and contracts_since is not None and last_day is not None:
+            refs, events = _changed_clients(session, today, contracts_since, last_day.date())
+            summary = _sync_changed_clients(session, today, cutoff_date, refs, pid)
+            summary["thresholds_fired"] = len(events)
+        elif session.get_bind().dialect.name == "mysql":
+            summary = _sync_alerts_in_database(session, today, cutoff_date)
+        else:
+            summary = _sync_alerts_in_python(session, today, cutoff_date, pid, max_scan)
 
+        # A capped scan did not see every contract, so it must not move the watermarks
+        if max_scan is None:
+            _save_watermark(session, WATERMARK_CONTRACTS, contracts_mark or contracts_since)
+            _save_watermark(session, WATERMARK_WINDOW, datetime.combine(today, time.min))
         session.commit()
-
-        summary = {
-            "materialized": len(contracts),
-            "parsed": parsed_count,
-            "created": created,
-            "updated": updated,
-            "skipped_no_ref": skipped_no_ref,
-            "skipped_unparseable": skipped_unparseable,
-            "skipped_expired": skipped_expired,
-        }
+        # A pass that wrote no alert leaves the caches, the streams and the ETags alone
+        if summary["created"] or summary["updated"] or summary.get("deleted"):
+            alert_events.mark_published(data_versions.bump(ALERTS))
+            _publish_changes(session, refs)
 
         print(f"[alert_updater pid={pid}] FINAL SUMMARY: {summary}", flush=True)
         logger.info("Alert sync summary (sync): %s", summary)
 
-        if parse_fail_samples:
-            print(f"[alert_updater pid={pid}] Parse failures (sample): {parse_fail_samples}", flush=True)
-        if close_samples:
-            print(f"[alert_updater pid={pid}] Close-to-expiry samples: {close_samples[:20]}", flush=True)
-
     except Exception as e:
         logger.exception("Error running alert sync (sync): %s", e)
         print(f"[alert_updater pid={pid}] ERROR: {e}", flush=True)
+        # Thresholds popped by the failed pass are replayed from the stored watermark
+        expiry_wheel.clear()
         try:
             session.rollback()
         except Exception:
@@ -161,13 +416,16 @@ def run_alert_sync_once_sync(max_scan: int = 1000):
         print(f"[alert_updater pid={pid}] Finished alert sync at {datetime.now().isoformat()}", flush=True)
         logger.info("Alert sync finished (sync) (pid=%d)", pid)
 
-async def run_alert_sync_once():
+async def run_alert_sync_once(incremental: bool = False):
     pid = os.getpid()
     print(f"[alert_updater pid={pid}] Running alert sync wrapper at {datetime.now().isoformat()}", flush=True)
     logger.info("Running alert sync wrapper (pid=%d)", pid)
 
     try:
-        await asyncio.to_thread(run_alert_sync_once_sync)
+        if not await asyncio.to_thread(scheduler_leader.acquire):
+            logger.info("Skipping alert sync: another worker holds the scheduler lease (pid=%d)", pid)
+            return
+        await asyncio.to_thread(run_alert_sync_once_sync, None, incremental)
     except asyncio.CancelledError:
         logger.info("run_alert_sync_once wrapper cancelled (pid=%d)", pid)
         print(f"[alert_updater pid={pid}] CancelledError caught — exiting wrapper gracefully.", flush=True)
@@ -180,23 +438,57 @@ async def run_alert_sync_once():
     logger.info("run_alert_sync_once wrapper completed (pid=%d)", pid)
     print(f"[alert_updater pid={pid}] Completed alert sync wrapper at {datetime.now().isoformat()}", flush=True)
 
+async def run_alert_retention_once():
+    pid = os.getpid()
+    try:
+        if not await asyncio.to_thread(scheduler_leader.acquire):
+            logger.info("Skipping alert retention: another worker holds the scheduler lease (pid=%d)", pid)
+            return
+        await asyncio.to_thread(run_alert_retention_once_sync)
+    except asyncio.CancelledError:
+        logger.info("run_alert_retention_once wrapper cancelled (pid=%d)", pid)
+    except Exception:
+        logger.exception("Unhandled exception in run_alert_retention_once wrapper")
+
+# A worker that lost the lease missed the passes of the other leader, which consumed
+# the contract changes its wheel would need
+scheduler_leader.on_change(expiry_wheel.clear)
+
 scheduler = AsyncIOScheduler()
 
 def start_scheduler():
+    full_hours = ALERT_SYNC_CONFIG["full_interval_hours"]
+    incremental_minutes = ALERT_SYNC_CONFIG["incremental_interval_minutes"]
     scheduler.add_job(
         run_alert_sync_once,
-        trigger=IntervalTrigger(hours=24),
+        trigger=IntervalTrigger(hours=full_hours),
         next_run_time=datetime.now(),
         max_instances=1
     )
+    scheduler.add_job(
+        run_alert_sync_once,
+        trigger=IntervalTrigger(minutes=incremental_minutes),
+        kwargs={"incremental": True},
+        max_instances=1,
+        coalesce=True
+    )
+    scheduler.add_job(
+        run_alert_retention_once,
+        trigger=IntervalTrigger(hours=ALERT_RETENTION_CONFIG["interval_hours"]),
+        max_instances=1,
+        coalesce=True
+    )
     scheduler.start()
-    logger.info("Alert updater scheduler started (every 24 hours).")
-    print("[alert_updater] Scheduler started (every 24 hours).", flush=True)
+    logger.info("Alert updater scheduler started (full every %d hours, incremental every %d minutes).",
+                full_hours, incremental_minutes)
+    print(f"[alert_updater] Scheduler started (full every {full_hours} hours, "
+          f"incremental every {incremental_minutes} minutes).", flush=True)
 
 def stop_scheduler():
     asyncio.create_task(_stop_scheduler_async())
 
 async def _stop_scheduler_async():
     scheduler.shutdown(wait=False)
+    await asyncio.to_thread(scheduler_leader.release)
     logger.info("Alert updater scheduler stopped (forceful).")
     print("[alert_updater] Scheduler stopped (forceful).", flush=True)
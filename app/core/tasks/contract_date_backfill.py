@@ -0,0 +1,83 @@
+"""Fill the DATETIME shadow columns added by data/sql/migrate_contracts_typed_dates.sql.
+
+Run between the two migration steps:
+
+    python -m app.core.tasks.contract_date_backfill
+
+Rows are converted in `index` ranges of CONTRACT_DATE_BACKFILL_CONFIG['chunk_size'],
+one transaction per range, with STR_TO_DATE for the known text formats. Values
+none of those formats match are then parsed in Python with `parse_date_safe`.
+Re-running the backfill is safe.
+"""
+from sqlalchemy import text
+from app.core.config import logger, CONTRACT_DATE_BACKFILL_CONFIG
+from app.core.tasks.alert_updater import parse_date_safe
+from app.db.base import engine
+
+DATE_COLUMNS = ('EFFET_CONTRAT', 'DATE_EXPIRATION', 'PROCHAIN_TERME')
+TYPED_SUFFIX = '_dt'
+
+def str_to_date_sql(column):
+    """MySQL expression converting a text date column, NULL when no known format matches"""
+    return (
+        "CASE "
+        f"WHEN {column} REGEXP '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}[ T][0-9]{{2}}:[0-9]{{2}}:[0-9]{{2}}' "
+        f"THEN STR_TO_DATE(LEFT(REPLACE({column}, 'T', ' '), 19), '%Y-%m-%d %H:%i:%s') "
+        f"WHEN {column} REGEXP '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}$' THEN STR_TO_DATE({column}, '%Y-%m-%d') "
+        f"WHEN {column} REGEXP '^[0-9]{{2}}/[0-9]{{2}}/[0-9]{{4}}$' THEN STR_TO_DATE({column}, '%d/%m/%Y') "
+        f"WHEN {column} REGEXP '^[0-9]{{2}}-[0-9]{{2}}-[0-9]{{4}}$' THEN STR_TO_DATE({column}, '%d-%m-%Y') "
+        "END"
+    )
+
+def _convert_ranges(chunk_size):
+    with engine.connect() as conn:
+        low, high = conn.execute(text("SELECT MIN(`index`), MAX(`index`) FROM contracts")).one()
+    if low is None:
+        return 0
+
+    assignments = ", ".join(f"{column}{TYPED_SUFFIX} = {str_to_date_sql(column)}" for column in DATE_COLUMNS)
+    statement = text(f"UPDATE contracts SET {assignments} WHERE `index` BETWEEN :start AND :end")
+
+    rows = 0
+    for start in range(low, high + 1, chunk_size):
+        end = start + chunk_size - 1
+        with engine.begin() as conn:
+            rows += conn.execute(statement, {"start": start, "end": end}).rowcount
+        logger.info(f"Converted contract dates for index {start}-{min(end, high)} of {high}")
+    return rows
+
+def _convert_unmatched(column, chunk_size):
+    """Parse in Python the values the SQL formats did not cover; returns (converted, unparseable)"""
+    typed = f"{column}{TYPED_SUFFIX}"
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            f"SELECT `index`, {column} FROM contracts "
+            f"WHERE {typed} IS NULL AND {column} IS NOT NULL AND TRIM({column}) != ''"
+        )).all()
+
+    parsed = [(index, parse_date_safe(value)) for index, value in rows]
+    updates = [{"index": index, "value": value} for index, value in parsed if value is not None]
+    statement = text(f"UPDATE contracts SET {typed} = :value WHERE `index` = :index")
+    for start in range(0, len(updates), chunk_size):
+        with engine.begin() as conn:
+            conn.execute(statement, updates[start:start + chunk_size])
+
+    unparseable = len(rows) - len(updates)
+    if unparseable:
+        samples = [value for (index, value), (_, result) in zip(rows, parsed) if result is None][:10]
+        logger.warning(f"{unparseable} {column} values could not be parsed (sample: {samples})")
+    return len(updates), unparseable
+
+def backfill_contract_dates(chunk_size=CONTRACT_DATE_BACKFILL_CONFIG['chunk_size']):
+    """Convert every contract's text dates into the typed shadow columns"""
+    logger.info("Starting contract date backfill...")
+    summary = {"rows": _convert_ranges(chunk_size), "parsed_in_python": 0, "unparseable": 0}
+    for column in DATE_COLUMNS:
+        converted, unparseable = _convert_unmatched(column, chunk_size)
+        summary["parsed_in_python"] += converted
+        summary["unparseable"] += unparseable
+    logger.info(f"Contract date backfill finished: {summary}")
+    return summary
+
+if __name__ == "__main__":
+    backfill_contract_dates()
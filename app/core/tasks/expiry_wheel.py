@@ -0,0 +1,142 @@
+"""In-process timing wheel of contract alert thresholds.
+
+Each contract has at most one pending entry in a heap ordered by day: the
+next day the contract comes within one of the
+ALERT_SYNC_CONFIG['expiry_thresholds'] days of expiring, then the day it
+leaves the window by expiring. Payment terms are not scheduled: the alerts
+table holds one expiry alert per client and has nowhere to put them.
+
+`advance(today)` pops only the entries that are due, so the daily work is
+proportional to the thresholds crossed rather than to the portfolio size.
+A fired expiry entry is rescheduled at the contract's next threshold.
+`reschedule` replaces the entries of changed contracts; the superseded heap
+entries are recognised by their version and skipped when popped.
+
+Only the contracts expiring before `horizon` are held: the day after the
+largest threshold from the last day processed. As the days go by, `extend`
+takes in the contracts the window reaches, so the wheel stays the size of
+the expiry window rather than of every future contract.
+"""
+import heapq
+import threading
+from collections import namedtuple
+from datetime import time, timedelta
+
+from app.core.config import ALERT_SYNC_CONFIG
+
+EXPIRY = "expiry"
+
+# (index, REF_PERSONNE, DATE_EXPIRATION)
+WheelContract = namedtuple("WheelContract", ["index", "ref_personne", "expiration"])
+ThresholdEvent = namedtuple("ThresholdEvent", ["kind", "contract_index", "ref_personne", "due", "days_before"])
+
+def _leaving_day(expiration):
+    """First day on which the contract is no longer in the expiry window"""
+    if expiration.time() == time.min:
+        return expiration.date()
+    return expiration.date() + timedelta(days=1)
+
+class ExpiryWheel:
+    def __init__(self, thresholds=tuple(ALERT_SYNC_CONFIG['expiry_thresholds'])):
+        self.thresholds = sorted(thresholds, reverse=True)
+        self.day = None
+        self.horizon = None
+        self._heap = []
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self.day is not None
+
+    def __len__(self):
+        return len(self._heap)
+
+    def horizon_for(self, day):
+        """First day whose contracts can cross no threshold up to `day`"""
+        return day + timedelta(days=self.thresholds[0] + 1)
+
+    def _next_expiry(self, expiration, after_day):
+        """(due day, threshold days) of the first expiry threshold after `after_day`"""
+        for days in self.thresholds:
+            due = expiration.date() - timedelta(days=days)
+            if due > after_day:
+                return due, days
+        due = _leaving_day(expiration)
+        return (due, 0) if due > after_day else (None, None)
+
+    def _entries(self, contract, after_day, version):
+        entries = []
+        if contract.expiration is not None:
+            due, days = self._next_expiry(contract.expiration, after_day)
+            if due is not None:
+                entries.append((due, contract.index, EXPIRY, version, days, contract.ref_personne, contract.expiration))
+        return entries
+
+    def load(self, contracts, after_day):
+        """Schedule the thresholds falling after `after_day`, replacing the wheel.
+
+        `contracts` are the ones expiring after `after_day` and before
+        `horizon_for(after_day)`.
+        """
+        with self._lock:
+            self._versions = {}
+            heap = []
+            for contract in contracts:
+                contract = WheelContract(*contract)
+                self._versions[contract.index] = 0
+                heap.extend(self._entries(contract, after_day, 0))
+            heapq.heapify(heap)
+            self._heap = heap
+            self.day = after_day
+            self.horizon = self.horizon_for(after_day)
+
+    def extend(self, contracts, horizon):
+        """Schedule the contracts expiring from the current horizon up to `horizon`.
+
+        Contracts already scheduled by `reschedule` are skipped.
+        """
+        with self._lock:
+            for contract in contracts:
+                contract = WheelContract(*contract)
+                if contract.index in self._versions:
+                    continue
+                self._versions[contract.index] = 0
+                for entry in self._entries(contract, self.day, 0):
+                    heapq.heappush(self._heap, entry)
+            self.horizon = max(self.horizon, horizon)
+
+    def reschedule(self, contracts):
+        """Replace the pending entries of inserted or changed contracts"""
+        with self._lock:
+            for contract in contracts:
+                contract = WheelContract(*contract)
+                version = self._versions.get(contract.index, -1) + 1
+                self._versions[contract.index] = version
+                for entry in self._entries(contract, self.day, version):
+                    heapq.heappush(self._heap, entry)
+
+    def advance(self, today):
+        """Pop the entries due up to `today`, reschedule their next threshold, return the events"""
+        with self._lock:
+            events = []
+            while self._heap and self._heap[0][0] <= today:
+                due, index, kind, version, days, ref, anchor = heapq.heappop(self._heap)
+                if self._versions.get(index) != version:
+                    continue
+                events.append(ThresholdEvent(kind, index, ref, due, days))
+                next_due, next_days = self._next_expiry(anchor, today)
+                if next_due is not None:
+                    heapq.heappush(self._heap, (next_due, index, kind, version, next_days, ref, anchor))
+            self.day = max(self.day, today)
+            return events
+
+    def clear(self):
+        """Forget the schedule; the next pass reloads it from the database"""
+        with self._lock:
+            self._heap = []
+            self._versions = {}
+            self.day = None
+            self.horizon = None
+
+expiry_wheel = ExpiryWheel()
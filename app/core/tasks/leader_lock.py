@@ -0,0 +1,145 @@
+"""Lease deciding which API worker runs the scheduled alert jobs.
+
+Every uvicorn/gunicorn worker starts the scheduler, but a job only runs in the
+worker holding the lease; the others skip their tick. The lease is never
+renewed explicitly: it lives as long as the holder's MySQL connection
+(`GET_LOCK`) or open file (`flock`), so when that worker dies the database or
+the kernel releases it and the next worker to tick takes over.
+"""
+import os
+import threading
+from sqlalchemy import text
+
+from app.core.config import logger, SCHEDULER_LEADER_CONFIG
+from app.db.base import engine
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+class LeaderLock:
+    def __init__(self, name=SCHEDULER_LEADER_CONFIG['lock_name'],
+                 directory=SCHEDULER_LEADER_CONFIG['lock_directory'], bind=engine):
+        self.name = name
+        self.directory = directory
+        self.bind = bind
+        self._connection = None
+        self._file = None
+        self._lock = threading.Lock()
+        self._change_hooks = []
+
+    @property
+    def held(self):
+        return self._connection is not None or self._file is not None
+
+    def on_change(self, hook):
+        """Register a callback run whenever this process takes or loses the lease.
+
+        State built while leading (e.g. the expiry wheel) is stale once another
+        worker has led in between, so holders reset it here.
+        """
+        self._change_hooks.append(hook)
+
+    def _changed(self):
+        for hook in self._change_hooks:
+            try:
+                hook()
+            except Exception as e:
+                logger.error(f"Scheduler lease hook failed: {e}")
+
+    def acquire(self):
+        """True if this process holds the lease, taking it when it is free"""
+        with self._lock:
+            try:
+                if self.bind.dialect.name == "mysql":
+                    return self._acquire_mysql()
+                return self._acquire_file()
+            except Exception as e:
+                logger.warning(f"Could not check scheduler lease {self.name}: {e}")
+                self._drop()
+                return False
+
+    def _acquire_mysql(self):
+        if self._connection is not None:
+            # The lease is gone if the server dropped our connection
+            owned = self._connection.execute(
+                text("SELECT IS_USED_LOCK(:name) = CONNECTION_ID()"), {"name": self.name}
+            ).scalar()
+            if owned:
+                return True
+            logger.warning(f"Lost scheduler lease {self.name}")
+            self._drop()
+
+        connection = self.bind.connect()
+        try:
+            acquired = connection.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": self.name}).scalar()
+            # GET_LOCK is not transactional; end the implicit transaction so the connection stays idle
+            connection.commit()
+        except Exception:
+            # The lock may have been granted: never hand this session back to the pool
+            connection.invalidate()
+            connection.close()
+            raise
+        if acquired != 1:
+            connection.close()
+            return False
+        self._connection = connection
+        logger.info(f"Acquired scheduler lease {self.name} (pid={os.getpid()})")
+        self._changed()
+        return True
+
+    def _acquire_file(self):
+        if self._file is not None:
+            return True
+        if fcntl is None:
+            # No way to coordinate workers here: behave as the single worker
+            return True
+        os.makedirs(self.directory, exist_ok=True)
+        lock_file = open(os.path.join(self.directory, f"{self.name}.lock"), "a+")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._file = lock_file
+        logger.info(f"Acquired scheduler lease {self.name} (pid={os.getpid()})")
+        self._changed()
+        return True
+
+    def _drop(self):
+        was_held = self.held
+        if self._connection is not None:
+            try:
+                # Discard the DBAPI connection instead of pooling it: if it is
+                # still alive and holds GET_LOCK, closing it frees the lock
+                self._connection.invalidate()
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+            self._file = None
+        if was_held:
+            self._changed()
+
+    def release(self):
+        with self._lock:
+            if self._connection is not None:
+                try:
+                    self._connection.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": self.name})
+                except Exception:
+                    pass
+            if self.held:
+                logger.info(f"Released scheduler lease {self.name} (pid={os.getpid()})")
+            self._drop()
+
+scheduler_leader = LeaderLock()
@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import FastAPI
 from app.db.base import Base, engine
 from app.api.routes import client as client_router
@@ -10,7 +11,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes.email import router as email_router
 from app.api.routes.whatsapp import router as whatsapp_router
 from app.api.routes.contracts import router as contracts_router
+from app.api.routes import jobs as jobs_router
+from app.services.job_manager import job_manager
+from app.services.realtime_recommender import realtime_recommender
 from app.core.tasks.alert_updater import start_scheduler, stop_scheduler
+from app.core.config import logger
 
 Base.metadata.create_all(bind=engine)
 
@@ -35,11 +40,20 @@ app.include_router(email_router, prefix="/email", tags=["Email"])
 app.include_router(whatsapp_router, prefix="/whatsapp", tags=["WhatsApp"])
 app.include_router(alerts_router.router,prefix="/alerts",tags=["alerts"])
 app.include_router(contracts_router, prefix="/contracts", tags=["contracts"])
+app.include_router(jobs_router.router, prefix="/jobs", tags=["jobs"])
 
 @app.on_event("startup")
 async def on_startup():
     start_scheduler()
+    asyncio.create_task(_warm_realtime_indexes())
+
+async def _warm_realtime_indexes():
+    try:
+        await asyncio.to_thread(realtime_recommender.ensure_warm)
+    except Exception as e:
+        logger.warning(f"Realtime recommendation indexes not warmed: {e}")
 
 @app.on_event("shutdown")
 async def on_shutdown():
-    stop_scheduler()
\ No newline at end of file
+    stop_scheduler()
+    job_manager.shutdown()
\ No newline at end of file
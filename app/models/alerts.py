@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from datetime import date
+from sqlalchemy import Column, Integer, String, DateTime, Index
 from app.db.base import Base
 
 class Alert(Base):
@@ -10,4 +11,33 @@ class Alert(Base):
     alert_severity = Column(String(50), nullable=False)  
     product = Column(String(500), nullable=True)
     expiration_date = Column(DateTime, nullable=True)
-    days_until_expiry = Column(Integer, nullable=True)
\ No newline at end of file
+
+    # keyset pages of the listing, unfiltered and per filter; see data/sql/migrate_alerts_listing_indexes.sql
+    __table_args__ = (
+        Index("ix_alerts_expiration_ref", "expiration_date", "REF_PERSONNE"),
+        Index("ix_alerts_severity_expiration_ref", "alert_severity", "expiration_date", "REF_PERSONNE"),
+        Index("ix_alerts_type_expiration_ref", "alert_type", "expiration_date", "REF_PERSONNE"),
+        Index("ix_alerts_product_expiration_ref", "product", "expiration_date", "REF_PERSONNE"),
+    )
+
+    # derived on read so it never goes stale between syncs; see data/sql/migrate_alert_sync_watermarks.sql
+    @property
+    def days_until_expiry(self):
+        if self.expiration_date is None:
+            return None
+        return (self.expiration_date.date() - date.today()).days
+
+
+class AlertArchive(Base):
+    """Alerts removed from the hot table by the retention job, kept for audit"""
+    __tablename__ = "alerts_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    REF_PERSONNE = Column(Integer, nullable=False, index=True)
+    alert_type = Column(String(255), nullable=False)
+    alert_message = Column(String(500), nullable=False)
+    alert_severity = Column(String(50), nullable=False)
+    product = Column(String(500), nullable=True)
+    expiration_date = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, nullable=False)
+    archive_reason = Column(String(50), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DECIMAL
+from sqlalchemy import Column, Integer, String, DECIMAL, Computed, Index
 from sqlalchemy.dialects.mysql import JSON
 from app.db.base import Base
 
@@ -10,6 +10,8 @@ class BusinessRec(Base):
     recommended_products = Column(JSON, nullable=True)
     recommendation_count = Column(Integer, nullable=True)
     client_score = Column(DECIMAL(30, 20), nullable=True)
+    # nulls-last score for index-ordered listings; see data/sql/migrate_recommendations_sort_key.sql
+    sort_key = Column(DECIMAL(30, 20), Computed("COALESCE(client_score, -1)", persisted=True))
     client_segment = Column(String(255), nullable=True)
     risk_profile = Column(String(255), nullable=True)
     estimated_budget = Column(DECIMAL(30, 20), nullable=True)
@@ -19,3 +21,13 @@ class BusinessRec(Base):
     total_capital_assured = Column(DECIMAL(30, 20), nullable=True)
     total_premiums_paid = Column(DECIMAL(30, 20), nullable=True)
     client_type = Column(String(255), nullable=True)
+
+    __table_args__ = (
+        Index("ix_business_rec_segment_risk_sort", "client_segment", "risk_profile", "sort_key", "REF_PERSONNE"),
+        Index("ix_business_rec_risk_sort", "risk_profile", "sort_key", "REF_PERSONNE"),
+        Index("ix_business_rec_segment_sort", "client_segment", "sort_key", "REF_PERSONNE"),
+        Index("ix_business_rec_sort", "sort_key", "REF_PERSONNE"),
+        Index("ix_business_rec_segment_risk_ref", "client_segment", "risk_profile", "REF_PERSONNE"),
+        Index("ix_business_rec_risk_ref", "risk_profile", "REF_PERSONNE"),
+        Index("ix_business_rec_segment_ref", "client_segment", "REF_PERSONNE"),
+    )
@@ -1,6 +1,24 @@
-from sqlalchemy import Column, BigInteger, Text, Float
+from sqlalchemy import Column, BigInteger, Text, Float, DateTime, TIMESTAMP, Index
+from sqlalchemy.dialects import mysql
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
 from app.db.base import Base
 
+class precise_now(FunctionElement):
+    """CURRENT_TIMESTAMP, to the microsecond on MySQL where a TIMESTAMP(6) default must match"""
+    type = TIMESTAMP()
+    inherit_cache = True
+
+@compiles(precise_now)
+def _precise_now(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+@compiles(precise_now, "mysql")
+def _precise_now_mysql(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP(6)"
+
+PRECISE_TIMESTAMP = TIMESTAMP().with_variant(mysql.TIMESTAMP(fsp=6), "mysql")
+
 class Contract(Base):
     __tablename__ = "contracts"
 
@@ -8,31 +26,25 @@ class Contract(Base):
     REF_PERSONNE = Column(BigInteger, nullable=True)
     NUM_CONTRAT = Column(BigInteger, nullable=True)
     LIB_PRODUIT = Column(Text, nullable=True)
-    EFFET_CONTRAT = Column(Text, nullable=True)
-    DATE_EXPIRATION = Column(Text, nullable=True)  # stored as text in DB
-    PROCHAIN_TERME = Column(Text, nullable=True)
+    EFFET_CONTRAT = Column(DateTime, nullable=True)
+    DATE_EXPIRATION = Column(DateTime, nullable=True)  # see data/sql/migrate_contracts_typed_dates.sql
+    PROCHAIN_TERME = Column(DateTime, nullable=True)
     LIB_ETAT_CONTRAT = Column(Text, nullable=True)
     branche = Column(Text, nullable=True)
     somme_quittances = Column(Float, nullable=True)
     statut_paiement = Column(Text, nullable=True)
     Capital_assure = Column(Float, nullable=True)
+    # maintained by MySQL (ON UPDATE CURRENT_TIMESTAMP(6)), drives the incremental alert sync and
+    # the contract ETag; see data/sql/migrate_table_versions.sql for the microsecond precision
+    updated_at = Column(PRECISE_TIMESTAMP, server_default=precise_now(), onupdate=precise_now())
+
+    __table_args__ = (
+        Index("ix_contracts_date_expiration", "DATE_EXPIRATION"),
+        Index("ix_contracts_ref_date_expiration", "REF_PERSONNE", "DATE_EXPIRATION"),
+        Index("ix_contracts_updated_at", "updated_at"),
+    )
 
-    # convenience property (not persisted) - parse DATE_EXPIRATION to datetime when possible
+    # kept for callers written when the dates were text; the column is typed now
     @property
     def expiration_as_datetime(self):
-        from datetime import datetime
-        from dateutil import parser as _parser
-
-        if not self.DATE_EXPIRATION:
-            return None
-
-        try:
-            return _parser.parse(self.DATE_EXPIRATION)
-        except Exception:
-            # fallback attempts
-            for fmt in ("%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%d/%m/%Y", "%d-%m-%Y"):
-                try:
-                    return datetime.strptime(self.DATE_EXPIRATION, fmt)
-                except Exception:
-                    continue
-        return None
\ No newline at end of file
+        return self.DATE_EXPIRATION
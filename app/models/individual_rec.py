@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DECIMAL, Text
+from sqlalchemy import Column, Integer, String, DECIMAL, Computed, Index, Text
 from sqlalchemy.dialects.mysql import JSON
 from app.db.base import Base
 
@@ -14,6 +14,8 @@ class IndividualRec(Base):
     recommended_products = Column(JSON, nullable=True)
     recommendation_count = Column(Integer, nullable=True)
     client_score = Column(DECIMAL(30, 20), nullable=True)
+    # nulls-last score for index-ordered listings; see data/sql/migrate_recommendations_sort_key.sql
+    sort_key = Column(DECIMAL(30, 20), Computed("COALESCE(client_score, -1)", persisted=True))
     client_segment = Column(String(255), nullable=True)
     risk_profile = Column(String(255), nullable=True)
     estimated_budget = Column(DECIMAL(30, 20), nullable=True)
@@ -23,6 +25,16 @@ class IndividualRec(Base):
     SECTEUR_ACTIVITE_GROUP = Column(Text, nullable=True)
     client_type = Column(Text, nullable=True)
 
+    __table_args__ = (
+        Index("ix_individual_rec_segment_risk_sort", "client_segment", "risk_profile", "sort_key", "REF_PERSONNE"),
+        Index("ix_individual_rec_risk_sort", "risk_profile", "sort_key", "REF_PERSONNE"),
+        Index("ix_individual_rec_segment_sort", "client_segment", "sort_key", "REF_PERSONNE"),
+        Index("ix_individual_rec_sort", "sort_key", "REF_PERSONNE"),
+        Index("ix_individual_rec_segment_risk_ref", "client_segment", "risk_profile", "REF_PERSONNE"),
+        Index("ix_individual_rec_risk_ref", "risk_profile", "REF_PERSONNE"),
+        Index("ix_individual_rec_segment_ref", "client_segment", "REF_PERSONNE"),
+    )
+
 
     def __repr__(self) -> str: # pragma: no cover - small convenience helper
         return f"<IndividualRec REF_PERSONNE={self.REF_PERSONNE} NOM_PRENOM={self.NOM_PRENOM!r}>"
\ No newline at end of file
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, String
+from app.db.base import Base
+
+class ProductCatalogEntry(Base):
+    """Id of a product name in stored recommended_products (app/services/product_catalog.py)"""
+    __tablename__ = "product_catalog"
+
+    product_id = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String(255), nullable=False, unique=True)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, DateTime, TIMESTAMP, func
+from sqlalchemy.dialects import mysql
+from app.db.base import Base
+
+class SyncWatermark(Base):
+    """High-water mark of an incremental job, one row per job and source"""
+    __tablename__ = "sync_watermarks"
+
+    name = Column(String(64), primary_key=True)
+    # microseconds, like the contracts.updated_at it records
+    value = Column(DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql"), nullable=True)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, String, BigInteger, event, text
+from app.db.base import Base
+
+# Tables whose listings are served with ETags and cached responses. They are
+# also loaded by SQL run outside the API, which bumps no data version, so a
+# trigger per operation counts every row written; see data/sql/migrate_table_versions.sql
+TRACKED_TABLES = ("contracts", "history", "individual_recommendations", "business_recommendations")
+OPERATIONS = ("INSERT", "UPDATE", "DELETE")
+
+class TableVersion(Base):
+    """Write counter of a tracked table, moved by its triggers only"""
+    __tablename__ = "table_versions"
+
+    name = Column(String(64), primary_key=True)
+    version = Column(BigInteger, nullable=False, server_default="0")
+
+def _trigger_ddl(dialect, table, operation):
+    name = f"{table}_{operation.lower()}_version"
+    bump = f"UPDATE table_versions SET version = version + 1 WHERE name = '{table}'"
+    if dialect == "mysql":
+        return f"CREATE TRIGGER {name} AFTER {operation} ON {table} FOR EACH ROW {bump}"
+    return f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {operation} ON {table} FOR EACH ROW BEGIN {bump}; END"
+
+@event.listens_for(Base.metadata, "after_create")
+def _install_triggers(metadata, connection, **kw):
+    """Seed the counters and add the triggers of the tables create_all has just created"""
+    dialect = connection.dialect.name
+    if dialect not in ("mysql", "sqlite"):
+        return
+    created = {table.name for table in kw.get("tables", ())}
+    if TableVersion.__tablename__ in created:
+        insert = "INSERT IGNORE" if dialect == "mysql" else "INSERT OR IGNORE"
+        for table in TRACKED_TABLES:
+            connection.execute(text(f"{insert} INTO table_versions (name, version) VALUES (:name, 0)"), {"name": table})
+    for table in TRACKED_TABLES:
+        if table in created:
+            for operation in OPERATIONS:
+                connection.execute(text(_trigger_ddl(dialect, table, operation)))
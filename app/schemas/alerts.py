@@ -11,13 +11,13 @@ class AlertBase(BaseModel):
     alert_severity: str
     product: Optional[str] = None
     expiration_date: Optional[datetime] = None
-    days_until_expiry: Optional[int] = None
 
 class AlertCreate(AlertBase):
     pass
 
 class AlertOut(AlertBase):
-    pass
+    # computed from expiration_date when the alert is read
+    days_until_expiry: Optional[int] = None
 
 class AlertUpdate(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -27,11 +27,12 @@ class AlertUpdate(BaseModel):
     alert_severity: Optional[str] = None
     product: Optional[str] = None
     expiration_date: Optional[datetime] = None
-    days_until_expiry: Optional[int] = None
 
 class PaginatedAlertOut(BaseModel):
     items: list[AlertOut]
     total: Optional[int] = None
     limit: int
     offset: int
-    has_more: bool
\ No newline at end of file
+    has_more: bool
+    # pass as `cursor` to get the next page by keyset instead of offset
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -7,9 +7,9 @@ class ContractOut(BaseModel):
     REF_PERSONNE: Optional[int]
     NUM_CONTRAT: Optional[int]
     LIB_PRODUIT: Optional[str]
-    EFFET_CONTRAT: Optional[str]
-    DATE_EXPIRATION: Optional[str]
-    PROCHAIN_TERME: Optional[str]
+    EFFET_CONTRAT: Optional[datetime]
+    DATE_EXPIRATION: Optional[datetime]
+    PROCHAIN_TERME: Optional[datetime]
     LIB_ETAT_CONTRAT: Optional[str]
     branche: Optional[str]
     somme_quittances: Optional[float]
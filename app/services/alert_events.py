@@ -0,0 +1,103 @@
+import asyncio
+import threading
+from collections import deque
+from app.core.config import logger, ALERT_EVENTS_CONFIG
+from app.schemas.alerts import AlertOut
+
+CREATED = 'created'
+UPDATED = 'updated'
+UPSERTED = 'upserted'
+DELETED = 'deleted'
+# Sent instead of deltas when a subscriber may have missed changes: reload the list
+REFRESH = 'refresh'
+
+class AlertSubscriber:
+    def __init__(self, loop, severity=None, alert_type=None, product=None, queue_size=ALERT_EVENTS_CONFIG['queue_size']):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.filters = {'alert_severity': severity, 'alert_type': alert_type, 'product': product}
+        self.overflowed = False
+
+    def matches(self, alert):
+        # Deletions published by reference only reach every subscriber
+        for field, accepted in self.filters.items():
+            if accepted and field in alert and alert[field] not in accepted:
+                return False
+        return True
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+class AlertBroadcaster:
+    """In-process fan-out of alert changes to the open event streams.
+
+    Publishers (the alert routes, the sync and retention jobs) may run in any
+    thread; every event is handed to each matching subscriber's queue on that
+    subscriber's event loop. A subscriber that falls behind by more than its
+    queue size is marked overflowed and gets a refresh instead of the deltas.
+    Changes made by other worker processes are not seen here; the stream
+    detects them through the 'alerts' data version: every version whose
+    changes were published in this process is recorded, and a version missing
+    from that record means another worker wrote.
+    """
+
+    def __init__(self, history_size=ALERT_EVENTS_CONFIG['queue_size']):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._published_versions = deque(maxlen=history_size)
+
+    @property
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    def subscribe(self, **filters):
+        subscriber = AlertSubscriber(asyncio.get_running_loop(), **filters)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def mark_published(self, version):
+        """Record that the changes of 'alerts' data `version` were published here"""
+        with self._lock:
+            self._published_versions.append(version)
+
+    def published_all(self, since, until):
+        """True if every version after `since` up to `until` was published in this process"""
+        if until < since or until - since > self._published_versions.maxlen:
+            return False
+        with self._lock:
+            published = set(self._published_versions)
+        return all(version in published for version in range(since + 1, until + 1))
+
+    def publish(self, kind, alert=None, version=None):
+        """Send one change; `alert` is an Alert row, a dict of its fields or None.
+
+        `version` is the 'alerts' data version the change was committed as, if
+        this event is all of it.
+        """
+        if version is not None:
+            self.mark_published(version)
+        if not self._subscribers:
+            return
+        if alert is not None and not isinstance(alert, dict):
+            alert = AlertOut.model_validate(alert).model_dump(mode="json")
+        event = {'event': kind, 'alert': alert}
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            if alert is None or subscriber.matches(alert):
+                try:
+                    subscriber.loop.call_soon_threadsafe(subscriber._put, event)
+                except RuntimeError:
+                    # The subscriber's loop is closed; its stream is gone
+                    logger.debug("Dropping alert event for a closed stream")
+                    self.unsubscribe(subscriber)
+
+alert_events = AlertBroadcaster()
@@ -0,0 +1,84 @@
+import threading
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import case, func
+from app.core.config import ALERT_SYNC_CONFIG
+from app.models.alerts import Alert
+from app.services.data_version import data_versions, ALERTS
+
+NO_DATE = 'no_date'
+EXPIRED = 'expired'
+
+def expiry_buckets(thresholds=tuple(ALERT_SYNC_CONFIG['expiry_thresholds'])):
+    """(label, last day) of each days_until_expiry bucket, e.g. ('8-15', 15)"""
+    buckets = []
+    first = 0
+    for days in sorted(thresholds):
+        buckets.append((f"{first}-{days}", days))
+        first = days + 1
+    return buckets
+
+class AlertStats:
+    """Alert counts by severity, type, product and expiry bucket, cached per data version.
+
+    The alerts table is aggregated once into cells keyed by (severity, type,
+    product, expiry bucket). The cells are rebuilt only after an alert write
+    bumps the 'alerts' data version, or when the day changes, since the expiry
+    buckets depend on the date. Between writes the summary and the filtered
+    totals of the listing are served from memory.
+    """
+
+    def __init__(self):
+        self._key = None
+        self._cells = {}
+        self._summary = None
+        self._lock = threading.Lock()
+
+    def _bucket_expression(self, today):
+        day_start = datetime.combine(today, time.min)
+        whens = [(Alert.expiration_date.is_(None), NO_DATE), (Alert.expiration_date < day_start, EXPIRED)]
+        for label, last_day in expiry_buckets():
+            whens.append((Alert.expiration_date < day_start + timedelta(days=last_day + 1), label))
+        return case(*whens, else_=f"over_{expiry_buckets()[-1][1]}")
+
+    def _refresh(self, db):
+        # Version first: a write landing during the aggregation triggers another refresh
+        key = (data_versions.current(ALERTS), date.today())
+        if key == self._key:
+            return
+        bucket = self._bucket_expression(key[1]).label("bucket")
+        rows = (
+            db.query(Alert.alert_severity, Alert.alert_type, Alert.product, bucket, func.count())
+            .group_by(Alert.alert_severity, Alert.alert_type, Alert.product, bucket)
+            .all()
+        )
+        cells = {(severity, alert_type, product, expiry): count for severity, alert_type, product, expiry, count in rows}
+
+        summary = {"by_severity": {}, "by_type": {}, "by_product": {}, "by_expiry": {}, "total": 0}
+        for (severity, alert_type, product, expiry), count in cells.items():
+            for name, value in (("by_severity", severity), ("by_type", alert_type),
+                                ("by_product", product), ("by_expiry", expiry)):
+                summary[name][value] = summary[name].get(value, 0) + count
+            summary["total"] += count
+        summary["version"] = key[0]
+
+        self._cells = cells
+        self._summary = summary
+        self._key = key
+
+    def summary(self, db):
+        with self._lock:
+            self._refresh(db)
+            return self._summary
+
+    def count(self, db, severity=None, alert_type=None, product=None):
+        """Number of alerts matching the listing filters"""
+        with self._lock:
+            self._refresh(db)
+            return sum(
+                count for (cell_severity, cell_type, cell_product, _), count in self._cells.items()
+                if (not severity or cell_severity in severity)
+                and (not alert_type or cell_type in alert_type)
+                and (not product or cell_product in product)
+            )
+
+alert_stats = AlertStats()
@@ -1,17 +1,56 @@
+import time
+import pandas as pd
 from app.core.config import logger, ALERT_CONFIG
+from app.services.checkpoint_store import checkpoint_store
 
 class BatchProcessor:
-    def __init__(self, batch_size=10):
+    def __init__(self, batch_size=10, store=checkpoint_store):
         self.batch_size = batch_size
         self.current_batch = 0
         self.processed_clients = set()
         self.resume_mode = False
-    
-    def process_in_batches(self, df_scored, process_function, *args, **kwargs):
-        """Process clients in batches with resume capability"""
+        self.store = store
+        self.progress_callback = None
+        self.progress = {}
+
+    def _report_progress(self, run_name, total, batches_total, newly_processed, started_at):
+        """Update batch progress, throughput and ETA and forward it to `progress_callback`"""
+        elapsed = time.monotonic() - started_at
+        remaining = total - len(self.processed_clients)
+        throughput = newly_processed / elapsed if elapsed > 0 and newly_processed else 0.0
+        self.progress = {
+            'run_name': run_name,
+            'batches_done': self.current_batch,
+            'batches_total': batches_total,
+            'clients_done': len(self.processed_clients),
+            'clients_total': total,
+            'elapsed_seconds': round(elapsed, 1),
+            'throughput_per_second': round(throughput, 2),
+            'eta_seconds': round(remaining / throughput, 1) if throughput else None
+        }
+        if self.progress_callback is not None:
+            try:
+                self.progress_callback(dict(self.progress))
+            except Exception as e:
+                logger.warning(f"Progress callback failed: {e}")
+
+    def process_in_batches(self, df_scored, process_function, *args,
+                           run_name=None, run_config=None, run_writer=None, **kwargs):
+        """Process clients in batches with resume capability.
+
+        When `run_name` is given every finished batch is streamed to a checkpoint
+        part file instead of being kept in memory, a restarted run with the same
+        configuration skips the completed ranges, and the number of result rows
+        written for the run is returned.
+        """
+        if run_name is not None:
+            return self._process_checkpointed(
+                df_scored, process_function, run_name, run_config, run_writer, *args, **kwargs
+            )
+
         results = []
         total_clients = len(df_scored)
-        
+
         if self.resume_mode:
             df_to_process = df_scored[~df_scored['REF_PERSONNE'].isin(self.processed_clients)]
             logger.info(f"Resuming from {len(self.processed_clients)} processed clients. {len(df_to_process)} remaining.")
@@ -19,41 +58,82 @@ class BatchProcessor:
             df_to_process = df_scored
             self.processed_clients = set()
             self.current_batch = 0
-        
+
         total_to_process = len(df_to_process)
-        
+
         for start_idx in range(0, total_to_process, self.batch_size):
             end_idx = min(start_idx + self.batch_size, total_to_process)
             batch = df_to_process.iloc[start_idx:end_idx]
-            
+
             logger.info(f"Processing batch {self.current_batch + 1}: clients {start_idx + 1}-{end_idx} of {total_to_process}")
-            
+
             batch_results = process_function(batch, *args, **kwargs)
+            if isinstance(batch_results, pd.DataFrame):
+                batch_results = batch_results.to_dict('records')
             results.extend(batch_results)
-            
+
             self.processed_clients.update(batch['REF_PERSONNE'].tolist())
             self.current_batch += 1
-            
+
             logger.info(f"Completed batch {self.current_batch}. Total processed: {len(self.processed_clients)}")
-        
+
         self.resume_mode = False
-        
+
         return results
-    
+
+    def _process_checkpointed(self, df_scored, process_function, run_name, run_config, run_writer, *args, **kwargs):
+        """Process batches against a durable checkpoint manifest"""
+        total = len(df_scored)
+        config = dict(run_config or {})
+        config['batch_size'] = self.batch_size
+        config['total'] = total
+
+        self.store.open_run(run_name, config, total, writer=run_writer)
+        completed = self.store.completed_ranges(run_name)
+        self.resume_mode = bool(completed)
+        self.current_batch = 0
+        self.processed_clients = set()
+
+        batches_total = (total + self.batch_size - 1) // self.batch_size
+        newly_processed = 0
+        started_at = time.monotonic()
+        self._report_progress(run_name, total, batches_total, newly_processed, started_at)
+
+        for start_idx in range(0, total, self.batch_size):
+            end_idx = min(start_idx + self.batch_size, total)
+            batch = df_scored.iloc[start_idx:end_idx]
+
+            if (start_idx, end_idx) in completed:
+                logger.info(f"Skipping checkpointed batch: clients {start_idx + 1}-{end_idx} of {total}")
+            else:
+                logger.info(f"Processing batch {self.current_batch + 1}: clients {start_idx + 1}-{end_idx} of {total}")
+                batch_results = process_function(batch, *args, **kwargs)
+                self.store.write_part(run_name, start_idx, end_idx, batch_results)
+                newly_processed += len(batch)
+
+            self.processed_clients.update(batch['REF_PERSONNE'].tolist())
+            self.current_batch += 1
+            self._report_progress(run_name, total, batches_total, newly_processed, started_at)
+
+        logger.info(f"Run {run_name} complete: {self.current_batch} batches, {len(self.processed_clients)} clients")
+        return self.store.completed_rows(run_name)
+
     def get_remaining_clients(self, df_scored):
         """Get clients that haven't been processed yet"""
         return df_scored[~df_scored['REF_PERSONNE'].isin(self.processed_clients)]
-    
+
     def set_resume_mode(self, resume=True):
         """Set resume mode to continue from last processed batch"""
         self.resume_mode = resume
         logger.info(f"Resume mode set to: {resume}")
-    
-    def reset(self):
-        """Reset the batch processor"""
+
+    def reset(self, run_name=None):
+        """Reset the batch processor, optionally discarding a checkpointed run"""
         self.current_batch = 0
         self.processed_clients = set()
         self.resume_mode = False
+        if run_name is not None:
+            self.store.discard(run_name)
         logger.info("Batch processor reset")
 
-batch_processor = BatchProcessor(batch_size=ALERT_CONFIG['batch_size'])
\ No newline at end of file
+batch_processor = BatchProcessor(batch_size=ALERT_CONFIG['batch_size'])
@@ -0,0 +1,161 @@
+import os
+import json
+import uuid
+import shutil
+import hashlib
+from datetime import datetime
+import pandas as pd
+from app.core.config import logger, CHECKPOINT_CONFIG
+from app.services.recommendation_writer import RecommendationWriter
+
+class CheckpointStore:
+    """Durable per-batch part files plus a manifest describing completed ranges.
+
+    Layout: <directory>/<run_name>/manifest.json and one parquet part file per
+    completed batch under <directory>/<run_name>/parts, which can be read as a
+    parquet dataset while the run continues. Every write goes through a
+    temporary file and os.replace so a crash never leaves a half-written part
+    or manifest behind.
+    """
+
+    def __init__(self, directory=CHECKPOINT_CONFIG['directory']):
+        self.directory = directory
+        self.manifests = {}
+        self.writers = {}
+
+    def _run_dir(self, run_name):
+        return os.path.join(self.directory, run_name)
+
+    def parts_dir(self, run_name):
+        return os.path.join(self._run_dir(run_name), "parts")
+
+    def _writer(self, run_name):
+        return self.writers.get(run_name) or RecommendationWriter()
+
+    def _manifest_path(self, run_name):
+        return os.path.join(self._run_dir(run_name), "manifest.json")
+
+    @staticmethod
+    def compute_config_hash(config):
+        """Stable hash of the run configuration (JSON-serialisable dict)"""
+        payload = json.dumps(config, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _atomic_write_bytes(path, data):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _save_manifest(self, run_name, manifest):
+        manifest['updated_at'] = datetime.now().isoformat()
+        data = json.dumps(manifest, indent=2, default=str).encode("utf-8")
+        self._atomic_write_bytes(self._manifest_path(run_name), data)
+        self.manifests[run_name] = manifest
+
+    def load_manifest(self, run_name):
+        path = self._manifest_path(run_name)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable checkpoint manifest {path}: {e}")
+            return None
+
+    def open_run(self, run_name, config, total, writer=None):
+        """Resume the run if its manifest matches `config`, otherwise start a fresh one"""
+        if writer is not None:
+            self.writers[run_name] = writer
+        config_hash = self.compute_config_hash(config)
+        manifest = self.load_manifest(run_name)
+
+        if manifest and manifest.get('config_hash') == config_hash and manifest.get('status') == 'running':
+            logger.info(
+                f"Resuming run {manifest['run_id']} ({run_name}): "
+                f"{len(manifest['completed'])} batches already checkpointed"
+            )
+            self.manifests[run_name] = manifest
+            return manifest
+
+        if manifest:
+            logger.info(f"Discarding stale checkpoint for {run_name} (run {manifest.get('run_id')})")
+        self.discard(run_name)
+        os.makedirs(self.parts_dir(run_name), exist_ok=True)
+
+        manifest = {
+            'run_id': uuid.uuid4().hex,
+            'run_name': run_name,
+            'config_hash': config_hash,
+            'total': int(total),
+            'status': 'running',
+            'created_at': datetime.now().isoformat(),
+            'completed': []
+        }
+        self._save_manifest(run_name, manifest)
+        logger.info(f"Started run {manifest['run_id']} ({run_name}) for {total} clients")
+        return manifest
+
+    def completed_ranges(self, run_name):
+        manifest = self.manifests.get(run_name) or self.load_manifest(run_name) or {}
+        return {(entry['start'], entry['end']) for entry in manifest.get('completed', [])}
+
+    def write_part(self, run_name, start, end, records):
+        """Persist one finished batch and record its range in the manifest"""
+        manifest = self.manifests[run_name]
+        part_file = None
+
+        if len(records):
+            part_file = f"{CHECKPOINT_CONFIG['part_prefix']}-{start:09d}-{end:09d}.parquet"
+            self._writer(run_name).write_part(os.path.join(self.parts_dir(run_name), part_file), records)
+
+        manifest['completed'].append({
+            'start': int(start),
+            'end': int(end),
+            'part': part_file,
+            'rows': len(records)
+        })
+        self._save_manifest(run_name, manifest)
+
+    def part_paths(self, run_name):
+        manifest = self.manifests.get(run_name) or self.load_manifest(run_name) or {}
+        entries = sorted(manifest.get('completed', []), key=lambda entry: entry['start'])
+        return [
+            os.path.join(self.parts_dir(run_name), entry['part'])
+            for entry in entries if entry['part']
+        ]
+
+    def completed_rows(self, run_name):
+        manifest = self.manifests.get(run_name) or self.load_manifest(run_name) or {}
+        return sum(entry['rows'] for entry in manifest.get('completed', []))
+
+    def load_parts(self, run_name):
+        paths = self.part_paths(run_name)
+        if not paths:
+            return pd.DataFrame()
+        return pd.concat([pd.read_parquet(path) for path in paths], ignore_index=True)
+
+    def commit(self, run_name, output_path):
+        """Atomically publish all parts of a run as `output_path` and drop the checkpoint"""
+        manifest = self.manifests.get(run_name) or self.load_manifest(run_name)
+        if not manifest:
+            logger.warning(f"No checkpointed run to commit for {run_name}")
+            return False
+
+        rows = self._writer(run_name).merge_parts(self.part_paths(run_name), output_path)
+
+        logger.info(f"Committed run {manifest['run_id']} ({run_name}): {rows} rows to {output_path}")
+        self.discard(run_name)
+        return True
+
+    def discard(self, run_name):
+        self.manifests.pop(run_name, None)
+        run_dir = self._run_dir(run_name)
+        if os.path.exists(run_dir):
+            shutil.rmtree(run_dir, ignore_errors=True)
+
+checkpoint_store = CheckpointStore()
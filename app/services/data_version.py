@@ -0,0 +1,87 @@
+import os
+import json
+import threading
+from app.core.config import logger, DATA_VERSION_CONFIG
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+ALERTS = 'alerts'
+RECOMMENDATIONS = 'recommendations'
+# Files published by pipeline jobs: each worker reloads the frames it read from them
+PUBLISHED_SCORES = 'published_scores'
+PUBLISHED_RECOMMENDATIONS = 'published_recommendations'
+
+class DataVersions:
+    """Monotonic version number per data namespace, shared through one JSON file.
+
+    Writers call `bump(namespace)` after committing; readers compare
+    `current(namespace)` with the version their cached result was built from.
+    `current` costs one stat() while the file is unchanged, so it can be
+    called on every request. Bumps from different processes are serialised
+    with a lock file next to the versions file.
+    """
+
+    def __init__(self, path=DATA_VERSION_CONFIG['path']):
+        self.path = path
+        self._versions = {}
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def _reload(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return
+        # os.replace always creates a new inode, so two bumps within one mtime tick still differ
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+        if stamp == self._stamp:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._versions = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable data versions {self.path}: {e}")
+            return
+        self._stamp = stamp
+
+    def _save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._versions, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        stat = os.stat(self.path)
+        self._stamp = (stat.st_ino, stat.st_mtime_ns)
+
+    def current(self, namespace):
+        with self._lock:
+            self._reload()
+            return self._versions.get(namespace, 0)
+
+    def bump(self, namespace):
+        """Record a committed write to `namespace`; returns the new version"""
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(f"{self.path}.lock", "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                self._stamp = None
+                self._reload()
+                self._versions[namespace] = self._versions.get(namespace, 0) + 1
+                self._save()
+            return self._versions[namespace]
+
+data_versions = DataVersions()
+
+if __name__ == "__main__":
+    # Bump after loading a table outside the API, e.g. the recommendation tables:
+    #   python -m app.services.data_version recommendations
+    import sys
+    for name in sys.argv[1:] or [RECOMMENDATIONS]:
+        print(f"{name}: {data_versions.bump(name)}")
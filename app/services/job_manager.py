@@ -0,0 +1,214 @@
+import os
+import json
+import uuid
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from app.core.config import logger, JOB_CONFIG
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows: updates are then only serialised within a process
+    fcntl = None
+
+TERMINAL_STATUSES = ('completed', 'failed')
+
+class JobStore:
+    """One JSON status file per job, shared between the API process and job workers.
+
+    A job records the token of the process that created it, which holds an
+    exclusive lock on owners/<token>.lock for as long as it lives. Unlike a
+    pid, which the next container often reuses, a token is never reused, and
+    a free lock means the owner is gone along with the workers running the job.
+    """
+
+    def __init__(self, directory=JOB_CONFIG['directory']):
+        self.directory = directory
+        self.owner_token = uuid.uuid4().hex
+        self._owner_lock = None
+        self._lock = threading.Lock()
+        self.fail_orphaned()
+
+    def _path(self, job_id):
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def _owner_path(self, token):
+        return os.path.join(self.directory, "owners", f"{token}.lock")
+
+    def _hold_owner_lock(self):
+        """Take this process's owner lock, kept until the process exits"""
+        with self._lock:
+            if self._owner_lock is not None or fcntl is None:
+                return
+            path = self._owner_path(self.owner_token)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            lock_file = open(path, "a")
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            self._owner_lock = lock_file
+
+    def _owner_alive(self, token):
+        if token == self.owner_token or fcntl is None:
+            return True
+        path = self._owner_path(token)
+        try:
+            lock_file = open(path, "r")
+        except FileNotFoundError:
+            return False
+        with lock_file:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return False
+
+    @contextmanager
+    def _job_lock(self, job_id):
+        """Serialise the read-modify-write of one job across threads and processes"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(f"{self._path(job_id)}.lock", "a") as lock_file:
+            if fcntl is None:
+                with self._lock:
+                    yield
+                return
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            yield
+
+    def _write(self, job):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(job['job_id'])
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, default=str)
+        os.replace(tmp_path, path)
+
+    def create(self, kind, params):
+        self._hold_owner_lock()
+        now = datetime.now().isoformat()
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'kind': kind,
+            # API process whose executor runs the job; its workers die with it
+            'owner': self.owner_token,
+            'status': 'queued',
+            'stage': 'queued',
+            'params': params,
+            'progress': {},
+            'result': None,
+            'error': None,
+            'created_at': now,
+            'started_at': None,
+            'finished_at': None,
+            'updated_at': now
+        }
+        self._write(job)
+        return job
+
+    def get(self, job_id):
+        try:
+            with open(self._path(job_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def update(self, job_id, **fields):
+        """Apply `fields` to the job; a completed or failed job is returned unchanged"""
+        with self._job_lock(job_id):
+            job = self.get(job_id)
+            if job is None or job['status'] in TERMINAL_STATUSES:
+                return job
+            job.update(fields)
+            job['updated_at'] = datetime.now().isoformat()
+            self._write(job)
+            return job
+
+    def list(self, limit=20):
+        if not os.path.exists(self.directory):
+            return []
+        jobs = []
+        for filename in os.listdir(self.directory):
+            if filename.endswith(".json"):
+                job = self.get(filename[:-len(".json")])
+                if job:
+                    jobs.append(job)
+        jobs.sort(key=lambda job: job['created_at'], reverse=True)
+        return jobs[:limit]
+
+    def fail_orphaned(self):
+        """Mark failed the unfinished jobs whose API process is gone, e.g. after a restart"""
+        for job in self.list(limit=None):
+            if job['status'] in TERMINAL_STATUSES:
+                continue
+            owner = job.get('owner')
+            if owner is not None and self._owner_alive(owner):
+                continue
+            self.update(
+                job['job_id'], status='failed', stage='failed',
+                error="Interrupted: the API process running the job stopped",
+                finished_at=datetime.now().isoformat()
+            )
+            logger.warning(f"Marked orphaned {job['kind']} job {job['job_id']} as failed")
+
+class JobManager:
+    """Runs pipeline jobs in a separate process so the API event loop stays free"""
+
+    def __init__(self, store, max_workers=JOB_CONFIG['max_workers']):
+        self.store = store
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._completion_hooks = {}
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def on_complete(self, kind, hook):
+        """Register a callback run in the API process when a job of `kind` succeeds"""
+        self._completion_hooks[kind] = hook
+
+    def submit(self, kind, function, params):
+        job = self.store.create(kind, params)
+        future = self._get_executor().submit(function, job['job_id'], params)
+        future.add_done_callback(lambda f, job_id=job['job_id']: self._finished(kind, job_id, f))
+        logger.info(f"Submitted {kind} job {job['job_id']}")
+        return job
+
+    def _finished(self, kind, job_id, future):
+        error = future.exception()
+        if error is not None:
+            # The worker records its own failures, which the update leaves in place;
+            # this covers crashes of the worker process
+            self.store.update(
+                job_id, status='failed', stage='failed', error=str(error),
+                finished_at=datetime.now().isoformat()
+            )
+            logger.error(f"{kind} job {job_id} failed: {error}")
+            return
+
+        hook = self._completion_hooks.get(kind)
+        if hook is not None:
+            try:
+                hook(self.store.get(job_id))
+            except Exception as e:
+                logger.error(f"Completion hook for {kind} job {job_id} failed: {e}")
+        logger.info(f"{kind} job {job_id} completed")
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+job_store = JobStore()
+job_manager = JobManager(job_store)
@@ -0,0 +1,133 @@
+"""Pipeline entry points executed inside job worker processes.
+
+Workers share nothing in memory with the API process: every job loads its
+inputs from files, writes its outputs to files and reports progress through
+the job store.
+"""
+import os
+import traceback
+from datetime import datetime
+import pandas as pd
+
+from app.core.config import logger
+from app.core.data_cleaning import (
+    clean_contrats_data, clean_sinistres_data,
+    clean_clients_data, clean_business_data, clean_products_data
+)
+from app.core.contract_facts import build_contract_facts, link_claims_to_clients
+from app.services.job_manager import job_store
+from app.services.scoring_services import scoring_service
+from app.services.batch_processor import batch_processor
+from app.services.recommendation_service import recommendation_service
+
+INDIVIDUAL_RECOMMENDATIONS_PATH = "data/processed/individual_recommendations.parquet"
+BUSINESS_RECOMMENDATIONS_PATH = "data/processed/business_recommendations.parquet"
+ALERTS_PATH = "data/processed/alerts.parquet"
+
+def _stage(job_id, stage):
+    logger.info(f"Job {job_id}: {stage}")
+    job_store.update(job_id, stage=stage)
+
+def _run(job_id, pipeline, params):
+    job_store.update(job_id, status='running', stage='starting', started_at=datetime.now().isoformat())
+    try:
+        os.makedirs("data/raw", exist_ok=True)
+        os.makedirs("data/processed", exist_ok=True)
+        result = pipeline(job_id, params)
+    except Exception as e:
+        logger.error(f"Job {job_id} failed: {e}")
+        job_store.update(
+            job_id, status='failed', stage='failed', error=str(e),
+            traceback=traceback.format_exc(), finished_at=datetime.now().isoformat()
+        )
+        raise
+    job_store.update(
+        job_id, status='completed', stage='completed', result=result,
+        finished_at=datetime.now().isoformat()
+    )
+    return result
+
+def _score_clients(job_id, params):
+    _stage(job_id, 'loading')
+    df_contrats = pd.read_parquet(params['df_contrats_path'])
+    df_clients = pd.read_parquet(params['df_clients_path'])
+    df_business = pd.read_parquet(params['df_business_path'])
+    df_products = pd.read_parquet(params['df_products_path'])
+
+    _stage(job_id, 'cleaning')
+    df_contrats_clean = clean_contrats_data(df_contrats)
+    df_clients_clean = clean_clients_data(df_clients)
+    df_business_clean = clean_business_data(df_business)
+    df_products_clean = clean_products_data(df_products)
+
+    _stage(job_id, 'contract-facts')
+    df_facts = build_contract_facts(df_contrats_clean, df_products_clean)
+
+    _stage(job_id, 'scoring')
+    scored_individuals, scored_business = scoring_service.score_all_clients(
+        df_facts, df_clients_clean, df_business_clean
+    )
+
+    if params.get('save_individual_path') or params.get('save_business_path'):
+        _stage(job_id, 'saving')
+        scoring_service.save_scores(params['save_individual_path'], params['save_business_path'])
+
+    return {
+        "individual_clients": len(scored_individuals),
+        "business_clients": len(scored_business),
+        "individual_scores_path": params.get('save_individual_path'),
+        "business_scores_path": params.get('save_business_path')
+    }
+
+def _generate_recommendations(job_id, params):
+    _stage(job_id, 'loading')
+    scoring_service.load_scores(params['individual_scores_path'], params['business_scores_path'])
+    scored_clients = scoring_service.get_scored_clients()
+    if scored_clients.empty:
+        raise ValueError("No scored clients found. Please run scoring first.")
+
+    df_contrats = clean_contrats_data(pd.read_parquet(params['df_contrats_path']))
+    df_products = clean_products_data(pd.read_parquet(params['df_products_path']))
+
+    df_sinistres = None
+    if params.get('df_sinistres_path') and os.path.exists(params['df_sinistres_path']):
+        logger.info(f"Loading claims data from: {params['df_sinistres_path']}")
+        df_sinistres = clean_sinistres_data(pd.read_parquet(params['df_sinistres_path']))
+    else:
+        logger.info("No claims data provided or file not found")
+
+    _stage(job_id, 'contract-facts')
+    df_contrats = build_contract_facts(df_contrats, df_products)
+    df_sinistres = link_claims_to_clients(df_sinistres, df_contrats)
+
+    batch_processor.batch_size = params['batch_size']
+    batch_processor.progress_callback = lambda progress: job_store.update(
+        job_id, stage=progress['run_name'], progress=progress
+    )
+    try:
+        individual_count, business_count, alerts = recommendation_service.generate_recommendations(
+            scored_clients, df_contrats, df_products, df_sinistres,
+            use_cache=params.get('use_cache', True)
+        )
+    finally:
+        batch_processor.progress_callback = None
+
+    _stage(job_id, 'publishing')
+    recommendation_service.save_recommendations(INDIVIDUAL_RECOMMENDATIONS_PATH, BUSINESS_RECOMMENDATIONS_PATH)
+    recommendation_service.save_alerts(ALERTS_PATH)
+
+    return {
+        "individual_recommendations_count": individual_count,
+        "business_recommendations_count": business_count,
+        "alerts_count": len(alerts),
+        "reused_from_cache": recommendation_service.cache_stats,
+        "processed_batches": batch_processor.current_batch,
+        "processed_clients": len(batch_processor.processed_clients),
+        "resume_mode": batch_processor.resume_mode
+    }
+
+def run_scoring_job(job_id, params):
+    return _run(job_id, _score_clients, params)
+
+def run_recommendation_job(job_id, params):
+    return _run(job_id, _generate_recommendations, params)
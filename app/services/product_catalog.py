@@ -0,0 +1,131 @@
+import threading
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from app.core.config import logger, PRODUCT_CATALOG_CONFIG, RECOMMENDATION_REASONS
+from app.db.base import SessionLocal
+from app.models.product_catalog import ProductCatalogEntry
+
+class ProductCatalog:
+    """Stable integer ids for product names, used to store recommendations compactly.
+
+    A recommended product is stored as {product_id, score, confidence, reason_id}:
+    the product name is replaced by its id in the catalog, the score and
+    confidence are float32 and the reason is a template id from
+    RECOMMENDATION_REASONS whose parameters are the item's own fields. `expand`
+    turns stored items back into full ones at the API boundary.
+
+    The ids live in the product_catalog table, next to the recommendation
+    tables they decode. A new name takes the next id in one insert; the
+    primary key and the unique name make concurrent registrations from the job
+    and API processes agree, the loser re-reading the winner's row. Ids are
+    never reused, so a process only ever adds to its in-memory copy.
+    """
+
+    def __init__(self, session_factory=SessionLocal, max_attempts=PRODUCT_CATALOG_CONFIG['max_register_attempts']):
+        self.session_factory = session_factory
+        self.max_attempts = max_attempts
+        self._names = {}
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def _reload(self, session):
+        rows = session.execute(select(ProductCatalogEntry.product_id, ProductCatalogEntry.name)).all()
+        for product_id, name in rows:
+            self._names[product_id] = name
+            self._ids[name] = product_id
+
+    def _add(self, session, name):
+        for _ in range(self.max_attempts):
+            if name in self._ids:
+                return
+            product_id = max(self._names, default=-1) + 1
+            session.add(ProductCatalogEntry(product_id=product_id, name=name))
+            try:
+                session.commit()
+            except IntegrityError:
+                # The id or the name was taken by another process meanwhile
+                session.rollback()
+                self._reload(session)
+                continue
+            self._names[product_id] = name
+            self._ids[name] = product_id
+            return
+        raise RuntimeError(f"Could not register product {name!r} after {self.max_attempts} attempts")
+
+    def register(self, names):
+        """Ids of `names`, adding the ones not yet in the catalog"""
+        with self._lock:
+            missing = [name for name in dict.fromkeys(names) if name not in self._ids]
+            if missing:
+                with self.session_factory() as session:
+                    self._reload(session)
+                    added = [name for name in missing if name not in self._ids]
+                    for name in added:
+                        self._add(session, name)
+                if added:
+                    logger.info(f"Added {len(added)} products to the catalog ({len(self._names)} total)")
+            return [self._ids[name] for name in names]
+
+    def product_name(self, product_id):
+        """Name of a stored id; an id missing from the catalog is an error, not a blank product"""
+        with self._lock:
+            if product_id not in self._names:
+                with self.session_factory() as session:
+                    self._reload(session)
+            if product_id not in self._names:
+                raise LookupError(f"Product id {product_id} is not in the product catalog")
+            return self._names[product_id]
+
+    def encode(self, recommendations):
+        """Compact items of one client's engine output"""
+        product_ids = self.register([item['product'] for item in recommendations])
+        return [
+            {
+                'product_id': product_id,
+                'score': np.float32(item['score']),
+                'confidence': np.float32(item['confidence']),
+                'reason_id': item['reason_id']
+            }
+            for product_id, item in zip(product_ids, recommendations)
+        ]
+
+    def expand(self, recommendations):
+        """Full items with product name and reason text, for API responses.
+
+        Accepts stored compact items, items already in the full format (rows
+        written before the compact encoding) and parquet list values.
+        """
+        if recommendations is None:
+            return None
+        expanded = []
+        for item in recommendations:
+            if 'product_id' not in item or 'product' in item:
+                expanded.append(dict(item))
+                continue
+            full = {
+                'product_id': item['product_id'],
+                'product': self.product_name(item['product_id']),
+                'score': _decimal(item['score']),
+                'confidence': _decimal(item['confidence'])
+            }
+            template = RECOMMENDATION_REASONS.get(item.get('reason_id'))
+            full['reason'] = template.format(**full) if template else None
+            expanded.append(full)
+        return expanded
+
+    def expand_record(self, record):
+        """Copy of a recommendation row with its recommended_products expanded"""
+        record = dict(record)
+        if 'recommended_products' in record:
+            record['recommended_products'] = self.expand(record['recommended_products'])
+        return record
+
+def _decimal(value):
+    """Shortest decimal of a stored float32, as an int when it is whole"""
+    if value is None:
+        return None
+    value = float(str(np.float32(value)))
+    return int(value) if value.is_integer() else value
+
+product_catalog = ProductCatalog()
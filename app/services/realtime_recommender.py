@@ -0,0 +1,211 @@
+"""Single-client recommendations computed on demand from warm in-memory indexes.
+
+The batch run filters the full contracts and claims frames for every client.
+Here the cleaned frames are loaded once and indexed by REF_PERSONNE and
+NUM_CONTRAT, so recomputing one client only touches that client's rows and
+runs the same engines as the batch on them.
+"""
+import os
+import threading
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app.core.config import logger
+from app.core.data_cleaning import clean_contrats_data, clean_sinistres_data, clean_products_data
+from app.core.recommendation.individual_recommendation import recommend_individual_insurance_enhanced
+from app.core.recommendation.business_recommendation import recommend_business_insurance_enhanced
+from app.core.recommendation.alerts import compute_contract_alert_flags
+from app.core.contract_facts import CONTRACT_COLUMNS, build_contract_facts, link_claims_to_clients
+from app.models.contract import Contract
+from app.models.individual_rec import IndividualRec
+from app.models.business_rec import BusinessRec
+from app.services.scoring_services import scoring_service
+from app.services.recommendation_service import recommendation_service
+from app.services.product_catalog import product_catalog
+from app.services.data_version import data_versions, RECOMMENDATIONS, PUBLISHED_RECOMMENDATIONS
+
+class RealtimeRecommender:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._warm_lock = threading.Lock()
+        self.ready = False
+        self.df_contrats = None
+        self.df_products = None
+        self.df_sinistres = None
+        self.alert_flags = None
+        self._contracts_by_client = {}
+        self._claims_by_contract = {}
+        self._contract_overrides = {}
+        self._score_index = None
+        self._score_index_version = None
+        # PUBLISHED_RECOMMENDATIONS version of the files the indexes were built from
+        self._files_version = None
+
+    def warm(self, df_contrats, df_products, df_sinistres=None):
+        """Index cleaned frames by client and contract number"""
+        if 'LIB_SOUS_BRANCHE' not in df_contrats.columns:
+            df_contrats = build_contract_facts(df_contrats, df_products)
+        df_sinistres = link_claims_to_clients(df_sinistres, df_contrats)
+        contracts_by_client = df_contrats.groupby('REF_PERSONNE', sort=False).indices
+        alert_flags = compute_contract_alert_flags(df_contrats)
+        claims_by_contract = {}
+        if df_sinistres is not None:
+            claims_by_contract = df_sinistres.groupby('NUM_CONTRAT', sort=False).indices
+
+        with self._lock:
+            self.df_contrats = df_contrats
+            self.df_products = df_products
+            self.df_sinistres = df_sinistres
+            self.alert_flags = alert_flags
+            self._contracts_by_client = contracts_by_client
+            self._claims_by_contract = claims_by_contract
+            self._contract_overrides = {}
+            self._score_index = None
+            self.ready = True
+
+        logger.info(
+            f"Realtime indexes warmed: {len(contracts_by_client)} clients, "
+            f"{len(df_products)} products, {len(claims_by_contract)} contracts with claims"
+        )
+
+    def warm_from_files(self, df_contrats_path="data/raw/contrats.parquet",
+                        df_products_path="data/raw/products.parquet",
+                        df_sinistres_path="data/raw/claims.parquet"):
+        files_version = data_versions.current(PUBLISHED_RECOMMENDATIONS)
+        df_contrats = clean_contrats_data(pd.read_parquet(df_contrats_path))
+        df_products = clean_products_data(pd.read_parquet(df_products_path))
+        df_sinistres = None
+        if df_sinistres_path and os.path.exists(df_sinistres_path):
+            df_sinistres = clean_sinistres_data(pd.read_parquet(df_sinistres_path))
+
+        if scoring_service.get_scored_clients().empty:
+            scoring_service.load_scores()
+
+        self.warm(df_contrats, df_products, df_sinistres)
+        self._files_version = files_version
+
+    def ensure_warm(self):
+        # A recommendation job published new files since the warm, whichever worker ran its hook
+        if self._files_version is not None and self._files_version != data_versions.current(PUBLISHED_RECOMMENDATIONS):
+            self.invalidate()
+        if self.ready:
+            return
+        with self._warm_lock:
+            if not self.ready:
+                self.warm_from_files()
+
+    def invalidate(self):
+        """Drop the indexes; the next request rebuilds them from the published files"""
+        with self._lock:
+            self.ready = False
+            self._score_index = None
+
+    def invalidate_scores(self):
+        with self._lock:
+            self._score_index = None
+
+    def _scores(self):
+        scoring_service.reload_if_published()
+        index = self._score_index
+        if index is None or self._score_index_version != scoring_service.loaded_version:
+            index = {}
+            for client_type in ('individual', 'business'):
+                frame = scoring_service.get_scored_clients(client_type)
+                if frame.empty:
+                    continue
+                for position, client_id in enumerate(frame['REF_PERSONNE'].to_numpy()):
+                    index[client_id] = (client_type, frame, position)
+            self._score_index = index
+            self._score_index_version = scoring_service.loaded_version
+        return index
+
+    def client_contracts(self, client_id):
+        override = self._contract_overrides.get(client_id)
+        if override is not None:
+            return override
+        positions = self._contracts_by_client.get(client_id)
+        if positions is None:
+            return self.df_contrats.iloc[:0]
+        return self.df_contrats.iloc[positions]
+
+    def client_claims(self, client_contracts):
+        if self.df_sinistres is None:
+            return None
+        positions = [
+            self._claims_by_contract[contract]
+            for contract in client_contracts['NUM_CONTRAT'].unique()
+            if contract in self._claims_by_contract
+        ]
+        if not positions:
+            return self.df_sinistres.iloc[:0]
+        return self.df_sinistres.iloc[np.concatenate(positions)]
+
+    def refresh_client_contracts(self, db: Session, client_id):
+        """Replace the indexed contracts of one client with its current rows in the database"""
+        rows = db.query(Contract).filter(Contract.REF_PERSONNE == client_id).all()
+        df = pd.DataFrame(
+            [{column: getattr(row, column) for column in CONTRACT_COLUMNS} for row in rows],
+            columns=CONTRACT_COLUMNS
+        )
+        contracts = build_contract_facts(clean_contrats_data(df), self.df_products)
+        with self._lock:
+            self._contract_overrides[client_id] = contracts
+        return len(contracts)
+
+    def recommend(self, client_id, client_type=None):
+        """Recompute the recommendation row of one scored client.
+
+        recommended_products is in the stored compact encoding; the API expands
+        it with `product_catalog.expand_record`. Returns None when the client
+        has no score.
+        """
+        self.ensure_warm()
+        entry = self._scores().get(client_id)
+        if entry is None or (client_type and entry[0] != client_type):
+            return None
+        client_type, frame, position = entry
+        client_row = frame.iloc[position]
+
+        client_contracts = self.client_contracts(client_id)
+        client_claims = self.client_claims(client_contracts)
+
+        if client_type == 'individual':
+            # Refreshed contracts are not in the warm flags; the engine flags them itself
+            alert_flags = None if client_id in self._contract_overrides else self.alert_flags
+            recommendations = recommend_individual_insurance_enhanced(
+                client_row, client_contracts, self.df_products, client_claims, alert_flags
+            )
+            record = recommendation_service.individual_record(client_row, product_catalog.encode(recommendations))
+        else:
+            recommendations = recommend_business_insurance_enhanced(
+                client_row, client_contracts, self.df_products, client_claims
+            )
+            record = recommendation_service.business_record(client_row, product_catalog.encode(recommendations))
+
+        return _to_python(record)
+
+    def persist(self, db: Session, record):
+        """Upsert a recomputed row into individual_recommendations or business_recommendations"""
+        model = IndividualRec if record['client_type'] == 'individual' else BusinessRec
+        columns = set(model.__table__.columns.keys())
+        db.merge(model(**{key: value for key, value in record.items() if key in columns}))
+        db.commit()
+        data_versions.bump(RECOMMENDATIONS)
+
+def _to_python(value):
+    """Convert numpy scalars and NaN so the row can be returned as JSON and stored in a JSON column"""
+    if isinstance(value, dict):
+        return {key: _to_python(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_to_python(item) for item in value]
+    if isinstance(value, np.float32):
+        # Shortest decimal that reads back as the same float32
+        return float(str(value))
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+realtime_recommender = RealtimeRecommender()
@@ -0,0 +1,138 @@
+import os
+import json
+import hashlib
+import inspect
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from app.core.config import logger, RECOMMENDATION_CACHE_CONFIG
+from app.core.recommendation import individual_recommendation, business_recommendation, alerts
+from app.core import contract_facts
+from app.core.contract_facts import contract_columns, link_claims_to_clients
+from app.services.recommendation_writer import RecommendationWriter
+
+FINGERPRINT_COLUMN = 'fingerprint'
+ENGINE_MODULES = (individual_recommendation, business_recommendation, alerts, contract_facts)
+
+def _group_hashes(keys, row_hashes):
+    """Order-sensitive uint64 digest of the row hashes of each key"""
+    parts = pd.DataFrame({'key': np.asarray(keys), 'row': np.asarray(row_hashes, dtype=np.uint64)})
+    parts['position'] = parts.groupby('key', sort=False).cumcount()
+    mixed = pd.util.hash_pandas_object(parts[['row', 'position']], index=False).to_numpy()
+    return pd.Series(mixed, index=parts['key'].to_numpy()).groupby(level=0).sum()
+
+class RecommendationCache:
+    """Recommendation rows of the last published run, keyed by a fingerprint of each client's inputs.
+
+    A client's fingerprint covers its scored row, its contract rows, the claims
+    on those contracts and its recently-cancelled alert flags, salted with the
+    version of the rule tables, product catalog and engine code. A client whose
+    fingerprint is unchanged gets its cached row back instead of being recomputed.
+
+    Layout: <directory>/<run_name>.parquet holds the published rows plus a
+    fingerprint column; <directory>/<run_name>.pending.parquet holds the
+    fingerprints of a run that has been generated but not yet published.
+    """
+
+    def __init__(self, directory=RECOMMENDATION_CACHE_CONFIG['directory']):
+        self.directory = directory
+
+    def _path(self, run_name):
+        return os.path.join(self.directory, f"{run_name}.parquet")
+
+    def _pending_path(self, run_name):
+        return os.path.join(self.directory, f"{run_name}.pending.parquet")
+
+    @staticmethod
+    def rules_version(rules, df_products):
+        """Digest of everything that applies to all clients alike"""
+        digest = hashlib.sha256()
+        digest.update(json.dumps(rules, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(df_products, index=False).to_numpy().tobytes())
+        for module in ENGINE_MODULES:
+            digest.update(inspect.getsource(module).encode("utf-8"))
+        return digest.hexdigest()
+
+    @staticmethod
+    def fingerprint_clients(df_scored, df_contrats, df_sinistres, alert_flags, version):
+        """uint64 fingerprint of every scored client, aligned with `df_scored`"""
+        client_ids = df_scored['REF_PERSONNE']
+
+        contract_hashes = _group_hashes(
+            df_contrats['REF_PERSONNE'],
+            pd.util.hash_pandas_object(df_contrats[contract_columns(df_contrats)], index=False)
+        )
+
+        claims_hashes = pd.Series(dtype=np.uint64)
+        if df_sinistres is not None and not df_sinistres.empty:
+            claims = link_claims_to_clients(df_sinistres, df_contrats)
+            claims_hashes = _group_hashes(
+                claims['REF_PERSONNE'],
+                pd.util.hash_pandas_object(claims.drop(columns='REF_PERSONNE'), index=False)
+            )
+
+        cancelled = alert_flags.loc[alert_flags['is_recently_cancelled'], ['NUM_CONTRAT', 'branche']]
+        flag_hashes = _group_hashes(cancelled.index, pd.util.hash_pandas_object(cancelled, index=False))
+
+        components = pd.DataFrame({
+            'client': pd.util.hash_pandas_object(df_scored, index=False).to_numpy(),
+            'contracts': contract_hashes.reindex(client_ids, fill_value=0).to_numpy(),
+            'claims': claims_hashes.reindex(client_ids, fill_value=0).to_numpy(),
+            'flags': flag_hashes.reindex(client_ids, fill_value=0).to_numpy(),
+        })
+        fingerprints = pd.util.hash_pandas_object(components, index=False, hash_key=version[:16])
+        return pd.Series(fingerprints.to_numpy(), index=df_scored.index, name=FINGERPRINT_COLUMN)
+
+    def load(self, run_name):
+        """Cached recommendations of the last published run, as {REF_PERSONNE: record}.
+
+        Only the recommended products and the fingerprint are read; every other
+        output column is selected from the scored row, which the fingerprint covers.
+        """
+        path = self._path(run_name)
+        if not os.path.exists(path):
+            return {}
+        try:
+            records = pq.read_table(
+                path, columns=['REF_PERSONNE', 'recommended_products', FINGERPRINT_COLUMN]
+            ).to_pylist()
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable recommendation cache {path}: {e}")
+            return {}
+        return {record['REF_PERSONNE']: record for record in records}
+
+    def stage(self, run_name, df_scored):
+        """Remember the fingerprints of a generated run until it is published"""
+        os.makedirs(self.directory, exist_ok=True)
+        table = pa.Table.from_pandas(
+            df_scored[['REF_PERSONNE', FINGERPRINT_COLUMN]], preserve_index=False
+        )
+        RecommendationWriter.write_table(self._pending_path(run_name), table)
+
+    def publish(self, run_name, output_path):
+        """Store the published rows of `run_name` with the fingerprints they were computed from"""
+        pending_path = self._pending_path(run_name)
+        if not os.path.exists(pending_path) or not os.path.exists(output_path):
+            return 0
+
+        fingerprints = pq.read_table(pending_path).to_pandas().set_index('REF_PERSONNE')[FINGERPRINT_COLUMN]
+        table = pq.read_table(output_path)
+        aligned = fingerprints.reindex(table.column('REF_PERSONNE').to_numpy())
+        if aligned.isna().any():
+            logger.warning(f"Recommendation cache for {run_name} not updated: fingerprints do not match output")
+            os.remove(pending_path)
+            return 0
+
+        table = table.append_column(FINGERPRINT_COLUMN, pa.array(aligned.to_numpy(dtype=np.uint64)))
+        rows = RecommendationWriter.write_table(self._path(run_name), table)
+        os.remove(pending_path)
+        logger.info(f"Recommendation cache for {run_name} updated with {rows} rows")
+        return rows
+
+    def clear(self, run_name):
+        for path in (self._path(run_name), self._pending_path(run_name)):
+            if os.path.exists(path):
+                os.remove(path)
+
+recommendation_cache = RecommendationCache()
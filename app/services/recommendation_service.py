@@ -1,120 +1,268 @@
+import os
 import pandas as pd
 import numpy as np
-from app.core.config import logger, BUDGET_CONFIG, PREMIUM_PRODUCTS
+from app.core.config import (
+    logger, BUDGET_CONFIG, PREMIUM_PRODUCTS, PRODUCT_SCORING_WEIGHTS,
+    CLAIMS_ANALYSIS_CONFIG, ALERT_CONFIG, LARGE_BUSINESS_CAPITAL_THRESHOLD
+)
 from app.core.recommendation.individual_recommendation import recommend_individual_insurance_enhanced
 from app.core.recommendation.business_recommendation import recommend_business_insurance_enhanced
-from app.core.recommendation.alerts import generate_alerts
+from app.core.recommendation.alerts import generate_alerts, compute_contract_alert_flags
+from app.core.contract_facts import build_contract_facts, link_claims_to_clients, contract_columns
 from app.services.batch_processor import batch_processor
+from app.services.checkpoint_store import checkpoint_store
+from app.services.recommendation_writer import individual_writer, business_writer
+from app.services.recommendation_cache import recommendation_cache, FINGERPRINT_COLUMN
+from app.services.product_catalog import product_catalog
+from app.services.data_version import data_versions, PUBLISHED_RECOMMENDATIONS
+
+INDIVIDUAL_RUN = 'individual_recommendations'
+BUSINESS_RUN = 'business_recommendations'
 
 class RecommendationService:
     def __init__(self):
         self.individual_recommendations = pd.DataFrame()
         self.business_recommendations = pd.DataFrame()
         self.alerts = pd.DataFrame()
+        self.cache_stats = {}
+        # PUBLISHED_RECOMMENDATIONS version the loaded frames were read at
+        self._loaded_version = None
     
-    def generate_recommendations(self, df_scored, df_contrats, df_products, df_sinistres=None):
+    def generate_recommendations(self, df_scored, df_contrats, df_products, df_sinistres=None, use_cache=True):
+        """Stream recommendations for all scored clients into checkpointed part files.
+
+        Results are not accumulated in memory; call `save_recommendations` to
+        publish the finished runs and `load_recommendations` to read them back.
+        With `use_cache`, clients whose inputs are unchanged since the last
+        published run get their cached row instead of being recomputed.
+        Returns the number of individual and business rows written and the alerts.
+        """
         logger.info("Starting recommendation generation...")
         
+        run_config = self._run_config(df_contrats, df_products, df_sinistres)
+        if 'LIB_SOUS_BRANCHE' not in df_contrats.columns:
+            df_contrats = build_contract_facts(df_contrats, df_products)
+        df_sinistres = link_claims_to_clients(df_sinistres, df_contrats)
+        alert_flags = compute_contract_alert_flags(df_contrats)
+        product_catalog.register(df_products['LIB_PRODUIT'].drop_duplicates().tolist())
+        
+        df_scored = df_scored.assign(**{FINGERPRINT_COLUMN: recommendation_cache.fingerprint_clients(
+            df_scored, df_contrats, df_sinistres, alert_flags,
+            recommendation_cache.rules_version(self._rules(), df_products)
+        )})
         individual_clients = df_scored[df_scored['client_type'] == 'individual']
         business_clients = df_scored[df_scored['client_type'] == 'business']
         
-        individual_recs = batch_processor.process_in_batches(
+        individual_cache = recommendation_cache.load(INDIVIDUAL_RUN) if use_cache else {}
+        business_cache = recommendation_cache.load(BUSINESS_RUN) if use_cache else {}
+        self.cache_stats = {
+            'individual_reused': self._count_reusable(individual_clients, individual_cache),
+            'business_reused': self._count_reusable(business_clients, business_cache)
+        }
+        logger.info(f"Reusing cached recommendations for unchanged clients: {self.cache_stats}")
+        
+        individual_count = batch_processor.process_in_batches(
             individual_clients, self._process_individual_batch, 
-            df_contrats, df_products, df_sinistres
+            df_contrats, df_products, df_sinistres, alert_flags, individual_cache,
+            run_name=INDIVIDUAL_RUN, run_config=self._client_config(individual_clients, run_config),
+            run_writer=individual_writer
         )
         
-        business_recs = batch_processor.process_in_batches(
+        business_count = batch_processor.process_in_batches(
             business_clients, self._process_business_batch,
-            df_contrats, df_products, df_sinistres
+            df_contrats, df_products, df_sinistres, business_cache,
+            run_name=BUSINESS_RUN, run_config=self._client_config(business_clients, run_config),
+            run_writer=business_writer
         )
         
-        self.individual_recommendations = pd.DataFrame(individual_recs)
-        self.business_recommendations = pd.DataFrame(business_recs)
+        recommendation_cache.stage(INDIVIDUAL_RUN, individual_clients)
+        recommendation_cache.stage(BUSINESS_RUN, business_clients)
+        
+        # Stale until the new runs are published
+        self.individual_recommendations = pd.DataFrame()
+        self.business_recommendations = pd.DataFrame()
         
         self.alerts = generate_alerts(df_contrats)
         
-        logger.info(f"Generated {len(self.individual_recommendations)} individual recommendations")
-        logger.info(f"Generated {len(self.business_recommendations)} business recommendations")
+        logger.info(f"Generated {individual_count} individual recommendations")
+        logger.info(f"Generated {business_count} business recommendations")
         logger.info(f"Generated {len(self.alerts)} alerts")
         
-        return self.individual_recommendations, self.business_recommendations, self.alerts
+        return individual_count, business_count, self.alerts
+    
+    def _run_config(self, df_contrats, df_products, df_sinistres):
+        """Inputs and rule tables that must match for a checkpointed run to be resumed"""
+        # Derived fact table columns depend on the current date; digest the source columns only
+        claims = df_sinistres.drop(columns='REF_PERSONNE') if df_sinistres is not None and 'REF_PERSONNE' in df_sinistres.columns else df_sinistres
+        return {
+            'contracts': self._frame_digest(df_contrats[contract_columns(df_contrats)]),
+            'products': self._frame_digest(df_products),
+            'claims': self._frame_digest(claims),
+            **self._rules()
+        }
     
-    def _process_individual_batch(self, batch, df_contrats, df_products, df_sinistres):
-        results = []
+    @staticmethod
+    def _rules():
+        """Rule and config tables that apply to every client"""
+        return {
+            'budget_config': BUDGET_CONFIG,
+            'product_scoring_weights': PRODUCT_SCORING_WEIGHTS,
+            'claims_analysis_config': CLAIMS_ANALYSIS_CONFIG,
+            'alert_config': ALERT_CONFIG,
+            'premium_products': PREMIUM_PRODUCTS,
+            'large_business_threshold': LARGE_BUSINESS_CAPITAL_THRESHOLD
+        }
+    
+    def _client_config(self, clients, run_config):
+        config = dict(run_config)
+        config['clients'] = self._frame_digest(clients[['REF_PERSONNE', 'final_client_score']])
+        return config
+    
+    @staticmethod
+    def _frame_digest(df):
+        if df is None:
+            return None
+        row_hashes = pd.util.hash_pandas_object(df, index=False).values
+        return f"{len(df)}:{int(row_hashes.sum(dtype=np.uint64))}"
+    
+    @staticmethod
+    def _count_reusable(clients, cached):
+        if not cached:
+            return 0
+        cached_fingerprints = {client_id: record[FINGERPRINT_COLUMN] for client_id, record in cached.items()}
+        previous = clients['REF_PERSONNE'].map(cached_fingerprints)
+        return int((previous == clients[FINGERPRINT_COLUMN]).sum())
+    
+    @staticmethod
+    def _cached_recommendations(batch, cached):
+        """Cached recommended_products of the batch clients whose fingerprint did not change"""
+        if not cached or FINGERPRINT_COLUMN not in batch:
+            return {}
+        reusable = {}
+        for client_id, fingerprint in zip(batch['REF_PERSONNE'].tolist(), batch[FINGERPRINT_COLUMN].tolist()):
+            record = cached.get(client_id)
+            if record is not None and record[FINGERPRINT_COLUMN] == fingerprint:
+                reusable[client_id] = record['recommended_products']
+        return reusable
+    
+    def _process_individual_batch(self, batch, df_contrats, df_products, df_sinistres, alert_flags=None, cached=None):
+        recommendations = {}
+        reusable = self._cached_recommendations(batch, cached)
         
-        for _, client_row in batch.iterrows():
-            recommendations = recommend_individual_insurance_enhanced(
-                client_row, df_contrats, df_products, df_sinistres
-            )
-            
-            budget = self._calculate_budget(client_row, 'individual')
-            
-            results.append({
-                'REF_PERSONNE': client_row['REF_PERSONNE'],
-                'NOM_PRENOM': client_row.get('NOM_PRENOM', ''),
-                'recommended_products': recommendations,
-                'recommendation_count': len(recommendations),
-                'client_score': client_row['final_client_score'],
-                'client_segment': client_row['client_segment'],
-                'risk_profile': client_row['risk_profile'],
-                'estimated_budget': budget,
-                'AGE': client_row.get('AGE', 0),
-                'PROFESSION_GROUP': client_row.get('PROFESSION_GROUP', ''),
-                'SITUATION_FAMILIALE': client_row.get('SITUATION_FAMILIALE', ''),
-                'SECTEUR_ACTIVITE_GROUP': client_row.get('SECTEUR_ACTIVITE_GROUP', ''),
-                'client_type': 'individual'
-            })
-        
-        return results
-    
-    def _process_business_batch(self, batch, df_contrats, df_products, df_sinistres):
-        results = []
-        
-        for _, client_row in batch.iterrows():
-            recommendations = recommend_business_insurance_enhanced(
+        for client_row in batch.to_dict('records'):
+            client_id = client_row['REF_PERSONNE']
+            if client_id in reusable:
+                recommendations[client_id] = reusable[client_id]
+                continue
+            recommendations[client_id] = product_catalog.encode(recommend_individual_insurance_enhanced(
+                client_row, df_contrats, df_products, df_sinistres, alert_flags
+            ))
+        
+        return self.individual_frame(batch, recommendations)
+    
+    def _process_business_batch(self, batch, df_contrats, df_products, df_sinistres, cached=None):
+        recommendations = {}
+        reusable = self._cached_recommendations(batch, cached)
+        
+        for client_row in batch.to_dict('records'):
+            client_id = client_row['REF_PERSONNE']
+            if client_id in reusable:
+                recommendations[client_id] = reusable[client_id]
+                continue
+            recommendations[client_id] = product_catalog.encode(recommend_business_insurance_enhanced(
                 client_row, df_contrats, df_products, df_sinistres
-            )
-            
-            budget = self._calculate_budget(client_row, 'business')
-            
-            results.append({
-                'REF_PERSONNE': client_row['REF_PERSONNE'],
-                'RAISON_SOCIALE': client_row.get('RAISON_SOCIALE', ''),
-                'recommended_products': recommendations,
-                'recommendation_count': len(recommendations),
-                'client_score': client_row['final_client_score'],
-                'client_segment': client_row['client_segment'],
-                'risk_profile': client_row['risk_profile'],
-                'estimated_budget': budget,
-                'SECTEUR_GROUP': client_row.get('SECTEUR_GROUP', ''),
-                'ACTIVITE_GROUP': client_row.get('ACTIVITE_GROUP', ''),
-                'BUSINESS_RISK_PROFILE': client_row.get('RISK_PROFILE', ''),
-                'total_capital_assured': client_row.get('total_capital_assured', 0),
-                'total_premiums_paid': client_row.get('total_premiums_paid', 0),
-                'client_type': 'business'
-            })
-        
-        return results
-    
-    def _calculate_budget(self, client_row, client_type):
+            ))
+        
+        return self.business_frame(batch, recommendations)
+    
+    def individual_frame(self, clients, recommendations):
+        """Rows of the individual_recommendations table for scored clients.
+        
+        Every column is selected from `clients`; only `recommended_products`
+        comes from `recommendations`, a mapping of REF_PERSONNE to the items
+        encoded by `product_catalog.encode`.
+        """
+        products = self._join_recommendations(clients, recommendations)
+        return pd.DataFrame({
+            'REF_PERSONNE': clients['REF_PERSONNE'].to_numpy(),
+            'NOM_PRENOM': self._column(clients, 'NOM_PRENOM', ''),
+            'recommended_products': products,
+            'recommendation_count': [len(products_list) for products_list in products],
+            'client_score': clients['final_client_score'].to_numpy(),
+            'client_segment': clients['client_segment'].to_numpy(),
+            'risk_profile': clients['risk_profile'].to_numpy(),
+            'estimated_budget': self._calculate_budgets(clients, 'individual'),
+            'AGE': self._column(clients, 'AGE', 0),
+            'PROFESSION_GROUP': self._column(clients, 'PROFESSION_GROUP', ''),
+            'SITUATION_FAMILIALE': self._column(clients, 'SITUATION_FAMILIALE', ''),
+            'SECTEUR_ACTIVITE_GROUP': self._column(clients, 'SECTEUR_ACTIVITE_GROUP', ''),
+            'client_type': 'individual'
+        })
+    
+    def business_frame(self, clients, recommendations):
+        """Rows of the business_recommendations table for scored clients.
+        
+        Every column is selected from `clients`; only `recommended_products`
+        comes from `recommendations`, a mapping of REF_PERSONNE to the items
+        encoded by `product_catalog.encode`.
+        """
+        products = self._join_recommendations(clients, recommendations)
+        return pd.DataFrame({
+            'REF_PERSONNE': clients['REF_PERSONNE'].to_numpy(),
+            'RAISON_SOCIALE': self._column(clients, 'RAISON_SOCIALE', ''),
+            'recommended_products': products,
+            'recommendation_count': [len(products_list) for products_list in products],
+            'client_score': clients['final_client_score'].to_numpy(),
+            'client_segment': clients['client_segment'].to_numpy(),
+            'risk_profile': clients['risk_profile'].to_numpy(),
+            'estimated_budget': self._calculate_budgets(clients, 'business'),
+            'SECTEUR_GROUP': self._column(clients, 'SECTEUR_GROUP', ''),
+            'ACTIVITE_GROUP': self._column(clients, 'ACTIVITE_GROUP', ''),
+            'BUSINESS_RISK_PROFILE': self._column(clients, 'RISK_PROFILE', ''),
+            'total_capital_assured': self._column(clients, 'total_capital_assured', 0),
+            'total_premiums_paid': self._column(clients, 'total_premiums_paid', 0),
+            'client_type': 'business'
+        })
+    
+    def individual_record(self, client_row, recommendations):
+        """Row of the individual_recommendations table for one scored client"""
+        client = client_row.to_frame().T.infer_objects()
+        return self.individual_frame(client, {client_row['REF_PERSONNE']: recommendations}).to_dict('records')[0]
+    
+    def business_record(self, client_row, recommendations):
+        """Row of the business_recommendations table for one scored client"""
+        client = client_row.to_frame().T.infer_objects()
+        return self.business_frame(client, {client_row['REF_PERSONNE']: recommendations}).to_dict('records')[0]
+    
+    @staticmethod
+    def _join_recommendations(clients, recommendations):
+        """recommended_products aligned with `clients` on REF_PERSONNE"""
+        return [recommendations.get(client_id, []) for client_id in clients['REF_PERSONNE'].tolist()]
+    
+    @staticmethod
+    def _column(clients, column, default):
+        """Column of `clients`, or `default` for every row when the column is absent"""
+        if column in clients.columns:
+            return clients[column].to_numpy()
+        return np.full(len(clients), default, dtype=object if isinstance(default, str) else None)
+    
+    def _calculate_budgets(self, clients, client_type):
+        """Estimated budget of every client: the largest of the premium-based candidates"""
         config = BUDGET_CONFIG[client_type]
+        total_premiums = np.asarray(self._column(clients, 'total_premiums_paid', 0), dtype=float)
         
         if client_type == 'individual':
-            total_premiums = client_row.get('total_premiums_paid', 0)
-            avg_premium = client_row.get('avg_premium_per_contract', 0)
-            return max(
-                total_premiums * config['multiplier'],
-                avg_premium * 3,
-                config['minimum']
-            )
+            avg_premium = np.asarray(self._column(clients, 'avg_premium_per_contract', 0), dtype=float)
+            second = avg_premium * 3
         else:
-            total_premiums = client_row.get('total_premiums_paid', 0)
-            total_capital = client_row.get('total_capital_assured', 0)
-            return max(
-                total_premiums * config['multiplier'],
-                total_capital * config['premium_ratio'],
-                config['minimum']
-            )
+            total_capital = np.asarray(self._column(clients, 'total_capital_assured', 0), dtype=float)
+            second = total_capital * config['premium_ratio']
+        
+        # Same left-to-right comparison as max(), so a NaN first candidate is kept
+        budget = total_premiums * config['multiplier']
+        for candidate in (second, np.full(len(clients), config['minimum'], dtype=float)):
+            budget = np.where(candidate > budget, candidate, budget)
+        return budget
     
     def get_recommendations(self, client_type='all'):
         if client_type == 'individual':
@@ -125,14 +273,44 @@ class RecommendationService:
             return pd.concat([self.individual_recommendations, self.business_recommendations], ignore_index=True)
     
     def save_recommendations(self, individual_path, business_path):
-        if not self.individual_recommendations.empty:
+        """Publish checkpointed runs atomically, falling back to the in-memory frames"""
+        if checkpoint_store.load_manifest(INDIVIDUAL_RUN):
+            checkpoint_store.commit(INDIVIDUAL_RUN, individual_path)
+            recommendation_cache.publish(INDIVIDUAL_RUN, individual_path)
+            self.individual_recommendations = pd.DataFrame()
+        elif not self.individual_recommendations.empty:
             self.individual_recommendations.to_parquet(individual_path, index=False)
             logger.info(f"Individual recommendations saved to {individual_path}")
         
-        if not self.business_recommendations.empty:
+        if checkpoint_store.load_manifest(BUSINESS_RUN):
+            checkpoint_store.commit(BUSINESS_RUN, business_path)
+            recommendation_cache.publish(BUSINESS_RUN, business_path)
+            self.business_recommendations = pd.DataFrame()
+        elif not self.business_recommendations.empty:
             self.business_recommendations.to_parquet(business_path, index=False)
             logger.info(f"Business recommendations saved to {business_path}")
     
+    def load_recommendations(self, individual_path, business_path):
+        """Load published recommendations into memory if they are not already there.
+
+        Frames read before a job published new files, in this worker or
+        another, are dropped and read again.
+        """
+        version = data_versions.current(PUBLISHED_RECOMMENDATIONS)
+        if version != self._loaded_version:
+            self.individual_recommendations = pd.DataFrame()
+            self.business_recommendations = pd.DataFrame()
+            self._loaded_version = version
+        if self.individual_recommendations.empty and os.path.exists(individual_path):
+            self.individual_recommendations = pd.read_parquet(individual_path)
+        if self.business_recommendations.empty and os.path.exists(business_path):
+            self.business_recommendations = pd.read_parquet(business_path)
+    
+    def load_partial_recommendations(self, client_type='individual'):
+        """Read the batches written so far by an in-progress run"""
+        run_name = INDIVIDUAL_RUN if client_type == 'individual' else BUSINESS_RUN
+        return checkpoint_store.load_parts(run_name)
+    
     def save_alerts(self, filepath):
         if not self.alerts.empty:
             self.alerts.to_parquet(filepath, index=False)
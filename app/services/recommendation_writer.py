@@ -0,0 +1,109 @@
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from app.core.config import logger
+
+# Compact item written by ProductCatalog.encode; names and reasons are expanded by the API
+RECOMMENDED_PRODUCT_TYPE = pa.struct([
+    ('product_id', pa.int32()),
+    ('score', pa.float32()),
+    ('confidence', pa.float32()),
+    ('reason_id', pa.int8())
+])
+
+INDIVIDUAL_SCHEMA = pa.schema([
+    ('REF_PERSONNE', pa.int64()),
+    ('NOM_PRENOM', pa.string()),
+    ('recommended_products', pa.list_(RECOMMENDED_PRODUCT_TYPE)),
+    ('recommendation_count', pa.int64()),
+    ('client_score', pa.float64()),
+    ('client_segment', pa.string()),
+    ('risk_profile', pa.string()),
+    ('estimated_budget', pa.float64()),
+    ('AGE', pa.float64()),
+    ('PROFESSION_GROUP', pa.string()),
+    ('SITUATION_FAMILIALE', pa.string()),
+    ('SECTEUR_ACTIVITE_GROUP', pa.string()),
+    ('client_type', pa.string())
+])
+
+BUSINESS_SCHEMA = pa.schema([
+    ('REF_PERSONNE', pa.int64()),
+    ('RAISON_SOCIALE', pa.string()),
+    ('recommended_products', pa.list_(RECOMMENDED_PRODUCT_TYPE)),
+    ('recommendation_count', pa.int64()),
+    ('client_score', pa.float64()),
+    ('client_segment', pa.string()),
+    ('risk_profile', pa.string()),
+    ('estimated_budget', pa.float64()),
+    ('SECTEUR_GROUP', pa.string()),
+    ('ACTIVITE_GROUP', pa.string()),
+    ('BUSINESS_RISK_PROFILE', pa.string()),
+    ('total_capital_assured', pa.float64()),
+    ('total_premiums_paid', pa.float64()),
+    ('client_type', pa.string())
+])
+
+def _fsync_and_replace(tmp_path, path):
+    with open(tmp_path, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _hidden_tmp_path(path):
+    # pyarrow datasets skip files starting with '.', so readers never see a partial part
+    directory, filename = os.path.split(path)
+    return os.path.join(directory, f".{filename}.tmp")
+
+class RecommendationWriter:
+    """Writes recommendation batches as parquet files with a fixed schema"""
+
+    def __init__(self, schema=None):
+        self.schema = schema
+
+    def to_table(self, records):
+        """Arrow table from a list of row dicts or a DataFrame"""
+        if isinstance(records, pd.DataFrame):
+            return pa.Table.from_pandas(records, schema=self.schema, preserve_index=False)
+        if self.schema is None:
+            return pa.Table.from_pylist(records)
+        return pa.Table.from_pylist(records, schema=self.schema)
+
+    def write_part(self, path, records):
+        """Write one batch to `path`; the file only appears once it is complete"""
+        return self.write_table(path, self.to_table(records))
+
+    @staticmethod
+    def write_table(path, table):
+        """Atomically write an arrow table to `path`"""
+        tmp_path = _hidden_tmp_path(path)
+        with pq.ParquetWriter(tmp_path, table.schema) as writer:
+            writer.write_table(table)
+        _fsync_and_replace(tmp_path, path)
+        return table.num_rows
+
+    def merge_parts(self, part_paths, output_path):
+        """Stream part files into `output_path` one row group at a time"""
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        schema = self.schema
+        if schema is None and part_paths:
+            schema = pq.read_schema(part_paths[0])
+        if schema is None:
+            logger.warning(f"No parts and no schema to write {output_path}")
+            return 0
+
+        rows = 0
+        tmp_path = _hidden_tmp_path(output_path)
+        with pq.ParquetWriter(tmp_path, schema) as writer:
+            for part_path in part_paths:
+                table = pq.read_table(part_path, schema=schema)
+                writer.write_table(table)
+                rows += table.num_rows
+        _fsync_and_replace(tmp_path, output_path)
+        return rows
+
+individual_writer = RecommendationWriter(INDIVIDUAL_SCHEMA)
+business_writer = RecommendationWriter(BUSINESS_SCHEMA)
@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from fastapi.encoders import jsonable_encoder
+from app.core.config import logger, RESPONSE_CACHE_CONFIG
+from app.services.data_version import data_versions
+
+try:
+    import redis
+except ImportError:  # optional shared backend
+    redis = None
+
+class ResponseCache:
+    """Responses of read endpoints, keyed by route, query parameters and data version.
+
+    Nothing is ever invalidated explicitly: the version of the namespace a
+    response was built from is part of its key, so once a writer bumps the
+    version every older entry stops matching. Entries live in a per-process
+    LRU and, when a redis URL is configured and the client is installed, in
+    redis as JSON so other workers reuse them. Both expire after
+    `ttl_seconds`, which bounds how long a write that moved no version stays
+    unseen. A redis failure only costs the shared hit.
+    """
+
+    def __init__(self, max_entries=RESPONSE_CACHE_CONFIG['max_entries'],
+                 redis_url=os.getenv("RESPONSE_CACHE_REDIS_URL", RESPONSE_CACHE_CONFIG['redis_url']),
+                 key_prefix=RESPONSE_CACHE_CONFIG['key_prefix'],
+                 ttl_seconds=RESPONSE_CACHE_CONFIG['ttl_seconds']):
+        self.max_entries = max_entries
+        self.key_prefix = key_prefix
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._redis = None
+        if redis_url:
+            if redis is None:
+                logger.warning("RESPONSE_CACHE redis_url is set but the redis package is not installed")
+            else:
+                self._redis = redis.Redis.from_url(redis_url)
+
+    @staticmethod
+    def _params_digest(params):
+        data = json.dumps(params, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(data).hexdigest()
+
+    def _get_local(self, key):
+        namespace, version = key[0], key[1]
+        with self._lock:
+            known = self._versions.get(namespace)
+            if known is None or version > known:
+                # The namespace moved on: drop what was built from older data
+                for stale in [k for k in self._entries if k[0] == namespace]:
+                    del self._entries[stale]
+                self._versions[namespace] = version
+                return None
+            if version < known:
+                return None
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _put_local(self, key, value):
+        with self._lock:
+            if self._versions.get(key[0]) != key[1]:
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _shared_key(self, key):
+        return ":".join((self.key_prefix, *(str(part) for part in key)))
+
+    def _get_shared(self, key):
+        if self._redis is None:
+            return None
+        try:
+            data = self._redis.get(self._shared_key(key))
+            return json.loads(data) if data is not None else None
+        except Exception as e:
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+
+    def _put_shared(self, key, value):
+        if self._redis is None:
+            return
+        try:
+            data = json.dumps(jsonable_encoder(value), separators=(",", ":"))
+            self._redis.set(self._shared_key(key), data, ex=self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+    def get_or_build(self, namespace, route, params, build, version=None):
+        """Cached response of `route` for `params`, or `build()` if `namespace` changed since.
+
+        `version` defaults to the data version of `namespace`; callers tracking
+        their own (never decreasing) version pass it instead. It is read before
+        building, so a write landing during the build leaves the response under
+        the old key instead of the new one. Exceptions raised by `build` (404s
+        included) are not cached.
+        """
+        if version is None:
+            version = data_versions.current(namespace)
+        key = (namespace, version, route, self._params_digest(params))
+        value = self._get_local(key)
+        if value is not None:
+            return value
+        value = self._get_shared(key)
+        if value is None:
+            value = build()
+            self._put_shared(key, value)
+        self._put_local(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+response_cache = ResponseCache()
@@ -1,8 +1,10 @@
+import os
 import pandas as pd
 import numpy as np
 from app.core.config import logger, SCORING_WEIGHTS, SEGMENT_THRESHOLDS, RISK_THRESHOLDS
 from app.core.scoring.individual_scoring import calculate_individual_scores
 from app.core.scoring.business_scoring import calculate_business_scores
+from app.services.data_version import data_versions, PUBLISHED_SCORES
 
 class ScoringService:
     def __init__(self):
@@ -10,6 +12,9 @@ class ScoringService:
         self.scored_businesses = pd.DataFrame()
         self.df_contrats = None
         self.df_products = None
+        # PUBLISHED_SCORES version and paths of the last load_scores, None if never loaded
+        self.loaded_version = None
+        self._paths = None
     
     def score_all_clients(self, df_contrats, df_clients, df_personne_morale):
         """Score both individual and business clients separately"""
@@ -32,6 +37,7 @@ class ScoringService:
     
     def get_scored_clients(self, client_type='all'):
         """Get scored clients by type"""
+        self.reload_if_published()
         if client_type == 'individual':
             return self.scored_individuals
         elif client_type == 'business':
@@ -53,6 +59,9 @@ class ScoringService:
     def load_scores(self, individual_path="data/processed/individual_scores.parquet",
                    business_path="data/processed/business_scores.parquet"):
         """Load scores from separate files"""
+        # Read before the files: a publish landing meanwhile triggers another reload
+        self.loaded_version = data_versions.current(PUBLISHED_SCORES)
+        self._paths = (individual_path, business_path)
         if os.path.exists(individual_path):
             self.scored_individuals = pd.read_parquet(individual_path)
             logger.info(f"Individual scores loaded from {individual_path}")
@@ -61,4 +70,11 @@ class ScoringService:
             self.scored_businesses = pd.read_parquet(business_path)
             logger.info(f"Business scores loaded from {business_path}")
 
-scoring_service = ScoringService()
\ No newline at end of file
+    def reload_if_published(self):
+        """Reload the scores if a score job published new files since, whichever worker ran its hook"""
+        if self.loaded_version is None or self.loaded_version == data_versions.current(PUBLISHED_SCORES):
+            return False
+        self.load_scores(*self._paths)
+        return True
+
+scoring_service = ScoringService()
@@ -0,0 +1,14 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.table_version import TableVersion
+
+def table_versions(db: Session, *tables):
+    """Write counters of `tables`, in order; 0 for a table without a counter row.
+
+    One primary-key read, so routes can call it on every request to tag
+    responses built from these tables, whoever wrote them.
+    """
+    rows = dict(db.execute(
+        select(TableVersion.name, TableVersion.version).where(TableVersion.name.in_(tables))
+    ).all())
+    return tuple(rows.get(table, 0) for table in tables)
@@ -0,0 +1,41 @@
+import json
+import hashlib
+from fastapi import Request, Response
+
+# Let browsers keep the body but revalidate it on every navigation
+CACHE_CONTROL = "private, no-cache"
+
+def make_etag(request: Request, *parts):
+    """Weak ETag of the requested path and query parameters at the data state given by `parts`.
+
+    `parts` must change whenever the response would: a data version, a
+    table's write counter, a row's updated_at, the current date for bodies
+    derived from it.
+    """
+    query = sorted(request.query_params.multi_items())
+    data = json.dumps([request.url.path, query, *parts], default=str, separators=(",", ":"))
+    return f'W/"{hashlib.sha256(data.encode("utf-8")).hexdigest()[:32]}"'
+
+def _opaque(tag):
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def etag_matches(request: Request, etag):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(_opaque(tag) == _opaque(etag) for tag in header.split(","))
+
+def not_modified(request: Request, response: Response, etag):
+    """A 304 response if the client already holds `etag`; otherwise None, with `response` tagged.
+
+    Routes call this before loading or serialising anything and return the
+    304 as is.
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
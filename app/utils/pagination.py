@@ -0,0 +1,113 @@
+import json
+import base64
+import hashlib
+from datetime import datetime
+from decimal import Decimal
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+def _order_digest(order):
+    data = json.dumps(order, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()[:16]
+
+def _encode_value(value):
+    # datetimes and decimals are tagged so they compare exactly once decoded
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+def _decode_value(value):
+    if not isinstance(value, dict):
+        return value
+    if "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return Decimal(value["dec"])
+
+def encode_cursor(order, values):
+    """Opaque cursor for the row after which the next page starts.
+
+    `order` is any JSON-serialisable description of the sort and filters the
+    cursor was issued for; only its digest is stored, and a cursor reused with
+    a different listing is rejected instead of silently skipping rows.
+    """
+    payload = {"o": _order_digest(order), "v": [_encode_value(value) for value in values]}
+    data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor, order, size):
+    """The `size` values encoded by `encode_cursor`; 400 if the cursor is malformed or for another order"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        values = [_decode_value(value) for value in payload["v"]]
+    except (ValueError, KeyError, TypeError, ArithmeticError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+    if payload.get("o") != _order_digest(order) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort or filters")
+    return values
+
+def _regions(sort_col, null_value):
+    """(non-null, null) filters; a `null_value` sentinel must sort below every real value"""
+    if null_value is None:
+        return sort_col.isnot(None), sort_col.is_(None)
+    return sort_col > null_value, sort_col == null_value
+
+def keyset_page(query, sort_col, key_col, direction, after, limit, null_value=None):
+    """One page of `query` ordered by `sort_col` (nulls last) then `key_col`, both in `direction`.
+
+    `after` is the (sort value, key) of the previous page's last row, or None
+    for the first page. The non-null rows are read first as a range on
+    (sort_col, key_col), then the null region as a range on key_col, so every
+    page is an index range scan whatever its depth. A persisted sort key that
+    stores nulls as `null_value` is paged the same way. Returns up to
+    `limit` + 1 rows; the extra row only tells whether there is a next page.
+    """
+    ascending = direction == "asc"
+    order = (sort_col.asc(), key_col.asc()) if ascending else (sort_col.desc(), key_col.desc())
+    non_null_region, null_region = _regions(sort_col, null_value)
+    after_value, after_key = after if after is not None else (None, None)
+    after_null = after is not None and after_value == null_value
+
+    rows = []
+    if not after_null:
+        non_null = query.filter(non_null_region)
+        if after is not None:
+            bound = tuple_(sort_col, key_col)
+            non_null = non_null.filter(bound > (after_value, after_key) if ascending else bound < (after_value, after_key))
+        rows = non_null.order_by(*order).limit(limit + 1).all()
+        if len(rows) > limit:
+            return rows
+
+    nulls = query.filter(null_region)
+    if after_null:
+        nulls = nulls.filter(key_col > after_key if ascending else key_col < after_key)
+    return rows + nulls.order_by(order[1]).limit(limit + 1 - len(rows)).all()
+
+def offset_page(query, sort_col, key_col, direction, offset, limit, null_value=None, count=None):
+    """Offset-mode counterpart of `keyset_page`: the same order, addressed by row number.
+
+    The offset is resolved against the non-null region first, then continued
+    into the null region, so neither part needs a sort on a nulls-last
+    expression. Only a page lying wholly in the null region needs the size of
+    the non-null region; a page ending in it or straddling the boundary knows
+    it from its own rows. `count(query)` returns that size, e.g. from a cache;
+    by default the region is counted.
+    """
+    ascending = direction == "asc"
+    order = (sort_col.asc(), key_col.asc()) if ascending else (sort_col.desc(), key_col.desc())
+    if null_value is not None and not ascending:
+        # The sentinel already sorts last: one range over the index
+        return query.order_by(*order).offset(offset).limit(limit).all()
+    non_null_region, null_region = _regions(sort_col, null_value)
+
+    non_null = query.filter(non_null_region)
+    rows = non_null.order_by(*order).offset(offset).limit(limit).all()
+    if len(rows) == limit:
+        return rows
+    null_offset = 0
+    if not rows:
+        non_null_count = count(non_null) if count is not None else non_null.count()
+        null_offset = max(0, offset - non_null_count)
+    return rows + query.filter(null_region).order_by(order[1]).offset(null_offset).limit(limit - len(rows)).all()
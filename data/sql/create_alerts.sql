@@ -6,7 +6,6 @@ CREATE TABLE alerts (
     contract_id DECIMAL(15, 2),
     product VARCHAR(108),
     expiration_date DATETIME,
-    days_until_expiry DECIMAL(15, 2),
     cancellation_date DATETIME,
     active_contracts DECIMAL(15, 2),
     total_premium DECIMAL(15, 2)
@@ -0,0 +1,13 @@
+-- Audit copy of the alerts removed by the retention job (app/core/tasks/alert_retention.py)
+CREATE TABLE IF NOT EXISTS alerts_archive (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    REF_PERSONNE INT NOT NULL,
+    alert_type VARCHAR(255) NOT NULL,
+    alert_message VARCHAR(500) NOT NULL,
+    alert_severity VARCHAR(50) NOT NULL,
+    product VARCHAR(500) NULL,
+    expiration_date DATETIME NULL,
+    archived_at DATETIME NOT NULL,
+    archive_reason VARCHAR(50) NOT NULL,
+    INDEX ix_alerts_archive_REF_PERSONNE (REF_PERSONNE)
+);
@@ -0,0 +1,8 @@
+-- Ids of the product names in recommended_products (app/services/product_catalog.py).
+-- Ids are positions assigned in order and never reused; the unique name keeps
+-- two processes registering the same product from getting different ids.
+CREATE TABLE IF NOT EXISTS product_catalog (
+    product_id INT NOT NULL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    UNIQUE KEY ux_product_catalog_name (name)
+);
@@ -0,0 +1,20 @@
+-- Incremental alert sync.
+--
+-- contracts.updated_at is maintained by MySQL on every insert and update, so
+-- loaders need no change; the sync only re-reads contracts changed since the
+-- watermark it stores in sync_watermarks. Existing rows get the migration
+-- time, which the first (full) sync then records as the starting watermark.
+
+ALTER TABLE contracts
+    ADD COLUMN updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP;
+
+CREATE INDEX ix_contracts_updated_at ON contracts (updated_at);
+
+CREATE TABLE IF NOT EXISTS sync_watermarks (
+    name VARCHAR(64) PRIMARY KEY,
+    value DATETIME NULL,
+    updated_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- days_until_expiry is now derived from expiration_date when alerts are read
+ALTER TABLE alerts DROP COLUMN days_until_expiry;
@@ -0,0 +1,12 @@
+-- Indexes for the keyset pagination of GET /alerts.
+--
+-- Expiry-sorted pages read a range of (expiration_date, REF_PERSONNE), either
+-- over the whole table or within one severity, type or product. Pages sorted
+-- by REF_PERSONNE use the primary key, which InnoDB also appends to every
+-- secondary index, so the filtered reference sorts are served by the same
+-- indexes.
+
+CREATE INDEX ix_alerts_expiration_ref ON alerts (expiration_date, REF_PERSONNE);
+CREATE INDEX ix_alerts_severity_expiration_ref ON alerts (alert_severity, expiration_date, REF_PERSONNE);
+CREATE INDEX ix_alerts_type_expiration_ref ON alerts (alert_type, expiration_date, REF_PERSONNE);
+CREATE INDEX ix_alerts_product_expiration_ref ON alerts (product, expiration_date, REF_PERSONNE);
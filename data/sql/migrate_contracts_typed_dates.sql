@@ -0,0 +1,26 @@
+-- Typed date columns for contracts, step 1 of 2.
+--
+-- EFFET_CONTRAT, DATE_EXPIRATION and PROCHAIN_TERME are stored as TEXT. This step
+-- adds DATETIME shadow columns next to them. Fill them in chunks with
+--
+--     python -m app.core.tasks.contract_date_backfill
+--
+-- then run migrate_contracts_typed_dates_finalize.sql to swap the columns and
+-- create the expiry indexes.
+
+ALTER TABLE contracts
+    ADD COLUMN EFFET_CONTRAT_dt DATETIME NULL,
+    ADD COLUMN DATE_EXPIRATION_dt DATETIME NULL,
+    ADD COLUMN PROCHAIN_TERME_dt DATETIME NULL;
+
+-- The backfill runs this statement for consecutive `index` ranges (shown here
+-- for DATE_EXPIRATION; the other two columns use the same expression):
+--
+-- UPDATE contracts SET DATE_EXPIRATION_dt = CASE
+--     WHEN DATE_EXPIRATION REGEXP '^[0-9]{4}-[0-9]{2}-[0-9]{2}[ T][0-9]{2}:[0-9]{2}:[0-9]{2}'
+--         THEN STR_TO_DATE(LEFT(REPLACE(DATE_EXPIRATION, 'T', ' '), 19), '%Y-%m-%d %H:%i:%s')
+--     WHEN DATE_EXPIRATION REGEXP '^[0-9]{4}-[0-9]{2}-[0-9]{2}$' THEN STR_TO_DATE(DATE_EXPIRATION, '%Y-%m-%d')
+--     WHEN DATE_EXPIRATION REGEXP '^[0-9]{2}/[0-9]{2}/[0-9]{4}$' THEN STR_TO_DATE(DATE_EXPIRATION, '%d/%m/%Y')
+--     WHEN DATE_EXPIRATION REGEXP '^[0-9]{2}-[0-9]{2}-[0-9]{4}$' THEN STR_TO_DATE(DATE_EXPIRATION, '%d-%m-%Y')
+-- END
+-- WHERE `index` BETWEEN :start AND :end;
@@ -0,0 +1,22 @@
+-- Typed date columns for contracts, step 2 of 2 (after the backfill).
+--
+-- The DATETIME columns take over the original names; the text values are kept
+-- as *_text until the conversion has been checked, and can then be dropped.
+
+ALTER TABLE contracts
+    RENAME COLUMN EFFET_CONTRAT TO EFFET_CONTRAT_text,
+    RENAME COLUMN DATE_EXPIRATION TO DATE_EXPIRATION_text,
+    RENAME COLUMN PROCHAIN_TERME TO PROCHAIN_TERME_text,
+    RENAME COLUMN EFFET_CONTRAT_dt TO EFFET_CONTRAT,
+    RENAME COLUMN DATE_EXPIRATION_dt TO DATE_EXPIRATION,
+    RENAME COLUMN PROCHAIN_TERME_dt TO PROCHAIN_TERME;
+
+-- Expiry range scans (alert sync) and per-client expiry lookups
+CREATE INDEX ix_contracts_date_expiration ON contracts (DATE_EXPIRATION);
+CREATE INDEX ix_contracts_ref_date_expiration ON contracts (REF_PERSONNE, DATE_EXPIRATION);
+
+-- Once verified:
+-- ALTER TABLE contracts
+--     DROP COLUMN EFFET_CONTRAT_text,
+--     DROP COLUMN DATE_EXPIRATION_text,
+--     DROP COLUMN PROCHAIN_TERME_text;
@@ -0,0 +1,29 @@
+-- Persisted nulls-last sort key and listing indexes for the recommendation tables.
+--
+-- sort_key is client_score with NULL stored as -1 (scores are never negative),
+-- so "score desc, nulls last" is a plain descending range over an index and
+-- the ascending order reads the sort_key > -1 range followed by the -1 range.
+-- Each supported filter combination of GET /clients/morale and
+-- /clients/physique (client_segment, risk_profile, both or none) has an index
+-- for the score sort and one for the reference sort; InnoDB appends the
+-- primary key to the latter.
+
+ALTER TABLE individual_recommendations
+    ADD COLUMN sort_key DECIMAL(30, 20) AS (COALESCE(client_score, -1)) STORED,
+    ADD INDEX ix_individual_rec_segment_risk_sort (client_segment, risk_profile, sort_key, REF_PERSONNE),
+    ADD INDEX ix_individual_rec_risk_sort (risk_profile, sort_key, REF_PERSONNE),
+    ADD INDEX ix_individual_rec_segment_sort (client_segment, sort_key, REF_PERSONNE),
+    ADD INDEX ix_individual_rec_sort (sort_key, REF_PERSONNE),
+    ADD INDEX ix_individual_rec_segment_risk_ref (client_segment, risk_profile, REF_PERSONNE),
+    ADD INDEX ix_individual_rec_risk_ref (risk_profile, REF_PERSONNE),
+    ADD INDEX ix_individual_rec_segment_ref (client_segment, REF_PERSONNE);
+
+ALTER TABLE business_recommendations
+    ADD COLUMN sort_key DECIMAL(30, 20) AS (COALESCE(client_score, -1)) STORED,
+    ADD INDEX ix_business_rec_segment_risk_sort (client_segment, risk_profile, sort_key, REF_PERSONNE),
+    ADD INDEX ix_business_rec_risk_sort (risk_profile, sort_key, REF_PERSONNE),
+    ADD INDEX ix_business_rec_segment_sort (client_segment, sort_key, REF_PERSONNE),
+    ADD INDEX ix_business_rec_sort (sort_key, REF_PERSONNE),
+    ADD INDEX ix_business_rec_segment_risk_ref (client_segment, risk_profile, REF_PERSONNE),
+    ADD INDEX ix_business_rec_risk_ref (risk_profile, REF_PERSONNE),
+    ADD INDEX ix_business_rec_segment_ref (client_segment, REF_PERSONNE);
@@ -0,0 +1,57 @@
+-- Write counters of the tables served with ETags (app/models/table_version.py).
+--
+-- The recommendation tables, contracts and history are also loaded by SQL run
+-- outside the API, which never bumps the API's data versions. A trigger per
+-- operation adds one to the table's counter for every row inserted, updated
+-- or deleted (LOAD DATA included), so conditional GETs and cached responses
+-- see those loads as soon as they commit. The counter row is updated inside
+-- the writing transaction: concurrent writers of one table queue on it.
+
+CREATE TABLE IF NOT EXISTS table_versions (
+    name VARCHAR(64) NOT NULL PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT IGNORE INTO table_versions (name, version) VALUES
+    ('contracts', 0),
+    ('history', 0),
+    ('individual_recommendations', 0),
+    ('business_recommendations', 0);
+
+CREATE TRIGGER contracts_insert_version AFTER INSERT ON contracts
+    FOR EACH ROW UPDATE table_versions SET version = version + 1 WHERE name = 'contracts';
+CREATE TRIGGER contracts_update_version AFTER UPDATE ON contracts
+    FOR EACH ROW UPDATE table_versions SET version = version + 1 WHERE name = 'contracts';
+CREATE TRIGGER contracts_delete_version AFTER DELETE ON contracts
+    FOR EACH ROW UPDATE table_versions SET version = version + 1 WHERE name = 'contracts';
+
+CREATE TRIGGER history_insert_version AFTER INSERT ON history
+    FOR EACH ROW UPDATE table_versions SET version = version + 1 WHERE name = 'history';
+CREATE TRIGGER history_update_version AFTER UPDATE ON history
+    FOR EACH ROW UPDATE table_versions SET version = version + 1 WHERE name = 'history';
+CREATE TRIGGER history_delete_version AFTER DELETE ON history
+    FOR EACH ROW UPDATE table_versions SET version = version + 1 WHERE name = 'history';
+
+CREATE TRIGGER individual_recommendations_insert_version AFTER INSERT ON individual_recommendations
+    FOR EACH ROW UPDATE table_versions SET version = version + 1 WHERE name = 'individual_recommendations';
+CREATE TRIGGER individual_recommendations_update_version AFTER UPDATE ON individual_recommendations
+    FOR EACH ROW UPDATE table_versions SET version = version + 1 WHERE name = 'individual_recommendations';
+CREATE TRIGGER individual_recommendations_delete_version AFTER DELETE ON individual_recommendations
+    FOR EACH ROW UPDATE table_versions SET version = version + 1 WHERE name = 'individual_recommendations';
+
+CREATE TRIGGER business_recommendations_insert_version AFTER INSERT ON business_recommendations
+    FOR EACH ROW UPDATE table_versions SET version = version + 1 WHERE name = 'business_recommendations';
+CREATE TRIGGER business_recommendations_update_version AFTER UPDATE ON business_recommendations
+    FOR EACH ROW UPDATE table_versions SET version = version + 1 WHERE name = 'business_recommendations';
+CREATE TRIGGER business_recommendations_delete_version AFTER DELETE ON business_recommendations
+    FOR EACH ROW UPDATE table_versions SET version = version + 1 WHERE name = 'business_recommendations';
+
+-- Microsecond updated_at: the contract detail ETag hashes it, and two edits
+-- within one second must not share a tag
+ALTER TABLE contracts
+    MODIFY COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
+
+-- The incremental alert sync stores MAX(contracts.updated_at) as its watermark:
+-- a DATETIME would round it to the second and skip the rows in between
+ALTER TABLE sync_watermarks
+    MODIFY COLUMN value DATETIME(6) NULL;
@@ -0,0 +1,47 @@
+import os
+import tempfile
+
+# app.db.base builds the engine at import time: point it at a throwaway SQLite file first
+_database_dir = tempfile.mkdtemp(prefix="insurance_recommendation_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_database_dir, 'test.db')}"
+
+import pytest
+
+from app.db.base import Base, SessionLocal, engine
+import app.models.alerts  # noqa: F401 - registers the tables
+import app.models.contract  # noqa: F401
+import app.models.individual_rec  # noqa: F401
+import app.models.business_rec  # noqa: F401
+import app.models.sync_watermark  # noqa: F401
+import app.models.history  # noqa: F401
+from app.models.table_version import TableVersion
+from app.services.data_version import data_versions
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        for table in reversed(Base.metadata.sorted_tables):
+            # The counters are seeded once with the schema and only ever grow
+            if table is not TableVersion.__table__:
+                session.execute(table.delete())
+        session.commit()
+        session.close()
+
+
+@pytest.fixture(autouse=True)
+def isolated_data_versions(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_versions, "path", str(tmp_path / "data_versions.json"))
+    monkeypatch.setattr(data_versions, "_versions", {})
+    monkeypatch.setattr(data_versions, "_stamp", None)
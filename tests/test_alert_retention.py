@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+from app.core.tasks.alert_retention import archive_and_delete, run_alert_retention_once_sync
+from app.models.alerts import Alert, AlertArchive
+from app.models.contract import Contract
+from app.services.data_version import data_versions, ALERTS
+
+
+def _alert(ref, expiration, alert_type="contract_expiry"):
+    return Alert(REF_PERSONNE=ref, alert_type=alert_type, alert_message=f"alert {ref}",
+                 alert_severity="High", product="Auto", expiration_date=expiration)
+
+
+def _day(days):
+    return datetime.combine(datetime.now().date() + timedelta(days=days), datetime.min.time())
+
+
+def test_archives_expired_and_superseded_alerts_only(db):
+    db.add_all([
+        Contract(index=1, REF_PERSONNE=1, DATE_EXPIRATION=_day(10)),
+        Contract(index=2, REF_PERSONNE=2, DATE_EXPIRATION=_day(375)),   # renewed since its alert
+        Contract(index=3, REF_PERSONNE=5, DATE_EXPIRATION=_day(-60)),
+        _alert(1, _day(10)),                      # current
+        _alert(2, _day(10)),                      # superseded by the renewal
+        _alert(3, None, alert_type="manual"),     # no date: kept
+        _alert(4, _day(10)),                      # contract removed: superseded
+        _alert(5, _day(-60)),                     # expired beyond retention
+        _alert(6, _day(-10)),                     # expired within retention, contract gone: superseded
+    ])
+    db.commit()
+
+    summary = run_alert_retention_once_sync(retention_days=30, batch_size=2, archive=True)
+
+    assert summary == {"expired": 1, "superseded": 3}
+    assert sorted(alert.REF_PERSONNE for alert in db.query(Alert)) == [1, 3]
+    archived = {row.REF_PERSONNE: row.archive_reason for row in db.query(AlertArchive)}
+    assert archived == {5: "expired", 2: "superseded", 4: "superseded", 6: "superseded"}
+    assert data_versions.current(ALERTS) == 1
+
+    assert run_alert_retention_once_sync(retention_days=30, batch_size=2) == {"expired": 0, "superseded": 0}
+    assert data_versions.current(ALERTS) == 1
+
+
+def test_rows_rewritten_after_selection_are_left_alone(db):
+    db.add(_alert(1, _day(20)))
+    db.commit()
+
+    # Picked as expired, but the sync rewrote it for the next contract meanwhile
+    removed = archive_and_delete(db, [1], Alert.expiration_date < _day(-30), "expired", True)
+
+    assert removed == []
+    assert db.query(Alert).count() == 1
+    assert db.query(AlertArchive).count() == 0
+
+
+def test_archive_can_be_turned_off(db):
+    db.add(_alert(1, _day(-60)))
+    db.commit()
+
+    assert run_alert_retention_once_sync(retention_days=30, archive=False) == {"expired": 1, "superseded": 0}
+    assert db.query(Alert).count() == 0
+    assert db.query(AlertArchive).count() == 0
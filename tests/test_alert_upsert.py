@@ -0,0 +1,48 @@
+from datetime import date, datetime, timedelta
+
+from app.core.tasks.alert_updater import upsert_alerts, _sync_alerts_in_python
+from app.models.alerts import Alert
+from app.models.contract import Contract
+
+
+def _row(ref, message):
+    return {
+        "REF_PERSONNE": ref,
+        "alert_type": "contract_expiry",
+        "alert_message": message,
+        "alert_severity": "High",
+        "product": "Auto",
+        "expiration_date": datetime(2026, 11, 1),
+    }
+
+
+def test_upsert_counts_created_and_updated_rows(db):
+    assert upsert_alerts(db, [_row(ref, "first") for ref in (1, 2, 3)], chunk_size=2) == (3, 0)
+    db.commit()
+
+    rows = [_row(2, "second"), _row(3, "second"), _row(4, "second")]
+    assert upsert_alerts(db, rows, chunk_size=2) == (1, 2)
+    db.commit()
+
+    messages = {alert.REF_PERSONNE: alert.alert_message for alert in db.query(Alert)}
+    assert messages == {1: "first", 2: "second", 3: "second", 4: "second"}
+
+
+def test_upsert_of_nothing_writes_nothing(db):
+    assert upsert_alerts(db, []) == (0, 0)
+    assert db.query(Alert).count() == 0
+
+
+def test_python_sync_breaks_expiry_ties_on_the_contract_index(db):
+    today = date(2026, 10, 1)
+    expiration = datetime(2026, 10, 20)
+    # inserted out of index order, so only the tie-break can pick the lower index
+    for index, num_contrat in ((7, 700), (3, 300), (5, 500)):
+        db.add(Contract(index=index, REF_PERSONNE=1, NUM_CONTRAT=num_contrat, LIB_PRODUIT="Auto",
+                        DATE_EXPIRATION=expiration))
+    db.commit()
+
+    _sync_alerts_in_python(db, today, today + timedelta(days=30), pid=0)
+    db.commit()
+
+    assert db.query(Alert).one().alert_message.startswith("Contract 300 ")
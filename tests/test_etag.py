@@ -0,0 +1,63 @@
+from starlette.requests import Request
+from starlette.responses import Response
+
+from sqlalchemy import text
+
+from app.api.routes.client import get_client
+from app.services.table_version import table_versions
+from app.utils.etag import make_etag, not_modified
+
+
+def _request(query="", if_none_match=None, path="/alerts/"):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": path,
+                    "query_string": query.encode(), "headers": headers})
+
+
+def test_etag_ignores_query_parameter_order_but_not_values():
+    assert make_etag(_request("limit=10&offset=0"), 3) == make_etag(_request("offset=0&limit=10"), 3)
+    assert make_etag(_request("limit=10"), 3) != make_etag(_request("limit=20"), 3)
+    assert make_etag(_request("limit=10"), 3) != make_etag(_request("limit=10"), 4)
+    assert make_etag(_request(path="/alerts/1"), 3) != make_etag(_request(path="/alerts/2"), 3)
+
+
+def test_tags_the_response_when_the_client_has_no_copy():
+    request, response = _request(), Response()
+    etag = make_etag(request, 1)
+    assert not_modified(request, response, etag) is None
+    assert response.headers["etag"] == etag
+
+
+def test_answers_304_for_a_matching_if_none_match():
+    etag = make_etag(_request(), 1)
+    for header in (etag, f'"other", {etag}', etag[2:], "*"):
+        answer = not_modified(_request(if_none_match=header), Response(), etag)
+        assert answer.status_code == 304
+        assert answer.headers["etag"] == etag
+    assert not_modified(_request(if_none_match='W/"stale"'), Response(), etag) is None
+
+
+def test_table_counters_move_with_writes_made_outside_the_orm(db):
+    before = table_versions(db, "individual_recommendations", "contracts")
+    db.execute(text("INSERT INTO individual_recommendations (REF_PERSONNE) VALUES (1), (2)"))
+    db.execute(text("UPDATE individual_recommendations SET client_score = 1 WHERE REF_PERSONNE = 1"))
+    db.execute(text("DELETE FROM individual_recommendations WHERE REF_PERSONNE = 2"))
+    db.commit()
+
+    after = table_versions(db, "individual_recommendations", "contracts")
+    assert after == (before[0] + 4, before[1])
+
+
+def test_client_detail_is_neither_304_nor_cached_after_an_external_load(db):
+    db.execute(text("INSERT INTO business_recommendations (REF_PERSONNE, RAISON_SOCIALE) VALUES (1, 'Before')"))
+    db.commit()
+    response = Response()
+    assert get_client(1, _request(path="/clients/1"), response, db)["raison_sociale"] == "Before"
+    etag = response.headers["etag"]
+
+    # A load run outside the API: no data version is bumped, only the table counter moves
+    db.execute(text("UPDATE business_recommendations SET RAISON_SOCIALE = 'After' WHERE REF_PERSONNE = 1"))
+    db.commit()
+    response = Response()
+    assert get_client(1, _request(path="/clients/1", if_none_match=etag), response, db)["raison_sociale"] == "After"
+    assert response.headers["etag"] != etag
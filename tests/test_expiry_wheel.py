@@ -0,0 +1,85 @@
+from datetime import date, datetime
+
+from app.core.tasks.alert_updater import _changed_clients
+from app.core.tasks.expiry_wheel import ExpiryWheel, EXPIRY, expiry_wheel
+from app.models.contract import Contract
+
+TODAY = date(2026, 10, 1)
+
+
+def _wheel(*contracts):
+    wheel = ExpiryWheel(thresholds=(30, 15, 7))
+    wheel.load(contracts, TODAY)
+    return wheel
+
+
+def test_fires_each_threshold_then_the_day_the_contract_leaves_the_window():
+    # Expires at noon on Oct 21: 15 days before is Oct 6, 7 days before Oct 14, out of the window Oct 22
+    wheel = _wheel((1, 100, datetime(2026, 10, 21, 12, 0)))
+
+    assert wheel.advance(date(2026, 10, 5)) == []
+    fired = wheel.advance(date(2026, 10, 6))
+    assert [(event.kind, event.ref_personne, event.days_before) for event in fired] == [(EXPIRY, 100, 15)]
+    assert [event.days_before for event in wheel.advance(date(2026, 10, 14))] == [7]
+    assert [event.days_before for event in wheel.advance(date(2026, 10, 22))] == [0]
+    assert len(wheel) == 0
+
+
+def test_missed_days_fire_once_with_the_latest_threshold_rescheduled():
+    wheel = _wheel((1, 100, datetime(2026, 10, 21)))
+    # Oct 6 and Oct 14 are both due: only the first pops, the next one is rescheduled past today
+    assert [event.days_before for event in wheel.advance(date(2026, 10, 15))] == [15]
+    assert [event.days_before for event in wheel.advance(date(2026, 10, 21))] == [0]
+
+
+def test_reschedule_replaces_the_pending_entry_of_a_changed_contract():
+    wheel = _wheel((1, 100, datetime(2026, 10, 21)))
+    wheel.reschedule([(1, 100, datetime(2026, 12, 31))])
+
+    # The superseded Oct 6 entry is skipped; the renewed contract is 30 days out on Dec 1
+    assert wheel.advance(date(2026, 11, 30)) == []
+    assert [event.days_before for event in wheel.advance(date(2026, 12, 1))] == [30]
+
+
+def test_contracts_without_a_pending_threshold_are_not_scheduled():
+    wheel = _wheel((1, 100, None), (2, 200, datetime(2026, 9, 1)))
+    assert len(wheel) == 0
+    assert wheel.loaded
+
+
+def test_clear_forgets_the_schedule():
+    wheel = _wheel((1, 100, datetime(2026, 10, 21)))
+    wheel.clear()
+    assert not wheel.loaded
+    assert len(wheel) == 0
+
+
+def test_contracts_past_the_horizon_are_taken_in_as_the_window_rolls():
+    wheel = _wheel((1, 100, datetime(2026, 10, 21)))
+    assert wheel.horizon == date(2026, 11, 1)
+
+    # Dec 1 comes within 30 days on Nov 1; contract 1 is already scheduled and is not doubled
+    wheel.extend([(1, 100, datetime(2026, 10, 21)), (2, 200, datetime(2026, 12, 1))], date(2026, 11, 2))
+    assert wheel.horizon == date(2026, 11, 2)
+    assert [event.ref_personne for event in wheel.advance(date(2026, 10, 21))] == [100]
+    assert [(event.ref_personne, event.days_before) for event in wheel.advance(date(2026, 11, 1))] == [(200, 30)]
+
+
+def test_changed_clients_loads_only_the_window_and_extends_it(db):
+    db.add_all([
+        Contract(index=1, REF_PERSONNE=100, DATE_EXPIRATION=datetime(2026, 10, 21)),
+        Contract(index=2, REF_PERSONNE=200, DATE_EXPIRATION=datetime(2027, 6, 1)),
+    ])
+    db.commit()
+    since = datetime(2030, 1, 1)
+    try:
+        _changed_clients(db, TODAY, since, TODAY)
+        assert expiry_wheel.horizon == date(2026, 11, 1)
+        assert len(expiry_wheel) == 1
+
+        refs, events = _changed_clients(db, date(2027, 5, 2), since, TODAY)
+        # contract 1 fires its catch-up threshold; contract 2 was only read by the extension
+        assert refs == [100, 200]
+        assert (200, 30) in [(event.ref_personne, event.days_before) for event in events]
+    finally:
+        expiry_wheel.clear()
@@ -0,0 +1,35 @@
+from datetime import date, datetime, timedelta
+
+from app.core.tasks.alert_updater import _sync_changed_clients
+from app.models.alerts import Alert, AlertArchive
+from app.models.contract import Contract
+
+TODAY = date(2026, 10, 1)
+CUTOFF = TODAY + timedelta(days=30)
+
+
+def _contract(index, ref, expiration):
+    return Contract(index=index, REF_PERSONNE=ref, NUM_CONTRAT=index * 100, LIB_PRODUIT="Auto",
+                    DATE_EXPIRATION=expiration)
+
+
+def _alert(ref, alert_type="contract_expiry"):
+    return Alert(REF_PERSONNE=ref, alert_type=alert_type, alert_message="old", alert_severity="High",
+                 expiration_date=datetime(2026, 10, 10))
+
+
+def test_changed_clients_without_a_window_contract_lose_their_expiry_alert(db):
+    db.add_all([
+        _contract(1, 1, datetime(2026, 10, 15)),
+        # renewed: now expires after the window
+        _contract(2, 2, datetime(2027, 10, 10)),
+        _alert(1), _alert(2), _alert(3, alert_type="manual"),
+    ])
+    db.commit()
+
+    summary = _sync_changed_clients(db, TODAY, CUTOFF, [1, 2, 3], pid=0)
+    db.commit()
+
+    assert (summary["updated"], summary["deleted"]) == (1, 1)
+    assert {alert.REF_PERSONNE for alert in db.query(Alert)} == {1, 3}
+    assert [(row.REF_PERSONNE, row.archive_reason) for row in db.query(AlertArchive)] == [(2, "superseded")]
@@ -0,0 +1,38 @@
+import json
+import os
+
+from app.services.job_manager import JobStore
+
+
+def _store(tmp_path):
+    return JobStore(directory=str(tmp_path / "jobs"))
+
+
+def test_jobs_of_a_live_owner_are_left_running(tmp_path):
+    owner = _store(tmp_path)
+    job = owner.create("score", {})
+    owner.update(job['job_id'], status='running')
+
+    # A second store, as in a worker or a restarted API process, sees the owner's lock held
+    _store(tmp_path)
+    assert owner.get(job['job_id'])['status'] == 'running'
+
+
+def test_jobs_of_a_gone_owner_are_failed_even_if_the_pid_is_reused(tmp_path):
+    store = _store(tmp_path)
+    job = store.create("score", {})
+    job.update(status='running', owner='0' * 32, owner_pid=os.getpid())
+    with open(os.path.join(store.directory, f"{job['job_id']}.json"), "w", encoding="utf-8") as f:
+        json.dump(job, f)
+
+    store.fail_orphaned()
+    assert store.get(job['job_id'])['status'] == 'failed'
+
+
+def test_terminal_status_is_not_overwritten(tmp_path):
+    store = _store(tmp_path)
+    job = store.create("score", {})
+    store.update(job['job_id'], status='completed', stage='completed', result={'rows': 1})
+
+    assert store.update(job['job_id'], status='failed', error="late")['status'] == 'completed'
+    assert store.get(job['job_id'])['error'] is None
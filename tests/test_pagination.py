@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.alerts import Alert
+from app.models.individual_rec import IndividualRec
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_page, offset_page
+
+ORDER = ["alerts", "expiry", "desc", None, None, None]
+
+
+def test_cursor_round_trips_datetimes_and_decimals():
+    values = [datetime(2026, 1, 2, 3, 4, 5), Decimal("12.50000000000000000000"), 7]
+    assert decode_cursor(encode_cursor(ORDER, values), ORDER, 3) == values
+
+
+@pytest.mark.parametrize("cursor, order, size", [
+    ("not-a-cursor", ORDER, 2),
+    (encode_cursor(ORDER, [1, 2]), ["alerts", "ref", "desc", None, None, None], 2),
+    (encode_cursor(ORDER, [1, 2]), ORDER, 1),
+])
+def test_cursor_rejected_with_400(cursor, order, size):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, order, size)
+    assert error.value.status_code == 400
+
+
+def _expected(rows, direction):
+    """Sort on (value, key) in `direction`, nulls last ordered by key in the same direction"""
+    reverse = direction == "desc"
+    values = sorted((row for row in rows if row[1] is not None), key=lambda row: (row[1], row[0]), reverse=reverse)
+    nulls = sorted((row for row in rows if row[1] is None), key=lambda row: row[0], reverse=reverse)
+    return [row[0] for row in values + nulls]
+
+
+def _keyset_walk(query, sort_col, key_col, sort_attr, key_attr, direction, limit, null_value=None):
+    seen, after = [], None
+    while True:
+        rows = keyset_page(query, sort_col, key_col, direction, after, limit, null_value=null_value)
+        page = rows[:limit]
+        seen += [getattr(row, key_attr) for row in page]
+        if len(rows) <= limit:
+            return seen
+        after = (getattr(page[-1], sort_attr), getattr(page[-1], key_attr))
+
+
+def _offset_walk(query, sort_col, key_col, key_attr, direction, limit, total, null_value=None):
+    seen = []
+    for offset in range(0, total + limit, limit):
+        seen += [getattr(row, key_attr) for row in
+                 offset_page(query, sort_col, key_col, direction, offset, limit, null_value=null_value)]
+    return seen
+
+
+@pytest.fixture
+def alerts(db):
+    start = datetime(2026, 1, 1)
+    rows = []
+    for ref in range(1, 41):
+        # ties on the sort value and a null region, both ordered by the key
+        expiration = None if ref % 5 == 0 else start + timedelta(days=ref % 7)
+        rows.append((ref, expiration))
+        db.add(Alert(REF_PERSONNE=ref, alert_type="contract_expiry", alert_message="m",
+                     alert_severity="High", expiration_date=expiration))
+    db.commit()
+    return rows
+
+
+@pytest.mark.parametrize("direction", ["asc", "desc"])
+@pytest.mark.parametrize("limit", [1, 3, 7, 50])
+def test_keyset_page_orders_nulls_last(db, alerts, direction, limit):
+    query = db.query(Alert)
+    walked = _keyset_walk(query, Alert.expiration_date, Alert.REF_PERSONNE,
+                          "expiration_date", "REF_PERSONNE", direction, limit)
+    assert walked == _expected(alerts, direction)
+
+
+@pytest.mark.parametrize("direction", ["asc", "desc"])
+def test_offset_page_matches_keyset_order(db, alerts, direction):
+    query = db.query(Alert)
+    walked = _offset_walk(query, Alert.expiration_date, Alert.REF_PERSONNE, "REF_PERSONNE", direction, 6, len(alerts))
+    assert walked == _expected(alerts, direction)
+
+
+@pytest.fixture
+def scored_clients(db):
+    rows = []
+    for ref in range(1, 31):
+        score = None if ref % 4 == 0 else Decimal(ref % 6) / 2
+        rows.append((ref, score))
+        db.add(IndividualRec(REF_PERSONNE=ref, client_score=score))
+    db.commit()
+    return rows
+
+
+@pytest.mark.parametrize("direction", ["asc", "desc"])
+def test_sort_key_sentinel_pages_like_nulls_last(db, scored_clients, direction):
+    query = db.query(IndividualRec)
+    expected = _expected(scored_clients, direction)
+    assert _keyset_walk(query, IndividualRec.sort_key, IndividualRec.REF_PERSONNE, "sort_key", "REF_PERSONNE",
+                        direction, 4, null_value=-1) == expected
+    assert _offset_walk(query, IndividualRec.sort_key, IndividualRec.REF_PERSONNE, "REF_PERSONNE",
+                        direction, 4, len(scored_clients), null_value=-1) == expected
+
+
+def test_offset_page_counts_only_for_pages_past_the_scored_rows(db, scored_clients):
+    query = db.query(IndividualRec)
+    counted = []
+
+    def count(region):
+        counted.append(region)
+        return region.count()
+
+    scored = sum(1 for _, score in scored_clients if score is not None)
+    for offset in range(0, len(scored_clients), 4):
+        offset_page(query, IndividualRec.sort_key, IndividualRec.REF_PERSONNE, "asc", offset, 4,
+                    null_value=-1, count=count)
+        expected = sum(1 for start in range(0, offset + 1, 4) if start >= scored)
+        assert len(counted) == expected
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from app.services.data_version import data_versions, PUBLISHED_SCORES, PUBLISHED_RECOMMENDATIONS
+from app.services.recommendation_service import RecommendationService
+from app.services.scoring_services import ScoringService
+
+
+def _publish(path, refs):
+    pd.DataFrame({'REF_PERSONNE': refs}).to_parquet(path, index=False)
+
+
+def test_recommendation_frames_are_reloaded_after_another_worker_publishes(tmp_path):
+    individual, business = str(tmp_path / "individual.parquet"), str(tmp_path / "business.parquet")
+    _publish(individual, [1])
+    _publish(business, [2])
+    service = RecommendationService()
+    service.load_recommendations(individual, business)
+
+    _publish(individual, [1, 3])
+    service.load_recommendations(individual, business)
+    assert service.individual_recommendations['REF_PERSONNE'].tolist() == [1]
+
+    # The hook of the job ran in another worker: only the version tells this one
+    data_versions.bump(PUBLISHED_RECOMMENDATIONS)
+    service.load_recommendations(individual, business)
+    assert service.individual_recommendations['REF_PERSONNE'].tolist() == [1, 3]
+
+
+def test_scores_are_reloaded_from_their_paths_after_a_publish(tmp_path):
+    individual, business = str(tmp_path / "individual.parquet"), str(tmp_path / "business.parquet")
+    _publish(individual, [1])
+    _publish(business, [2])
+    service = ScoringService()
+    service.load_scores(individual, business)
+    assert not service.reload_if_published()
+
+    _publish(business, [2, 4])
+    data_versions.bump(PUBLISHED_SCORES)
+    assert service.get_scored_clients('business')['REF_PERSONNE'].tolist() == [2, 4]
@@ -1,20 +1,39 @@
 # business_client_recommendations.py
 from config import logger, MINIMUM_BUSINESS_BUDGET, BUDGET_MULTIPLIER, LARGE_BUSINESS_CAPITAL_THRESHOLD
 
-def recommend_business_insurance(client_row, df_contrats, df_products):
+def build_business_recommendation_indexes(df_contrats, df_products):
+    """Per-client and per-category lookups, built once for a whole run instead of filtering per client"""
+    contracts = df_contrats.groupby('REF_PERSONNE')
+    portfolio = df_contrats[['REF_PERSONNE', 'LIB_PRODUIT']].merge(df_products, on='LIB_PRODUIT', how='left')
+    
+    return {
+        'existing_products': contracts['LIB_PRODUIT'].agg(set).to_dict(),
+        'existing_categories': portfolio.dropna(subset=['LIB_SOUS_BRANCHE'])
+            .groupby('REF_PERSONNE')['LIB_SOUS_BRANCHE'].agg(set).to_dict(),
+        'total_premiums': contracts['somme_quittances'].sum().to_dict(),
+        'products_by_category': {
+            category: products.unique()
+            for category, products in df_products.groupby('LIB_SOUS_BRANCHE')['LIB_PRODUIT']
+        }
+    }
+
+def recommend_business_insurance(client_row, df_contrats, df_products, indexes=None):
     
     client_id = client_row['REF_PERSONNE']
     logger.debug(f"Generating recommendations for client: {client_id}")
     
-    client_contracts = df_contrats[df_contrats['REF_PERSONNE'] == client_id]
-    existing_products = set(client_contracts['LIB_PRODUIT'].unique())
+    if indexes is None:
+        indexes = build_business_recommendation_indexes(
+            df_contrats[df_contrats['REF_PERSONNE'] == client_id], df_products
+        )
+    
+    existing_products = indexes['existing_products'].get(client_id, set())
     
     # Get client's existing categories
-    client_portfolio = client_contracts.merge(df_products, on='LIB_PRODUIT', how='left')
-    existing_categories = set(client_portfolio['LIB_SOUS_BRANCHE'].dropna().unique())
+    existing_categories = indexes['existing_categories'].get(client_id, set())
     
     # Calculate budget
-    total_premiums = client_contracts['somme_quittances'].sum()
+    total_premiums = indexes['total_premiums'].get(client_id, 0)
     estimated_budget = max(total_premiums * BUDGET_MULTIPLIER, MINIMUM_BUSINESS_BUDGET)
     
     # DETERMINE BUSINESS INSURANCE NEEDS
@@ -90,7 +109,7 @@ def recommend_business_insurance(client_row, df_contrats, df_products):
     
     for category in top_categories:
         if category in business_product_priority:
-            available_products = df_products[df_products['LIB_SOUS_BRANCHE'] == category]['LIB_PRODUIT'].unique()
+            available_products = indexes['products_by_category'].get(category, [])
             
             # Try to get priority products for this category
             for priority_product in business_product_priority[category]:
@@ -31,4 +31,7 @@ BUSINESS_SEGMENT_THRESHOLDS = {
 # Minimum premium for business recommendations
 MINIMUM_BUSINESS_BUDGET = 1000
 BUDGET_MULTIPLIER = 1.5
-LARGE_BUSINESS_CAPITAL_THRESHOLD = 500000
\ No newline at end of file
+LARGE_BUSINESS_CAPITAL_THRESHOLD = 500000
+
+# Clients processed per batch by the recommendation pipeline
+BATCH_SIZE = 1000
@@ -1,8 +1,8 @@
 # main_pipeline.py
 import pandas as pd 
-from config import logger
+from config import logger, BATCH_SIZE
 from business_client_scoring import calculate_business_client_scores
-from business_client_recommendations import recommend_business_insurance
+from business_client_recommendations import recommend_business_insurance, build_business_recommendation_indexes
 
 def business_recommendation_pipeline(df_contrats, df_personne_morale, df_products):
     
@@ -18,25 +18,31 @@ def business_recommendation_pipeline(df_contrats, df_personne_morale, df_product
     
     # Step 2: Generate recommendations
     logger.info("Generating business recommendations...")
+    indexes = build_business_recommendation_indexes(df_contrats, df_products)
     recommendations = []
+    total_clients = len(df_scored_business)
     
-    for _, client_row in df_scored_business.iterrows():
-        client_recommendations = recommend_business_insurance(client_row, df_contrats, df_products)
+    for start_idx in range(0, total_clients, BATCH_SIZE):
+        end_idx = min(start_idx + BATCH_SIZE, total_clients)
+        logger.info(f"Processing businesses {start_idx + 1}-{end_idx} of {total_clients}")
         
-        recommendations.append({
-            'REF_PERSONNE': client_row['REF_PERSONNE'],
-            'RAISON_SOCIALE': client_row.get('RAISON_SOCIALE', ''),
-            'SECTEUR_GROUP': client_row.get('SECTEUR_GROUP', ''),
-            'ACTIVITE_GROUP': client_row.get('ACTIVITE_GROUP', ''),
-            'RISK_PROFILE': client_row.get('RISK_PROFILE', ''),
-            'recommended_products': client_recommendations,
-            'recommendation_count': len(client_recommendations),
-            'client_score': client_row.get('final_client_score', 0),
-            'client_segment': client_row.get('client_segment', ''),
-            'total_premiums_paid': client_row.get('total_premiums_paid', 0),
-            'total_capital_assured': client_row.get('total_capital_assured', 0),
-            'estimated_budget': max(client_row.get('total_premiums_paid', 0) * 1.5, 1000)
-        })
+        for client_row in df_scored_business.iloc[start_idx:end_idx].to_dict('records'):
+            client_recommendations = recommend_business_insurance(client_row, df_contrats, df_products, indexes)
+            
+            recommendations.append({
+                'REF_PERSONNE': client_row['REF_PERSONNE'],
+                'RAISON_SOCIALE': client_row.get('RAISON_SOCIALE', ''),
+                'SECTEUR_GROUP': client_row.get('SECTEUR_GROUP', ''),
+                'ACTIVITE_GROUP': client_row.get('ACTIVITE_GROUP', ''),
+                'RISK_PROFILE': client_row.get('RISK_PROFILE', ''),
+                'recommended_products': client_recommendations,
+                'recommendation_count': len(client_recommendations),
+                'client_score': client_row.get('final_client_score', 0),
+                'client_segment': client_row.get('client_segment', ''),
+                'total_premiums_paid': client_row.get('total_premiums_paid', 0),
+                'total_capital_assured': client_row.get('total_capital_assured', 0),
+                'estimated_budget': max(client_row.get('total_premiums_paid', 0) * 1.5, 1000)
+            })
     
     df_recommendations = pd.DataFrame(recommendations)
     
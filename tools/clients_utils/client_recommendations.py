@@ -1,31 +1,63 @@
 # client_recommendations.py
 import pandas as pd
-from config import logger, MINIMUM_BUDGET, BUDGET_MULTIPLIER
+from config import logger, MINIMUM_BUDGET, BUDGET_MULTIPLIER, BATCH_SIZE
 
-def recommend_insurance_products(client_row, df_contrats, df_products, client_scoring_data=None):
+def build_recommendation_indexes(df_contrats, df_products, client_scoring_data=None):
+    """Per-client and per-category lookups, built once for a whole run instead of filtering per client"""
+    contracts = df_contrats.groupby('REF_PERSONNE')
+    portfolio = df_contrats[['REF_PERSONNE', 'LIB_PRODUIT']].merge(df_products, on='LIB_PRODUIT', how='left')
+    
+    indexes = {
+        'existing_products': contracts['LIB_PRODUIT'].agg(set).to_dict(),
+        'existing_categories': portfolio.dropna(subset=['LIB_SOUS_BRANCHE'])
+            .groupby('REF_PERSONNE')['LIB_SOUS_BRANCHE'].agg(set).to_dict(),
+        'contract_totals': contracts.agg(
+            total_premiums=('somme_quittances', 'sum'),
+            avg_capital=('Capital_assure', 'mean')
+        ).to_dict('index'),
+        'products_by_category': {
+            category: products.unique()
+            for category, products in df_products.groupby('LIB_SOUS_BRANCHE')['LIB_PRODUIT']
+        },
+        'known_products': set(df_products['LIB_PRODUIT']),
+        'scores': {}
+    }
+    
+    if client_scoring_data is not None:
+        # First scoring row of each client, as the per-client lookup used to take
+        indexes['scores'] = client_scoring_data.drop_duplicates(subset=['REF_PERSONNE']).set_index('REF_PERSONNE')[
+            ['total_premiums_paid', 'avg_premium_per_contract']
+        ].to_dict('index')
+    
+    return indexes
+
+def recommend_insurance_products(client_row, df_contrats, df_products, client_scoring_data=None, indexes=None):
     
     client_id = client_row['REF_PERSONNE']
     logger.debug(f"Generating recommendations for client: {client_id}")
     
-    # 1. GET CLIENT'S EXISTING COVERAGE
-    client_contracts = df_contrats[df_contrats['REF_PERSONNE'] == client_id]
-    existing_products = set(client_contracts['LIB_PRODUIT'].unique())
+    if indexes is None:
+        indexes = build_recommendation_indexes(
+            df_contrats[df_contrats['REF_PERSONNE'] == client_id], df_products,
+            client_scoring_data[client_scoring_data['REF_PERSONNE'] == client_id] if client_scoring_data is not None else None
+        )
     
-    # Merge with products to get categories
-    client_portfolio = client_contracts.merge(df_products, on='LIB_PRODUIT', how='left')
-    existing_categories = set(client_portfolio['LIB_SOUS_BRANCHE'].dropna().unique())
+    # 1. GET CLIENT'S EXISTING COVERAGE
+    existing_products = indexes['existing_products'].get(client_id, set())
+    existing_categories = indexes['existing_categories'].get(client_id, set())
     
     # 2. CALCULATE CLIENT'S INSURANCE BUDGET
-    if client_scoring_data is not None and client_id in client_scoring_data['REF_PERSONNE'].values:
+    client_score = indexes['scores'].get(client_id)
+    if client_score is not None:
         # Use scoring data if available
-        client_score = client_scoring_data[client_scoring_data['REF_PERSONNE'] == client_id].iloc[0]
         estimated_budget = max(client_score['total_premiums_paid'] * BUDGET_MULTIPLIER, 
                               client_score['avg_premium_per_contract'] * 3, 
                               MINIMUM_BUDGET)
     else:
         # Fallback estimation
-        total_premiums = client_contracts['somme_quittances'].sum()
-        avg_capital = client_contracts['Capital_assure'].mean()
+        totals = indexes['contract_totals'].get(client_id, {'total_premiums': 0, 'avg_capital': float('nan')})
+        total_premiums = totals['total_premiums']
+        avg_capital = totals['avg_capital']
         estimated_budget = max(total_premiums * BUDGET_MULTIPLIER, avg_capital * 0.02, MINIMUM_BUDGET)
     
     # 3. PRIORITIZE INSURANCE NEEDS BASED ON CLIENT PROFILE
@@ -92,7 +124,7 @@ def recommend_insurance_products(client_row, df_contrats, df_products, client_sc
     for category in top_categories:
         if category in category_priority:
             # Get available products in this category
-            available_products = df_products[df_products['LIB_SOUS_BRANCHE'] == category]['LIB_PRODUIT'].unique()
+            available_products = indexes['products_by_category'].get(category, [])
             
             # Try to get priority products, otherwise get any product from the category
             for priority_product in category_priority[category]:
@@ -109,8 +141,7 @@ def recommend_insurance_products(client_row, df_contrats, df_products, client_sc
     
     for product in recommended_products[:2]:
         # Simple budget check
-        product_data = df_products[df_products['LIB_PRODUIT'] == product]
-        if not product_data.empty:
+        if product in indexes['known_products']:
             if ('BASIQUE' in product or 'STANDARD' in product or 
                 estimated_budget > 1000 or
                 len(existing_products) == 0):
@@ -122,23 +153,27 @@ def recommend_insurance_products(client_row, df_contrats, df_products, client_sc
 def generate_recommendations_for_clients(df_clients, df_contrats, df_products, client_scoring_data=None):
     logger.info("Generating recommendations for all clients...")
     
+    indexes = build_recommendation_indexes(df_contrats, df_products, client_scoring_data)
     recommendations = []
+    total_clients = len(df_clients)
     
-    for _, client_row in df_clients.iterrows():
-        client_id = client_row['REF_PERSONNE']
+    for start_idx in range(0, total_clients, BATCH_SIZE):
+        end_idx = min(start_idx + BATCH_SIZE, total_clients)
+        logger.info(f"Processing clients {start_idx + 1}-{end_idx} of {total_clients}")
         
-        recommended_products = recommend_insurance_products(
-            client_row, df_contrats, df_products, client_scoring_data
-        )
-        
-        recommendations.append({
-            'REF_PERSONNE': client_id,
-            'recommended_products': recommended_products,
-            'recommendation_count': len(recommended_products),
-            'AGE': client_row['AGE'],
-            'PROFESSION_GROUP': client_row['PROFESSION_GROUP'],
-            'SITUATION_FAMILIALE': client_row['SITUATION_FAMILIALE'],
-            'SECTEUR_ACTIVITE_GROUP': client_row['SECTEUR_ACTIVITE_GROUP']
-        })
+        for client_row in df_clients.iloc[start_idx:end_idx].to_dict('records'):
+            recommended_products = recommend_insurance_products(
+                client_row, df_contrats, df_products, client_scoring_data, indexes
+            )
+            
+            recommendations.append({
+                'REF_PERSONNE': client_row['REF_PERSONNE'],
+                'recommended_products': recommended_products,
+                'recommendation_count': len(recommended_products),
+                'AGE': client_row['AGE'],
+                'PROFESSION_GROUP': client_row['PROFESSION_GROUP'],
+                'SITUATION_FAMILIALE': client_row['SITUATION_FAMILIALE'],
+                'SECTEUR_ACTIVITE_GROUP': client_row['SECTEUR_ACTIVITE_GROUP']
+            })
     
     return pd.DataFrame(recommendations)
\ No newline at end of file
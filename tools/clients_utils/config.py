@@ -36,4 +36,7 @@ RISK_THRESHOLDS = {
 
 # Minimum budget for recommendations
 MINIMUM_BUDGET = 500
-BUDGET_MULTIPLIER = 1.5
\ No newline at end of file
+BUDGET_MULTIPLIER = 1.5
+
+# Clients processed per batch by the recommendation pipeline
+BATCH_SIZE = 1000